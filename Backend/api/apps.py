@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from django.core import checks
+        from .replicas import check_pin_cache
+
+        checks.register(check_pin_cache, checks.Tags.caches)
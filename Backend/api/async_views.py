@@ -0,0 +1,146 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .conditional import add_validators, detail_etag, list_etag, not_modified
+from .pagination import KeysetPagination
+
+
+class AsyncAPIView(APIView):
+    """
+    Async counterpart of the DRF APIView for the hot per-user endpoints.
+
+    DRF 3.14 views are sync only, so under ASGI every request to them is
+    handed to a thread. These views keep the APIView request cycle:
+    initial() (content negotiation, authentication, permissions and
+    throttles, all of which may hit the cache or database) runs in one
+    sync_to_async call, exceptions go through handle_exception() and the
+    response through finalize_response(), so status codes, headers and
+    bodies match the sync views. Only the handlers themselves run on the
+    event loop, talking to the database through Django's async ORM.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # APIView.as_view wraps the view in csrf_exempt(), which in Django 4.2
+        # hides that it is a coroutine function; mark it exempt directly
+        view = super(APIView, cls).as_view(**initkwargs)
+        view.cls = cls
+        view.initkwargs = initkwargs
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    def render(self, data, status_code=status.HTTP_200_OK):
+        return Response(data, status=status_code)
+
+
+class AsyncOwnedModelMixin:
+    """Entries of `model` that belong to the requesting user."""
+    model = None
+    serializer_class = None
+    modified_field = 'updated_at'
+
+    def get_queryset(self):
+        return self.model.objects.filter(user=self.request.user)
+
+
+class AsyncListCreateView(AsyncOwnedModelMixin, AsyncAPIView):
+    """
+    GET: the user's entries through `fast_serializer_class`, keyset-paginated
+    on request and answered with 304 while the list ETag still matches.
+    POST: create an entry through `serializer_class`.
+    """
+    fast_serializer_class = None
+    pagination_class = KeysetPagination
+
+    async def get(self, request):
+        queryset = self.get_queryset().order_by('-created_at', '-id')
+        etag = await sync_to_async(list_etag)(request, self.model)
+        response = not_modified(request, etag, None)
+        if response is None:
+            response = self.render(await self.list_data(request, queryset))
+        return add_validators(response, etag, None)
+
+    async def list_data(self, request, queryset):
+        serializer = self.fast_serializer_class()
+        rows = queryset.values(*serializer.lookups())
+
+        paginator = self.pagination_class()
+        page_rows = paginator.get_page_queryset(rows, request)
+        if page_rows is None:
+            return [serializer.to_representation(row) async for row in rows]
+        page = paginator.set_page([row async for row in page_rows])
+        return paginator.get_paginated_data([serializer.to_representation(row) for row in page])
+
+    async def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.instance = await self.model.objects.acreate(**serializer.validated_data, user=request.user)
+        return self.render(serializer.data, status.HTTP_201_CREATED)
+
+
+class AsyncRetrieveUpdateDestroyView(AsyncOwnedModelMixin, AsyncAPIView):
+    """GET (with ETag/Last-Modified), PUT, PATCH and DELETE on one of the user's entries."""
+
+    async def get_object(self, id):
+        try:
+            return await self.get_queryset().aget(id=id)
+        except self.model.DoesNotExist:
+            raise Http404
+
+    async def get(self, request, id):
+        instance = await self.get_object(id)
+        modified = getattr(instance, self.modified_field)
+        etag = detail_etag(instance, modified)
+        response = not_modified(request, etag, modified)
+        if response is None:
+            response = self.render(self.serializer_class(instance).data)
+        return add_validators(response, etag, modified)
+
+    async def put(self, request, id):
+        return await self.update(request, id, partial=False)
+
+    async def patch(self, request, id):
+        return await self.update(request, id, partial=True)
+
+    async def update(self, request, id, partial):
+        instance = await self.get_object(id)
+        serializer = self.serializer_class(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        for field, value in serializer.validated_data.items():
+            setattr(instance, field, value)
+        await instance.asave()
+        return self.render(serializer.data)
+
+    async def delete(self, request, id):
+        instance = await self.get_object(id)
+        await instance.adelete()
+        return self.render(None, status.HTTP_204_NO_CONTENT)
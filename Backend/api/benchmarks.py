@@ -0,0 +1,14 @@
+from contextlib import contextmanager
+
+from django.db import transaction
+
+
+@contextmanager
+def rolled_back():
+    """
+    Run the block in a transaction that is always rolled back, so the rows
+    a benchmark seeds never outlive it. on_commit() callbacks never run.
+    """
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
@@ -0,0 +1,216 @@
+import json
+from datetime import datetime
+
+from functools import reduce
+from operator import or_
+
+from django import forms
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db import connections, models
+from django.db.models import Exists, Max, Min, Q
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+# Stands in for the chosen object's key in the URL an autocomplete filter navigates to
+FILTER_VALUE_PLACEHOLDER = '__value__'
+
+
+def table_estimate(model, using):
+    """PostgreSQL's estimate of the rows in `model`'s table, or None if it has never been analyzed."""
+    with connections[using].cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+        row = cursor.fetchone()
+    return row[0] if row and row[0] >= 0 else None
+
+
+def plan_estimate(queryset):
+    """The planner's row estimate for `queryset`, which PostgreSQL works out without running it."""
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that stops counting exactly once a changelist grows large.
+
+    On PostgreSQL an unfiltered changelist over more than `threshold` rows
+    reports the table's reltuples estimate, and a filtered one counts at most
+    `threshold + 1` rows before falling back to the planner's estimate. Both
+    are read from statistics rather than by visiting every row. Page numbers
+    past the true end of an overestimated list come back empty. Other
+    databases count exactly.
+    """
+
+    @cached_property
+    def threshold(self):
+        return settings.ADMIN_EXACT_COUNT_LIMIT
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, models.QuerySet) or connections[queryset.db].vendor != 'postgresql':
+            return super().count
+        if not queryset.query.where:
+            estimate = table_estimate(queryset.model, queryset.db)
+            if estimate is not None and estimate > self.threshold:
+                return estimate
+            return super().count
+        capped = queryset.order_by()[:self.threshold + 1].count()
+        if capped <= self.threshold:
+            return capped
+        return max(plan_estimate(queryset), capped)
+
+
+def _period_start(moment, kind):
+    if kind == 'year':
+        return datetime(moment.year, 1, 1)
+    if kind == 'month':
+        return datetime(moment.year, moment.month, 1)
+    return datetime(moment.year, moment.month, moment.day)
+
+
+def _next_period(start, kind):
+    if kind == 'year':
+        return start.replace(year=start.year + 1)
+    if kind == 'month':
+        return start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+    return datetime.fromordinal(start.toordinal() + 1)
+
+
+class IndexedDatesQuerySet(models.QuerySet):
+    """
+    QuerySet whose datetimes() walks an index instead of the table.
+
+    Django's datetimes() runs SELECT DISTINCT date_trunc(...) over every
+    matching row, which for the admin date hierarchy means the whole table
+    or a whole month of it. Here the first and last values come from
+    MIN/MAX, and one more query checks every period between them with an
+    EXISTS each, so an index on the field answers both queries however many
+    rows there are.
+    """
+
+    def datetimes(self, field_name, kind, order='ASC', tzinfo=None, is_dst=timezone.NOT_PASSED):
+        if kind not in ('year', 'month', 'day'):
+            return super().datetimes(field_name, kind, order, tzinfo, is_dst)
+        tz = tzinfo or timezone.get_current_timezone()
+        queryset = self.order_by()
+        bounds = queryset.aggregate(first=Min(field_name), last=Max(field_name))
+        if bounds['first'] is None:
+            return []
+        first = _period_start(timezone.localtime(bounds['first'], tz), kind)
+        last = _period_start(timezone.localtime(bounds['last'], tz), kind)
+
+        periods = [first]
+        while periods[-1] < last:
+            periods.append(_next_period(periods[-1], kind))
+        periods = [timezone.make_aware(start, tz) for start in periods]
+        # The first and last periods hold the MIN and MAX rows; the table is
+        # known to have a row to hang the other checks on
+        probes = {
+            f'period_{index}': Exists(
+                queryset.filter(**{f'{field_name}__gte': lower, f'{field_name}__lt': upper})
+            )
+            for index, (lower, upper) in enumerate(zip(periods[1:-1], periods[2:]), start=1)
+        }
+        found = queryset.annotate(**probes).values(*probes)[0] if probes else {}
+        periods = [
+            start for index, start in enumerate(periods)
+            if index in (0, len(periods) - 1) or found[f'period_{index}']
+        ]
+        return periods if order == 'ASC' else periods[::-1]
+
+
+def prefix_search(queryset, fields, prefix):
+    """
+    Rows of `queryset` where any of `fields` starts with `prefix`.
+
+    A case-sensitive LIKE 'prefix%' is answered by a btree index on the
+    column (on PostgreSQL, the varchar_pattern_ops index Django adds next
+    to unique and db_index CharFields); istartswith and icontains are not.
+    """
+    return queryset.filter(reduce(or_, (Q(**{f'{field}__startswith': prefix}) for field in fields)))
+
+
+class AutocompleteListFilter(admin.RelatedFieldListFilter):
+    """
+    Foreign key filter that picks the related object with the admin's
+    autocomplete widget instead of listing every one in the sidebar.
+
+    Only the selected object is loaded, to show its name. As with
+    autocomplete_fields, the related model's admin needs search_fields, and
+    the model admin using the filter must be a ScalableModelAdmin so the
+    changelist loads the widget's scripts.
+    """
+    template = 'admin/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.admin_site = model_admin.admin_site
+        super().__init__(field, request, params, model, model_admin, field_path)
+
+    def field_choices(self, field, request, model_admin):
+        return []
+
+    def has_output(self):
+        return True
+
+    def choices(self, changelist):
+        all_url = changelist.get_query_string(remove=[self.lookup_kwarg, self.lookup_kwarg_isnull])
+        yield {
+            'selected': self.lookup_val is None and not self.lookup_val_isnull,
+            'query_string': all_url,
+            'display': _('All'),
+        }
+        url = changelist.get_query_string({self.lookup_kwarg: FILTER_VALUE_PLACEHOLDER}, [self.lookup_kwarg_isnull])
+        chooser = forms.ModelChoiceField(
+            queryset=self.field.remote_field.model._default_manager.all(),
+            widget=AutocompleteSelect(self.field, self.admin_site, attrs={
+                'data-filter-url': url,
+                'data-filter-placeholder': FILTER_VALUE_PLACEHOLDER,
+                'data-filter-clear-url': all_url,
+            }),
+            required=False,
+        )
+        yield {
+            'selected': self.lookup_val is not None,
+            'widget': chooser.widget.render(self.lookup_kwarg, self.lookup_val),
+        }
+
+    @staticmethod
+    def media(admin_site):
+        return AutocompleteSelect(None, admin_site).media + forms.Media(js=['admin/js/autocomplete_filter.js'])
+
+
+class ScalableModelAdmin(admin.ModelAdmin):
+    """
+    ModelAdmin for tables with millions of rows.
+
+    Subclasses list the relations their list_display and __str__ touch in
+    list_select_related, so a page costs the same number of queries however
+    many rows it shows, and name an indexed datetime field as date_hierarchy.
+    The page count is estimated past ADMIN_EXACT_COUNT_LIMIT and the second
+    unfiltered count behind "N total" is skipped. Foreign keys with many
+    rows on the other side are filtered with AutocompleteListFilter.
+    Each app's AdminChangelistQueryBudgetTests loads its changelists and
+    fails if a page runs more than `changelist_query_budget` queries.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    changelist_query_budget = 12
+
+    @property
+    def media(self):
+        media = super().media
+        if any(
+            isinstance(spec, (list, tuple)) and issubclass(spec[1], AutocompleteListFilter)
+            for spec in self.list_filter
+        ):
+            media += AutocompleteListFilter.media(self.admin_site)
+        return media
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        return IndexedDatesQuerySet(queryset.model, queryset.query.chain(), queryset.db, queryset._hints)
@@ -0,0 +1,164 @@
+import hashlib
+import threading
+import time
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from .counters import bump_counter, read_counter
+
+
+def make_etag(*parts):
+    """Quoted ETag hashing `parts`: one bytes body, or values joined as text."""
+    if len(parts) == 1 and isinstance(parts[0], bytes):
+        data = parts[0]
+    else:
+        data = ':'.join(str(part) for part in parts).encode()
+    return quote_etag(hashlib.sha1(data).hexdigest())
+
+
+def list_generation_cache():
+    return caches[settings.LIST_GENERATION_CACHE]
+
+
+def list_generation_key(model, user_id):
+    return f'conditional:{model._meta.label_lower}:{user_id}'
+
+
+def list_changed(model, user_ids):
+    """Invalidate the list ETags of `model` for `user_ids`. Call once the change has committed."""
+    for user_id in user_ids:
+        bump_counter(list_generation_cache(), list_generation_key(model, user_id))
+
+
+def list_etag(request, model):
+    """
+    ETag of the requesting user's `model` list at the requested URL.
+
+    It is keyed on a per-user generation counter that every write bumps
+    (see track_changes), so a 304 costs one cache read and no query. Read it
+    before the list itself: a change committed in between then only makes
+    the next request miss, never pins an outdated body to a current ETag.
+    """
+    generation = read_counter(list_generation_cache(), list_generation_key(model, request.user.pk))
+    return make_etag(model._meta.label, request.user.pk, request.get_full_path(), generation)
+
+
+# The delete (a queryset, or the instance deleted first) whose users' list
+# ETags have been scheduled for invalidation so far; see rollup_row_deleted
+_deleting = threading.local()
+
+
+def row_saved(sender, instance, **kwargs):
+    transaction.on_commit(partial(list_changed, sender, [instance.user_id]))
+
+
+def row_deleted(sender, instance, origin=None, **kwargs):
+    origin_model = origin.model if isinstance(origin, models.QuerySet) else type(origin)
+    if origin_model is get_user_model():
+        # Nobody is left to list them once the whole account is being deleted
+        return
+    if origin is None or getattr(_deleting, 'origin', None) is not origin:
+        _deleting.origin, _deleting.user_ids = origin, set()
+    if instance.user_id not in _deleting.user_ids:
+        _deleting.user_ids.add(instance.user_id)
+        transaction.on_commit(partial(list_changed, sender, [instance.user_id]))
+
+
+def track_changes(model):
+    """
+    Invalidate the owner's list ETag whenever a row of per-user `model` is
+    saved or deleted, including queryset and admin bulk deletes. Queryset
+    update() and bulk_create() send no signals; their callers call
+    list_changed() themselves.
+    """
+    label = model._meta.label_lower
+    post_save.connect(row_saved, sender=model, dispatch_uid=f'list-etag:save:{label}')
+    post_delete.connect(row_deleted, sender=model, dispatch_uid=f'list-etag:delete:{label}')
+
+
+def detail_etag(instance, modified):
+    return make_etag(instance._meta.label, instance.pk, modified.isoformat())
+
+
+def settled(last_modified):
+    """
+    `last_modified` once the second it falls in is over, else None.
+
+    Last-Modified has one-second resolution, so a second edit within the
+    same second would compare as unchanged against it. It is only sent, and
+    If-Modified-Since only honoured, for changes in an earlier second; the
+    ETag covers the rest.
+    """
+    if last_modified is not None and int(last_modified.timestamp()) < int(time.time()):
+        return last_modified
+    return None
+
+
+def not_modified(request, etag, last_modified):
+    """The 304 (or 412) response if the client's validators still match, else None."""
+    last_modified = settled(last_modified)
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+
+def add_validators(response, etag, last_modified):
+    """
+    Attach the validators to `response`.
+
+    Responses are private to the requesting user, so they are marked
+    `private, no-cache` and vary on Authorization: browsers keep them and
+    revalidate on every use, shared caches never store them.
+    """
+    last_modified = settled(last_modified)
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(int(last_modified.timestamp()))
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+def conditional_response(request, etag, last_modified, build):
+    """
+    Answer with 304 Not Modified if the client's validators still match,
+    otherwise call `build()` and attach the validators to its response.
+    """
+    response = not_modified(request, etag, last_modified)
+    if response is None:
+        response = build()
+    return add_validators(response, etag, last_modified)
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for generic list and retrieve views over
+    a model registered with track_changes().
+
+    List ETags come from the user's generation counter for the model and
+    detail validators from the single object, so a 304 is answered without
+    serializing anything. Lists only carry an ETag.
+    """
+    modified_field = 'updated_at'
+
+    def list(self, request, *args, **kwargs):
+        etag = list_etag(request, self.get_queryset().model)
+        return conditional_response(
+            request, etag, None, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        modified = getattr(instance, self.modified_field)
+        etag = detail_etag(instance, modified)
+        return conditional_response(
+            request, etag, modified, lambda: Response(self.get_serializer(instance).data)
+        )
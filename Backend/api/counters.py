@@ -0,0 +1,53 @@
+import time
+
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.memcached import BaseMemcachedCache
+from django.core.cache.backends.redis import RedisCache
+
+
+def read_counter(cache, key):
+    """
+    Current value of the invalidation counter `key` in `cache`.
+
+    A missing counter starts from the current time in nanoseconds rather
+    than 1, so a counter that was evicted and recreated never repeats a
+    value that old cache keys or other processes still hold.
+    """
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        value = cache.get(key)
+    return value
+
+
+def bump_counter(cache, key):
+    """Move the counter `key` in `cache` to a value nobody has seen yet."""
+    if is_shared_cache(cache):
+        try:
+            cache.incr(key)
+            return
+        except ValueError:
+            pass
+    # Elsewhere incr() is a get and a set, so two concurrent bumps could both
+    # write the same value; two fresh timestamps cannot collide that way
+    cache.set(key, time.time_ns(), timeout=None)
+
+
+def is_shared_cache(cache):
+    """
+    Whether `cache` is one store for every process on every host with an
+    atomic incr(), as counters that coordinate processes need. The file and
+    local-memory backends are neither: they are per host or per process,
+    and their incr() is a get followed by a set.
+    """
+    return isinstance(cache, (BaseMemcachedCache, RedisCache))
+
+
+def is_process_local(cache):
+    """
+    Whether `cache` is private to this process (or stores nothing), so
+    counters in it cannot tell other processes anything. The file backend
+    is not: every worker on the host reads the same files.
+    """
+    return isinstance(cache, (LocMemCache, DummyCache))
@@ -0,0 +1,231 @@
+import csv
+import json
+import zipfile
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.views import APIView
+
+from authentication.throttling import TokenBucketThrottle
+from checkin.models import CheckIn, QuickCheckIn
+from checkin.serializers import CheckInListSerializer, QuickCheckInListSerializer
+from journal.models import JournalEntry
+from journal.serializers import JournalEntryListSerializer
+
+# Rows fetched per round trip (a server-side cursor on PostgreSQL)
+EXPORT_FETCH_ROWS = 2000
+# Encoded output is handed to the server in pieces of about this size
+EXPORT_CHUNK_BYTES = 64 * 1024
+EXPORT_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S%z'
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+    'zip': 'application/zip',
+}
+
+
+class JournalEntryExportSerializer(JournalEntryListSerializer):
+    datetime_format = EXPORT_DATETIME_FORMAT
+
+
+class CheckInExportSerializer(CheckInListSerializer):
+    datetime_format = EXPORT_DATETIME_FORMAT
+
+
+class QuickCheckInExportSerializer(QuickCheckInListSerializer):
+    datetime_format = EXPORT_DATETIME_FORMAT
+
+
+class _Echo:
+    """File-like object for csv.writer that hands each formatted line back."""
+
+    def write(self, value):
+        return value
+
+
+class _ZipSink:
+    """
+    Write-only file for zipfile that keeps what was written until drained.
+
+    It has no tell() or seek(), so ZipFile writes in streaming mode: sizes and
+    checksums follow each member in a data descriptor instead of being
+    patched into its header afterwards.
+    """
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def ndjson_lines(rows, serializer, collection=None):
+    for row in rows:
+        data = serializer.to_representation(row)
+        if collection is not None:
+            data = {'collection': collection, **data}
+        yield json.dumps(data, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def csv_lines(rows, serializer):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(serializer.fields)
+    for row in rows:
+        data = serializer.to_representation(row)
+        yield writer.writerow(data[name] for name in serializer.fields)
+
+
+def encode_chunks(lines):
+    """Join text lines into UTF-8 chunks of about EXPORT_CHUNK_BYTES."""
+    buffer, size = [], 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield ''.join(buffer).encode('utf-8')
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+def zip_chunks(members):
+    """
+    Deflate `members`, an iterable of (filename, chunks), into a ZIP archive
+    produced piece by piece as the chunks arrive.
+    """
+    sink = _ZipSink()
+    date_time = timezone.now().timetuple()[:6]
+    with zipfile.ZipFile(sink, 'w') as archive:
+        for filename, chunks in members:
+            info = zipfile.ZipInfo(filename, date_time=date_time)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            # The size is unknown until the member is written, so allow ZIP64 up front
+            with archive.open(info, 'w', force_zip64=True) as member:
+                for chunk in chunks:
+                    member.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+    yield sink.drain()
+
+
+async def aiterate(iterator):
+    """
+    Serve a sync iterator to an ASGI server without reading it into memory.
+
+    Django 4.2 turns a sync StreamingHttpResponse into a list before sending it
+    under ASGI; stepping through it on the sync thread keeps the export
+    streaming and its queries on the connection the view used.
+    """
+    iterator = iter(iterator)
+    step = sync_to_async(next, thread_sensitive=True)
+    while (chunk := await step(iterator, None)) is not None:
+        yield chunk
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """
+    The export picks its own content type from ?format=, so the Accept header
+    and DRF's ?format= override don't apply; errors render with the first
+    renderer (JSON).
+    """
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class ExportThrottle(TokenBucketThrottle):
+    """Exports read a user's whole history, so each user gets a few per hour."""
+    scope = 'export'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': request.user.pk}
+
+
+class ExportView(APIView):
+    """
+    Download the user's journal entries, check-ins and quick check-ins.
+
+    Query parameters:
+      format       'ndjson' (default) or 'csv'
+      zip          '1' to get a ZIP archive with one file per collection
+      collections  comma-separated subset of journal, checkin, quick_checkin
+
+    Rows are read through .iterator() and written out as they arrive, so the
+    server holds one fetch and one output chunk at a time however long the
+    history is. Unzipped NDJSON tags each line with its collection; unzipped
+    CSV can only hold one collection, since the columns differ.
+    """
+    content_negotiation_class = IgnoreClientContentNegotiation
+    throttle_classes = [ExportThrottle]
+    collections = {
+        JournalEntry.sync_collection: (JournalEntry, JournalEntryExportSerializer),
+        CheckIn.sync_collection: (CheckIn, CheckInExportSerializer),
+        QuickCheckIn.sync_collection: (QuickCheckIn, QuickCheckInExportSerializer),
+    }
+
+    def get(self, request):
+        output = request.query_params.get('format', 'ndjson')
+        if output not in ('ndjson', 'csv'):
+            raise ValidationError({'format': "Use 'ndjson' or 'csv'."})
+        zipped = request.query_params.get('zip', '').lower() in ('1', 'true')
+        names = self.get_collection_names(request)
+        if output == 'csv' and not zipped and len(names) > 1:
+            raise ValidationError({'collections': 'A CSV file holds one collection; pick one or add zip=1.'})
+
+        if zipped:
+            stream = zip_chunks(
+                (f'{name}.{output}', encode_chunks(self.lines(name, output, tagged=False))) for name in names
+            )
+            extension = 'zip'
+        else:
+            stream = encode_chunks(line for name in names for line in self.lines(name, output, tagged=True))
+            extension = output
+
+        if isinstance(request._request, ASGIRequest):
+            stream = aiterate(stream)
+        response = StreamingHttpResponse(stream, content_type=CONTENT_TYPES[extension])
+        filename = f'youmatter-export-{timezone.now():%Y%m%d}.{extension}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['Cache-Control'] = 'private, no-store'
+        return response
+
+    def get_collection_names(self, request):
+        requested = request.query_params.get('collections')
+        if not requested:
+            return list(self.collections)
+        names = [name.strip() for name in requested.split(',') if name.strip()]
+        unknown = [name for name in names if name not in self.collections]
+        if unknown or not names:
+            raise ValidationError({'collections': f"Choose from {', '.join(self.collections)}."})
+        return list(dict.fromkeys(names))
+
+    def lines(self, name, output, tagged):
+        model, serializer_class = self.collections[name]
+        serializer = serializer_class()
+        rows = (
+            model.objects.filter(user=self.request.user)
+            .order_by('created_at', 'id')
+            .values(*serializer.lookups())
+            .iterator(chunk_size=EXPORT_FETCH_ROWS)
+        )
+        if output == 'csv':
+            return csv_lines(rows, serializer)
+        return ndjson_lines(rows, serializer, name if tagged else None)
@@ -0,0 +1,90 @@
+from functools import lru_cache
+
+from django.utils import timezone
+from rest_framework.response import Response
+
+# strftime directives finer than a minute; formats using them are not memoized
+SUB_MINUTE_DIRECTIVES = ('%S', '%f', '%s', '%X', '%c', '%T', '%r')
+
+
+@lru_cache(maxsize=None)
+def _per_minute(output_format):
+    return not any(directive in output_format for directive in SUB_MINUTE_DIRECTIVES)
+
+
+@lru_cache(maxsize=16384)
+def _format_minute(minute, tz, output_format):
+    return minute.astimezone(tz).strftime(output_format)
+
+
+def format_datetime(value, output_format, tz=None):
+    """
+    Format an aware datetime exactly like DRF's DateTimeField(format=...).
+
+    Formats without seconds give the same string for every instant in a
+    minute, so those are memoized per (minute, timezone, format): a user's
+    history has far fewer distinct minutes than rows to format twice.
+    Pass `tz` when formatting many values; looking up the current timezone
+    costs more than a cache hit.
+    """
+    if value is None:
+        return None
+    if tz is None:
+        tz = timezone.get_current_timezone()
+    if _per_minute(output_format):
+        return _format_minute(value.replace(second=0, microsecond=0), tz, output_format)
+    return value.astimezone(tz).strftime(output_format)
+
+
+class FastListSerializer:
+    """
+    Read-only list serializer that turns `.values()` rows into plain dicts.
+
+    Subclasses list the output `fields` in the same order as the ModelSerializer
+    they stand in for, map any output field to a different `.values()` lookup
+    in `sources`, and name the `datetime_fields` to format with
+    `datetime_format`. The output must stay byte-identical to the
+    ModelSerializer's; each app's FastListSerializerParityTests checks that.
+    """
+    fields = ()
+    sources = {}
+    datetime_fields = ()
+    datetime_format = None
+
+    def __init__(self):
+        self.tz = timezone.get_current_timezone()
+        self.columns = [
+            (name, self.sources.get(name, name), name in self.datetime_fields)
+            for name in self.fields
+        ]
+
+    def lookups(self):
+        return [source for _, source, _ in self.columns]
+
+    def to_representation(self, row):
+        data = {}
+        for name, source, is_datetime in self.columns:
+            value = row[source]
+            if is_datetime and value is not None:
+                value = format_datetime(value, self.datetime_format, self.tz)
+            data[name] = value
+        return data
+
+
+class FastListMixin:
+    """
+    Serve GET list requests through `fast_serializer_class` instead of the
+    view's ModelSerializer. Writes and detail views are unaffected.
+    """
+    fast_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.fast_serializer_class()
+        queryset = self.filter_queryset(self.get_queryset()).values(*serializer.lookups())
+
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else queryset
+        data = [serializer.to_representation(row) for row in rows]
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
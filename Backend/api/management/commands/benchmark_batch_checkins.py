@@ -0,0 +1,52 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.benchmarks import rolled_back
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare uploading N quick check-ins as N single POSTs against one POST '
+        'to the batch endpoint, through the full JWT-authenticated request stack'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=100)
+        parser.add_argument('--rounds', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self.run(options['items'], options['rounds'])
+
+    def run(self, items, rounds):
+        user = User.objects.create_user(username='benchmark-batch', email='benchmark-batch@example.com')
+        client = APIClient(HTTP_HOST='localhost')
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        payload = [
+            {'mood': 'ok', 'intensity': i % 10, 'note': f'offline note {i}', 'type': 'quick'}
+            for i in range(items)
+        ]
+
+        single, batch = [], []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            for item in payload:
+                response = client.post('/api/checkin/quick/', item, format='json')
+                assert response.status_code == 201, response.content
+            single.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            response = client.post('/api/checkin/quick/batch/', payload, format='json')
+            assert response.status_code == 201, response.content
+            batch.append(time.perf_counter() - start)
+
+        best_single, best_batch = min(single), min(batch)
+        self.stdout.write(f'{items} single POSTs: {best_single * 1000:.1f} ms (best of {rounds})')
+        self.stdout.write(f'1 batch POST:    {best_batch * 1000:.1f} ms (best of {rounds})')
+        self.stdout.write(self.style.SUCCESS(f'Batch upload is {best_single / best_batch:.1f}x faster'))
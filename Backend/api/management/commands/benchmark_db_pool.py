@@ -0,0 +1,149 @@
+import statistics
+import threading
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import load_backend
+
+from api.pooled_postgresql.base import POOL_DEFAULTS, _pools, pool_stats
+
+PLAIN_ENGINE = 'django.db.backends.postgresql'
+POOLED_ENGINE = 'api.pooled_postgresql'
+
+
+class Command(BaseCommand):
+    help = (
+        'Simulate request threads against the PostgreSQL database, each taking a '
+        'connection, running a few queries and releasing it, and compare '
+        'throughput, tail latency, errors and server connections when every '
+        'request connects, when every thread keeps a persistent connection '
+        '(CONN_MAX_AGE) and when threads share a pool. Run it against a local '
+        'PostgreSQL with low max_connections to see where each mode breaks.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', default='8,32,128,256',
+            help='Comma-separated numbers of concurrent request threads to try',
+        )
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per mode and worker count')
+        parser.add_argument('--queries', type=int, default=3, help='Queries per simulated request')
+        parser.add_argument('--query-ms', type=float, default=2.0, help='Server time of each query (pg_sleep)')
+        parser.add_argument('--pool-min-size', type=int, default=POOL_DEFAULTS['min_size'])
+        parser.add_argument('--pool-max-size', type=int, default=20)
+        parser.add_argument('--pool-timeout', type=float, default=POOL_DEFAULTS['timeout'])
+        parser.add_argument('--modes', default='connect,persistent,pool')
+
+    def handle(self, *args, **options):
+        if connections[DEFAULT_DB_ALIAS].vendor != 'postgresql':
+            raise CommandError('The benchmark needs DATABASE_URL to point at PostgreSQL')
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute('SHOW max_connections')
+            self.stdout.write(f'Server max_connections = {cursor.fetchone()[0]}')
+        connections[DEFAULT_DB_ALIAS].close()
+
+        self.options = options
+        for workers in [int(value) for value in options['workers'].split(',')]:
+            self.stdout.write(f'{workers} workers')
+            for mode in options['modes'].split(','):
+                self.run(mode, workers)
+
+    def settings_for(self, mode):
+        settings_dict = {**connections[DEFAULT_DB_ALIAS].settings_dict}
+        settings_dict['OPTIONS'] = {
+            key: value for key, value in settings_dict['OPTIONS'].items() if key != 'pool'
+        }
+        settings_dict['CONN_HEALTH_CHECKS'] = False
+        if mode == 'connect':
+            settings_dict.update(ENGINE=PLAIN_ENGINE, CONN_MAX_AGE=0)
+        elif mode == 'persistent':
+            settings_dict.update(ENGINE=PLAIN_ENGINE, CONN_MAX_AGE=None)
+        elif mode == 'pool':
+            settings_dict.update(ENGINE=POOLED_ENGINE, CONN_MAX_AGE=0)
+            settings_dict['OPTIONS']['pool'] = {
+                **POOL_DEFAULTS,
+                'min_size': self.options['pool_min_size'],
+                'max_size': self.options['pool_max_size'],
+                'timeout': self.options['pool_timeout'],
+            }
+        else:
+            raise CommandError(f'Unknown mode {mode!r}; choose from connect, persistent, pool')
+        return settings_dict
+
+    def run(self, mode, workers):
+        # Its own alias, so each run starts with an empty pool
+        alias = f'benchmark_{mode}_{workers}'
+        settings_dict = self.settings_for(mode)
+        backend = load_backend(settings_dict['ENGINE'])
+        queries, sleep = self.options['queries'], self.options['query_ms'] / 1000
+        deadline = time.monotonic() + self.options['duration']
+        latencies, errors = [], Counter()
+        lock = threading.Lock()
+        done = threading.Event()
+        peak_connections = [0]
+
+        def worker():
+            connection = backend.DatabaseWrapper(settings_dict, alias)
+            try:
+                while time.monotonic() < deadline:
+                    start = time.perf_counter()
+                    try:
+                        with connection.cursor() as cursor:
+                            for _ in range(queries):
+                                cursor.execute('SELECT pg_sleep(%s)', [sleep])
+                    except Exception as exc:
+                        with lock:
+                            errors[type(exc).__name__] += 1
+                        connection.close()
+                        continue
+                    finally:
+                        # What close_old_connections() does at the end of a request
+                        connection.close_if_unusable_or_obsolete()
+                    elapsed = time.perf_counter() - start
+                    with lock:
+                        latencies.append(elapsed)
+            finally:
+                connection.close()
+
+        def monitor():
+            # Samples through the default alias, so its one connection is outside the mode measured
+            with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+                while not done.wait(0.1):
+                    cursor.execute('SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()')
+                    peak_connections[0] = max(peak_connections[0], cursor.fetchone()[0])
+            connections[DEFAULT_DB_ALIAS].close()
+
+        watcher = threading.Thread(target=monitor)
+        watcher.start()
+        threads = [threading.Thread(target=worker) for _ in range(workers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        done.set()
+        watcher.join()
+
+        pool = ''
+        if mode == 'pool':
+            stats = pool_stats()[alias]
+            # Every worker has finished, so anything still checked out was never returned
+            pool = (
+                f'   pool wait avg {stats["average_wait_ms"]:6.1f} ms, {stats.get("requests_errors", 0)} timeouts, '
+                f'{stats["in_use"]} leaked'
+            )
+            _pools.pop((alias, settings_dict['NAME'])).close()
+
+        if not latencies:
+            self.stdout.write(f'  {mode:<11} no request succeeded   errors {dict(errors)}')
+            return
+        latencies.sort()
+        p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)]
+        self.stdout.write(
+            f'  {mode:<11} {len(latencies) / elapsed:8.1f} req/s   '
+            f'p50 {statistics.median(latencies) * 1000:7.1f} ms   p99 {p99 * 1000:7.1f} ms   '
+            f'server connections {peak_connections[0]:4d}   errors {dict(errors) or 0}{pool}'
+        )
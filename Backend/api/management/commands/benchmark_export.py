@@ -0,0 +1,122 @@
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.benchmarks import rolled_back
+from api.export import ExportThrottle
+from checkin.models import CheckIn, QuickCheckIn
+from journal.models import JournalEntry
+
+User = get_user_model()
+
+MOODS = ['happy', 'calm', 'sad', 'anxious', 'angry', 'ok']
+SEED_BATCH = 10_000
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a synthetic history, stream it through the export endpoint in each '
+        'output format and fail if the peak Python memory of a request goes over '
+        '--max-peak-mb or grows with the number of rows'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=1_000_000,
+            help='Rows to seed in total, split across journal entries, check-ins and quick check-ins',
+        )
+        parser.add_argument('--baseline-rows', type=int, default=10_000)
+        parser.add_argument('--max-peak-mb', type=float, default=16)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self.run(options['rows'], options['baseline_rows'], options['max_peak_mb'])
+
+    def run(self, rows, baseline_rows, max_peak_mb):
+        user = User.objects.create_user(username='benchmark-export', email='benchmark-export@example.com')
+        client = APIClient(HTTP_HOST='localhost')
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        exports = [
+            ('ndjson', {'format': 'ndjson'}),
+            ('ndjson zip', {'format': 'ndjson', 'zip': '1'}),
+            ('csv zip', {'format': 'csv', 'zip': '1'}),
+        ]
+
+        peaks = {}
+        seeded = 0
+        for size in (baseline_rows, rows):
+            self.seed(user, seeded, size)
+            seeded = size
+            self.stdout.write(f'{size} rows')
+            for label, params in exports:
+                peak, elapsed, length = self.measure(client, user, params)
+                peaks.setdefault(label, []).append(peak)
+                self.stdout.write(
+                    f'  {label:<11} {length / 2**20:8.1f} MB in {elapsed:6.1f} s   peak {peak / 2**20:6.2f} MB'
+                )
+
+        failures = []
+        for label, (baseline, peak) in peaks.items():
+            if peak > max_peak_mb * 2**20:
+                failures.append(f'{label} peaked at {peak / 2**20:.2f} MB (limit {max_peak_mb} MB)')
+            # Fetch buffers and the cursor's own bookkeeping allow some slack,
+            # but a buffered export would grow with the rows a hundredfold
+            if peak > baseline * 2 + 2**20:
+                failures.append(
+                    f'{label} peaked at {peak / 2**20:.2f} MB for {rows} rows '
+                    f'against {baseline / 2**20:.2f} MB for {baseline_rows}'
+                )
+        if failures:
+            raise CommandError('; '.join(failures))
+        self.stdout.write(self.style.SUCCESS(f'Export memory stays flat from {baseline_rows} to {rows} rows'))
+
+    def seed(self, user, start, stop):
+        # Each collection gets a third of the rows; bulk_create skips save(),
+        # so no mood rollups or search documents are built
+        now = timezone.now()
+        builders = [
+            lambda i, at: JournalEntry(
+                user=user, title=f'Entry {i}', content=f'Dear diary, day {i}, "quoted", with a comma.', created_at=at
+            ),
+            lambda i, at: CheckIn(
+                user=user, mood=MOODS[i % len(MOODS)], reason=f'reason {i % 13}',
+                notes=f'note {i}', color='#aabbcc', created_at=at,
+            ),
+            lambda i, at: QuickCheckIn(
+                user=user, mood=MOODS[i % len(MOODS)], intensity=i % 10,
+                note=f'quick {i}', type='quick', created_at=at,
+            ),
+        ]
+        first, last = start // len(builders), stop // len(builders)
+        for build in builders:
+            for batch in range(first, last, SEED_BATCH):
+                objects = [
+                    build(i, now - timedelta(minutes=7 * i, seconds=i % 60))
+                    for i in range(batch, min(batch + SEED_BATCH, last))
+                ]
+                type(objects[0]).objects.bulk_create(objects, batch_size=1000)
+
+    def measure(self, client, user, params):
+        # The benchmark runs more exports than the hourly allowance
+        cache.delete(ExportThrottle.cache_format % {'scope': ExportThrottle.scope, 'ident': user.pk})
+        tracemalloc.start()
+        try:
+            start = time.perf_counter()
+            response = client.get('/api/export/', params)
+            if response.status_code != 200:
+                raise CommandError(f'Export failed with {response.status_code}: {response.content!r}')
+            length = 0
+            for chunk in response.streaming_content:
+                length += len(chunk)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return peak, elapsed, length
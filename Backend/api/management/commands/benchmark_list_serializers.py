@@ -0,0 +1,114 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from api.benchmarks import rolled_back
+from checkin.models import CheckIn, QuickCheckIn
+from checkin.serializers import (
+    CheckInListSerializer,
+    CheckInSerializer,
+    QuickCheckInListSerializer,
+    QuickCheckInSerializer,
+)
+from journal.models import JournalEntry
+from journal.serializers import JournalEntryListSerializer, JournalEntrySerializer
+
+User = get_user_model()
+
+MOODS = ['happy', 'calm', 'sad', 'anxious', 'angry', 'ok']
+
+
+class Command(BaseCommand):
+    help = (
+        'Render the check-in, quick check-in and journal lists through the '
+        'ModelSerializer and through the fast .values() serializer, fail if the '
+        'JSON differs by a single byte, and report the time each path takes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000])
+        parser.add_argument('--rounds', type=int, default=3)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self.run(options['rows'], options['rounds'])
+
+    def run(self, sizes, rounds):
+        user = User.objects.create_user(username='benchmark-lists', email='benchmark-lists@example.com')
+        cases = [
+            ('checkins', CheckIn, CheckInSerializer, CheckInListSerializer),
+            ('quick checkins', QuickCheckIn, QuickCheckInSerializer, QuickCheckInListSerializer),
+            ('journal', JournalEntry, JournalEntrySerializer, JournalEntryListSerializer),
+        ]
+        seeded = 0
+        for size in sorted(sizes):
+            self.seed(user, seeded, size)
+            seeded = size
+            self.stdout.write(f'{size} rows')
+            for label, model, serializer_class, fast_class in cases:
+                queryset = model.objects.filter(user=user).order_by('-created_at', '-id')
+                self.compare(label, queryset, serializer_class, fast_class, rounds)
+
+    def seed(self, user, start, stop):
+        # bulk_create skips save(), so no mood rollups or search documents are built;
+        # neither is part of the list output
+        now = timezone.now()
+        created = [now - timedelta(minutes=7 * i, seconds=i % 60) for i in range(start, stop)]
+        CheckIn.objects.bulk_create(
+            [
+                CheckIn(
+                    user=user, mood=MOODS[i % len(MOODS)], reason=f'reason {i % 13}',
+                    notes=f'note {i}', color='#aabbcc', created_at=at,
+                )
+                for i, at in zip(range(start, stop), created)
+            ],
+            batch_size=1000,
+        )
+        QuickCheckIn.objects.bulk_create(
+            [
+                QuickCheckIn(
+                    user=user, mood=MOODS[i % len(MOODS)], intensity=i % 10,
+                    note=f'quick {i}', type='quick', created_at=at,
+                )
+                for i, at in zip(range(start, stop), created)
+            ],
+            batch_size=1000,
+        )
+        JournalEntry.objects.bulk_create(
+            [
+                JournalEntry(user=user, title=f'Entry {i}', content=f'Dear diary, day {i}.', created_at=at)
+                for i, at in zip(range(start, stop), created)
+            ],
+            batch_size=1000,
+        )
+
+    def compare(self, label, queryset, serializer_class, fast_class, rounds):
+        renderer = JSONRenderer()
+
+        def model_path():
+            return renderer.render(serializer_class(queryset, many=True).data)
+
+        def fast_path():
+            serializer = fast_class()
+            rows = queryset.values(*serializer.lookups())
+            return renderer.render([serializer.to_representation(row) for row in rows])
+
+        expected, actual = model_path(), fast_path()
+        if expected != actual:
+            raise CommandError(f'{label}: fast serializer output differs from {serializer_class.__name__}')
+
+        model_time = min(self.time(model_path) for _ in range(rounds))
+        fast_time = min(self.time(fast_path) for _ in range(rounds))
+        self.stdout.write(
+            f'  {label:<15} model {model_time * 1000:8.1f} ms   fast {fast_time * 1000:8.1f} ms   '
+            + self.style.SUCCESS(f'{model_time / fast_time:.1f}x, identical ({len(expected)} bytes)')
+        )
+
+    def time(self, render):
+        start = time.perf_counter()
+        render()
+        return time.perf_counter() - start
@@ -0,0 +1,100 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, router, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api import replicas
+from api.replicas import ReplicaRoutingMiddleware, client_idents, is_healthy, pin_cache, replica_aliases
+from checkin.models import CheckIn
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Send simulated requests through ReplicaRoutingMiddleware and check that '
+        'safe reads go to a replica and that writes, pinned clients, transactions '
+        'and unhealthy replicas fall back to the primary. Needs DATABASE_REPLICA_URLS '
+        'and a shared REPLICA_PIN_CACHE; nothing is written to any database.'
+    )
+
+    def handle(self, *args, **options):
+        aliases = replica_aliases()
+        if not aliases:
+            raise CommandError('No replicas configured; set DATABASE_REPLICA_URLS')
+        if replicas.check_pin_cache():
+            raise CommandError(replicas.PIN_CACHE_ERROR)
+        for alias in aliases:
+            self.stdout.write(f'{alias}: {"healthy" if is_healthy(alias) else "unhealthy"}')
+        if not any(is_healthy(alias) for alias in aliases):
+            raise CommandError('No replica passes its health check')
+
+        self.factory = RequestFactory()
+        self.address = f'198.51.100.{random.randint(1, 254)}'
+        token = f'Bearer {AccessToken.for_user(User(pk=random.randint(10**8, 10**9)))}'
+        shared_address = f'192.0.2.{random.randint(1, 254)}'
+        other_address = f'203.0.113.{random.randint(1, 254)}'
+        self.requests = []
+
+        checks = [
+            ('GET reads from a replica', self.reads('get'), 'replica'),
+            ('HEAD reads from a replica', self.reads('head'), 'replica'),
+            ('POST reads from the primary', self.reads('post'), 'primary'),
+            ('GET reads users from the primary', self.reads('get', model=User), 'primary'),
+            ('GET reads after its own write from the primary', self.reads('get', write_first=True), 'primary'),
+            ('GET right after a write is pinned to the primary', self.reads('get'), 'primary'),
+            ('token user writes from a shared address', self.reads('post', write_first=True, auth=token, address=shared_address), 'primary'),
+            ('... and is pinned at another', self.reads('get', auth=token, address=other_address), 'primary'),
+            ('... but others at its address are not', self.reads('get', address=shared_address), 'replica'),
+            ('GET inside a transaction reads from the primary', self.reads('get', atomic=True, address=other_address), 'primary'),
+            ('reads outside a request use the primary', lambda: CheckIn.objects.all().db, 'primary'),
+        ]
+        failures = []
+        try:
+            for label, run, expected in checks:
+                failures += self.expect(label, run, expected)
+            self.unpin()
+            failures += self.expect('GET after the pin expires reads from a replica', self.reads('get'), 'replica')
+            for alias in aliases:
+                replicas.mark_unhealthy(alias)
+            failures += self.expect('GET with every replica down reads from the primary', self.reads('get'), 'primary')
+        finally:
+            self.unpin()
+            replicas._health.clear()
+
+        if failures:
+            raise CommandError('; '.join(failures))
+        self.stdout.write(self.style.SUCCESS('Reads are routed to replicas and fall back to the primary'))
+
+    def reads(self, method, write_first=False, atomic=False, auth=None, address=None, model=CheckIn):
+        """A request whose view reports the database its read of `model` was routed to."""
+        def view(request):
+            if write_first:
+                router.db_for_write(CheckIn)
+            if atomic:
+                with transaction.atomic():
+                    return HttpResponse(model.objects.all().db)
+            return HttpResponse(model.objects.all().db)
+
+        def run():
+            extra = {'REMOTE_ADDR': address or self.address}
+            if auth:
+                extra['HTTP_AUTHORIZATION'] = auth
+            request = getattr(self.factory, method)('/', **extra)
+            self.requests.append(request)
+            return ReplicaRoutingMiddleware(view)(request).content.decode()
+        return run
+
+    def expect(self, label, run, expected):
+        alias = run()
+        ok = (alias == DEFAULT_DB_ALIAS) == (expected == 'primary')
+        self.stdout.write(f'  {label:<52} {alias:<10} ' + (self.style.SUCCESS('ok') if ok else self.style.ERROR('wrong')))
+        return [] if ok else [f'{label}: read from {alias}']
+
+    def unpin(self):
+        for request in self.requests:
+            pin_cache().delete_many(client_idents(request))
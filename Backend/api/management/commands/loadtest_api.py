@@ -0,0 +1,95 @@
+import json
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test the check-in and journal list/detail endpoints of a running '
+        'server with many concurrent clients and report throughput and tail '
+        'latency. Run it once against `gunicorn project.wsgi` and once against '
+        'the ASGI deployment mode described in project/asgi.py.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument('--clients', type=int, default=64)
+        parser.add_argument('--duration', type=float, default=15.0)
+        parser.add_argument('--entries', type=int, default=50)
+
+    def handle(self, *args, **options):
+        self.url = options['url'].rstrip('/')
+        access, paths = self.seed(options['entries'])
+
+        deadline = time.monotonic() + options['duration']
+        latencies, statuses = [], Counter()
+        lock = threading.Lock()
+
+        def client(offset):
+            i = offset
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                status, _ = self.request('GET', paths[i % len(paths)], access=access)
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+                    statuses[status] += 1
+                i += 1
+
+        threads = [threading.Thread(target=client, args=(n,)) for n in range(options['clients'])]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)]
+        self.stdout.write(
+            f'{options["clients"]} clients: {len(latencies) / elapsed:7.1f} req/s   '
+            f'p50 {statistics.median(latencies) * 1000:7.1f} ms   p99 {p99 * 1000:7.1f} ms   '
+            f'max {latencies[-1] * 1000:7.1f} ms   statuses {dict(statuses)}'
+        )
+
+    def seed(self, entries):
+        name = f'loadtest-{uuid.uuid4().hex[:12]}'
+        status, body = self.request('POST', '/api/auth/register/', {
+            'username': name, 'email': f'{name}@example.com',
+            'password': 'Load-test-password-1', 'password_confirm': 'Load-test-password-1',
+        })
+        if status != 201:
+            raise CommandError(f'Could not register the load-test user ({status}): {body}')
+        access = json.loads(body)['access']
+
+        paths = ['/api/checkin/?limit=20', '/api/checkin/quick/?limit=20', '/api/journal/?limit=20']
+        for i in range(entries):
+            _, body = self.request('POST', '/api/checkin/', {
+                'mood': 'ok', 'reason': f'reason {i}', 'notes': 'load test', 'color': '#abcdef',
+            }, access=access)
+            paths.append(f'/api/checkin/{json.loads(body)["id"]}/')
+            _, body = self.request('POST', '/api/journal/', {
+                'title': f'Entry {i}', 'content': 'load test entry',
+            }, access=access)
+            paths.append(f'/api/journal/{json.loads(body)["id"]}/')
+        return access, paths
+
+    def request(self, method, path, payload=None, access=None):
+        headers = {'Content-Type': 'application/json'}
+        if access:
+            headers['Authorization'] = f'Bearer {access}'
+        data = json.dumps(payload).encode() if payload is not None else None
+        try:
+            with urlopen(Request(self.url + path, data=data, headers=headers, method=method), timeout=60) as response:
+                return response.status, response.read()
+        except HTTPError as error:
+            return error.code, error.read()
+        except URLError as error:
+            return type(error.reason).__name__, b''
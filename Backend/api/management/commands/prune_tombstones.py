@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = 'Delete sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS, in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+        expired = Tombstone.objects.filter(deleted_at__lt=cutoff)
+        total = 0
+        while True:
+            ids = list(expired.values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            deleted, _ = Tombstone.objects.filter(id__in=ids).delete()
+            total += deleted
+        self.stdout.write(self.style.SUCCESS(f'Pruned {total} tombstones older than {cutoff:%Y-%m-%d %H:%M}'))
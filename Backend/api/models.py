@@ -1,2 +1,28 @@
+from django.conf import settings
 from django.db import models
-# Create your models here.
+from django.utils import timezone
+
+
+class Tombstone(models.Model):
+    """
+    Record of a deleted per-user row, so delta sync can report deletions.
+
+    `user` carries no database constraint: tombstones are written while a
+    user's rows are being cascade-deleted, and are removed by age with the
+    prune_tombstones command rather than with the user.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+'
+    )
+    collection = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'collection', 'deleted_at'], name='tombstone_user_deleted_idx'),
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.collection} #{self.object_id} deleted at {self.deleted_at}"
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+class RunVendorSQL(migrations.RunSQL):
+    """
+    RunSQL that only runs on one database vendor and is a no-op elsewhere.
+
+    Used for backend-specific objects such as PostgreSQL GIN indexes or
+    SQLite FTS5 tables, so the same migrations apply to both the production
+    PostgreSQL database and the SQLite database used locally.
+    """
+    vendor = None
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == self.vendor:
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == self.vendor:
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class RunPostgresSQL(RunVendorSQL):
+    vendor = 'postgresql'
+
+
+class RunSQLiteSQL(RunVendorSQL):
+    vendor = 'sqlite'
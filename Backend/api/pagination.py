@@ -0,0 +1,149 @@
+import base64
+import binascii
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination on (created_at, id), newest first. Subclasses can
+    page on another (timestamp, id) pair, in either direction, by changing
+    `ordering`.
+
+    Each page is fetched with a `WHERE (created_at, id) < (cursor)` range
+    condition instead of an OFFSET, so the cost of a page does not depend on
+    how deep into the history it is, and rows inserted while a client is
+    paging never shift or duplicate entries on later pages.
+
+    Pagination is opt-in: clients that send neither `cursor` nor `limit`
+    keep receiving the plain list they always have.
+    """
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    @property
+    def position_field(self):
+        return self.ordering[0].lstrip('-')
+
+    def get_default_limit(self):
+        return settings.API_PAGE_SIZE
+
+    def get_max_limit(self):
+        return settings.API_MAX_PAGE_SIZE
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.limit_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.get_page_queryset(queryset, request)
+        if page_queryset is None:
+            return None
+        return self.set_page(list(page_queryset))
+
+    def get_page_queryset(self, queryset, request):
+        """
+        The unevaluated query for the requested page, or None when the request
+        is not paginated. Pass its rows to set_page(); async views fetch them
+        with the async ORM.
+        """
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            value, pk = position
+            field = self.position_field
+            after = 'lt' if self.ordering[0].startswith('-') else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{field}__{after}': value}) | Q(**{field: value, f'id__{after}': pk})
+            )
+
+        # Fetch one extra row to know whether another page exists
+        return queryset[:self.limit + 1]
+
+    def set_page(self, results):
+        self.has_next = len(results) > self.limit
+        self.page = results[:self.limit]
+        return self.page
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.get_default_limit()
+        if limit <= 0:
+            return self.get_default_limit()
+        return min(limit, self.get_max_limit())
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            decoded = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            timestamp, pk = decoded.rsplit('|', 1)
+            value = parse_datetime(timestamp)
+            pk = int(pk)
+        except (TypeError, ValueError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        # Cursors are only ever encoded from aware timestamps
+        if value is None or timezone.is_naive(value):
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk
+
+    def encode_cursor(self, instance):
+        # Pages hold model instances, or plain dicts for .values() querysets
+        if isinstance(instance, dict):
+            value, pk = instance[self.position_field], instance['id']
+        else:
+            value, pk = getattr(instance, self.position_field), instance.pk
+        raw = f'{value.isoformat()}|{pk}'
+        return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+
+    def get_next_cursor(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_next_link(self):
+        cursor = self.get_next_cursor()
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_data(self, data):
+        return OrderedDict([
+            ('next', self.get_next_link()),
+            ('next_cursor', self.get_next_cursor()),
+            ('results', data),
+        ])
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'next_cursor': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
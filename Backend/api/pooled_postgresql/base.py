@@ -0,0 +1,140 @@
+"""
+PostgreSQL backend that checks connections out of a psycopg_pool.ConnectionPool.
+
+Django 4.2 can only keep one persistent connection per worker thread
+(CONN_MAX_AGE), so the server needs a connection for every thread of every
+worker. With this backend each worker process keeps one pool per database
+alias: a request borrows a connection when it first touches the database
+and gives it back when Django closes it at the end of the request, so
+`max_size` bounds the connections a process holds however many threads it
+runs. Settings live in OPTIONS['pool']:
+
+    min_size, max_size    connections kept open and the most ever opened
+    timeout               seconds to wait for a free connection before failing
+    max_idle, max_lifetime  seconds before idle or old connections are replaced
+    check                 test each connection with a round trip on checkout
+
+CONN_MAX_AGE must be 0; the pool keeps the connections alive instead.
+Pools are created on first use, so they are never shared across a fork.
+"""
+import atexit
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base, creation
+from django.utils.asyncio import async_unsafe
+from psycopg import IsolationLevel
+from psycopg_pool import ConnectionPool
+
+POOL_DEFAULTS = {
+    'min_size': 2,
+    'max_size': 10,
+    'timeout': 10.0,
+    'max_idle': 600.0,
+    'max_lifetime': 3600.0,
+    'check': True,
+}
+
+# {(alias, database name): ConnectionPool}, per process; the name changes when tests set up their database
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def pool_stats():
+    """
+    Counters of every pool in this process, keyed by database alias, with
+    the number of connections in use and idle and the mean checkout wait.
+    """
+    stats = {}
+    for pool in list(_pools.values()):
+        raw = pool.get_stats()
+        size, idle, requests = raw.get('pool_size', 0), raw.get('pool_available', 0), raw.get('requests_num', 0)
+        stats[pool.name] = {
+            **raw,
+            'in_use': size - idle,
+            'idle': idle,
+            'waiting': raw.get('requests_waiting', 0),
+            'average_wait_ms': raw.get('requests_wait_ms', 0) / requests if requests else 0.0,
+        }
+    return stats
+
+
+def close_pools(name):
+    """Close this process's pools for the database `name` and forget them."""
+    with _pools_lock:
+        for key in [key for key in _pools if key[1] == name]:
+            _pools.pop(key).close()
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled connections would keep the test database in use
+        close_pools(test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def __init__(self, settings_dict, alias=None):
+        super().__init__(settings_dict, alias)
+        if self.settings_dict['CONN_MAX_AGE'] != 0:
+            raise ImproperlyConfigured(f"Database {self.alias!r} is pooled; set its CONN_MAX_AGE to 0.")
+
+    @property
+    def pool(self):
+        key = (self.alias, self.settings_dict['NAME'])
+        pool = _pools.get(key)
+        if pool is None:
+            with _pools_lock:
+                pool = _pools.get(key)
+                if pool is None:
+                    pool = _pools[key] = self.create_pool()
+        return pool
+
+    def create_pool(self):
+        options = {**POOL_DEFAULTS, **self.settings_dict['OPTIONS'].get('pool', {})}
+        check = options.pop('check')
+        pool = ConnectionPool(
+            kwargs=self.get_connection_params(),
+            name=self.alias,
+            check=ConnectionPool.check_connection if check else None,
+            open=True,
+            **options,
+        )
+        atexit.register(pool.close)
+        return pool
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pool', None)
+        return params
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        # Waits up to the pool's timeout for a connection, then raises PoolTimeout
+        connection = self.pool.getconn()
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        if isolation_level is None:
+            self.isolation_level = IsolationLevel.READ_COMMITTED
+        else:
+            try:
+                self.isolation_level = IsolationLevel(isolation_level)
+            except ValueError:
+                self.pool.putconn(connection)
+                raise ImproperlyConfigured(
+                    f'Invalid transaction isolation level {isolation_level} '
+                    f'specified. Use one of the psycopg.IsolationLevel values.'
+                )
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def _close(self):
+        # Give the connection back instead of closing it; the pool rolls back
+        # anything left open and discards connections that broke
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                # The pool it came from, even if the settings changed since
+                self.connection._pool.putconn(self.connection)
+            # Even inside an atomic block, where close() would keep it, it now belongs to the pool
+            self.connection = None
@@ -0,0 +1,226 @@
+import hashlib
+import random
+import time
+from contextvars import ContextVar
+
+import jwt
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import checks
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from api.counters import is_shared_cache
+
+PIN_KEY_PREFIX = 'replica-pin:'
+REPLICA_ALIAS_PREFIX = 'replica_'
+
+# {alias: (healthy, monotonic time of the check)}, per process
+_health = {}
+
+_request_state = ContextVar('replica_request_state', default=None)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith(REPLICA_ALIAS_PREFIX)]
+
+
+def pin_cache():
+    return caches[settings.REPLICA_PIN_CACHE]
+
+
+PIN_CACHE_ERROR = (
+    'DATABASE_REPLICA_URLS needs REPLICA_PIN_CACHE to be a Redis or Memcached cache; '
+    'elsewhere clients could miss their own writes'
+)
+
+
+def check_pin_cache(app_configs=None, **kwargs):
+    """System check: with replicas configured the pin cache must be shared by every worker."""
+    if replica_aliases() and not is_shared_cache(pin_cache()):
+        return [checks.Error(
+            PIN_CACHE_ERROR,
+            hint='Point REPLICA_PIN_CACHE, or CACHE_BACKEND for the default cache, at Redis or Memcached.',
+            id='api.E001',
+        )]
+    return []
+
+
+def replica_lag(alias):
+    """
+    Seconds the replica `alias` is behind its primary, 0 when it has
+    replayed everything it received or is not a PostgreSQL standby.
+    """
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        connection.ensure_connection()
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+            'ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END'
+        )
+        return float(cursor.fetchone()[0])
+
+
+def is_healthy(alias):
+    """
+    Whether `alias` accepts connections and is at most REPLICA_MAX_LAG_SECONDS
+    behind. The answer is kept for REPLICA_HEALTH_CHECK_INTERVAL seconds, so
+    a replica that is down costs one failed connection per interval.
+    """
+    healthy, checked = _health.get(alias, (None, 0))
+    now = time.monotonic()
+    if healthy is not None and now - checked < settings.REPLICA_HEALTH_CHECK_INTERVAL:
+        return healthy
+    try:
+        healthy = replica_lag(alias) <= settings.REPLICA_MAX_LAG_SECONDS
+    except DatabaseError:
+        connections[alias].close()
+        healthy = False
+    _health[alias] = (healthy, now)
+    return healthy
+
+
+def mark_unhealthy(alias):
+    """Skip `alias` until its next health check."""
+    _health[alias] = (False, time.monotonic())
+
+
+class RequestState:
+    """Where the current request's reads go; set up by ReplicaRoutingMiddleware."""
+
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.replica = None
+        self.wrote = False
+
+    def read_alias(self):
+        if not self.use_replica or self.wrote:
+            return DEFAULT_DB_ALIAS
+        if self.replica is None:
+            # One replica for the whole request, so its reads see one consistent copy
+            healthy = [alias for alias in replica_aliases() if is_healthy(alias)]
+            self.replica = random.choice(healthy) if healthy else DEFAULT_DB_ALIAS
+        return self.replica
+
+
+class ReplicaRouter:
+    """
+    Sends the reads of safe-method requests to a healthy replica.
+
+    Only requests that ReplicaRoutingMiddleware marked as replica-safe are
+    routed: GET, HEAD and OPTIONS from clients that have not written in the
+    last REPLICA_PIN_SECONDS. Everything else reads from the primary: other
+    methods, reads inside a transaction, reads after the request itself
+    wrote, management commands and other work outside a request, and
+    every read when no replica passes its health check. Users are always
+    read from the primary, so authentication sees a user who has just
+    registered and a token_version that has just been bumped. Writes
+    always go to the primary, and migrations only run there.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if state is None or connections[DEFAULT_DB_ALIAS].in_atomic_block or model is get_user_model():
+            return DEFAULT_DB_ALIAS
+        return state.read_alias()
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold copies of the primary's rows
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def client_idents(request):
+    """
+    Keys for what identifies the client: its session and the user id its
+    bearer token claims, or its address when it has neither, as when it
+    signs in or registers. Addresses are shared by every client behind one
+    NAT or proxy, so they are not used for clients that have a better key.
+
+    The token is decoded without checking its signature. A forged claim can
+    only send the forger's own reads to the primary.
+    """
+    idents = []
+    session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if session_key:
+        idents.append(f'session:{hashlib.sha256(session_key.encode()).hexdigest()}')
+    auth = request.META.get('HTTP_AUTHORIZATION', '').split()
+    if len(auth) == 2 and auth[0] in jwt_settings.AUTH_HEADER_TYPES:
+        try:
+            claims = jwt.decode(auth[1], options={'verify_signature': False})
+        except jwt.InvalidTokenError:
+            claims = {}
+        user_id = claims.get(jwt_settings.USER_ID_CLAIM)
+        if user_id is not None:
+            idents.append(f'user:{user_id}')
+    if not idents:
+        idents.append(f'ip:{BaseThrottle().get_ident(request)}')
+    return [PIN_KEY_PREFIX + ident for ident in idents]
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Decides per request whether ReplicaRouter may read from a replica.
+
+    A request that writes pins its client to the primary for
+    REPLICA_PIN_SECONDS, so the client reads its own writes until the
+    replicas have caught up. The pin is kept in REPLICA_PIN_CACHE under the
+    keys from client_idents(), and the next request may land on any
+    worker on any host, so that cache has to be Redis or Memcached: the
+    api.E001 system check fails `manage.py check`, migrate and runserver
+    otherwise, and the middleware refuses to load under any other server.
+    Keep REPLICA_PIN_SECONDS above REPLICA_MAX_LAG_SECONDS.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = bool(replica_aliases())
+        if self.enabled and not is_shared_cache(pin_cache()):
+            raise ImproperlyConfigured(PIN_CACHE_ERROR)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+        keys = client_idents(request)
+        state = RequestState(request.method in SAFE_METHODS and not pin_cache().get_many(keys))
+        token = _request_state.set(state)
+        try:
+            return self.get_response(request)
+        finally:
+            _request_state.reset(token)
+            if state.wrote:
+                pin_cache().set_many(dict.fromkeys(keys, True), settings.REPLICA_PIN_SECONDS)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+        keys = client_idents(request)
+        state = RequestState(request.method in SAFE_METHODS and not await pin_cache().aget_many(keys))
+        token = _request_state.set(state)
+        try:
+            return await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+            if state.wrote:
+                await pin_cache().aset_many(dict.fromkeys(keys, True), settings.REPLICA_PIN_SECONDS)
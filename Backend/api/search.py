@@ -0,0 +1,31 @@
+import re
+
+from django.contrib.postgres.search import SearchVectorField
+
+SEARCH_CONFIG = 'english'
+MAX_SEARCH_TERMS = 8
+
+
+def is_postgres(connection):
+    return connection.vendor == 'postgresql'
+
+
+class SearchDocumentField(SearchVectorField):
+    """
+    A denormalized search document.
+
+    On PostgreSQL this is a real `tsvector` column (GIN-indexed by the
+    migration that adds it) and supports the `@@` lookup with a SearchQuery.
+    Other databases store lower-cased plain text and are searched with
+    `contains`, which is good enough for local development.
+    """
+
+    def db_type(self, connection):
+        if is_postgres(connection):
+            return super().db_type(connection)
+        return 'text'
+
+
+def search_terms(query):
+    """Split a free-text query into at most MAX_SEARCH_TERMS lower-cased words."""
+    return re.findall(r'\w+', query.lower())[:MAX_SEARCH_TERMS]
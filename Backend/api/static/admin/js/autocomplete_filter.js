@@ -0,0 +1,11 @@
+'use strict';
+{
+    // Reload the changelist filtered by whatever an AutocompleteListFilter's widget picks
+    const $ = django.jQuery;
+    $(document).on('change', 'select[data-filter-url]', function() {
+        const data = this.dataset;
+        window.location.search = this.value
+            ? data.filterUrl.replace(data.filterPlaceholder, encodeURIComponent(this.value))
+            : data.filterClearUrl;
+    });
+}
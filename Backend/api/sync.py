@@ -0,0 +1,138 @@
+import base64
+import binascii
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.db.models.signals import post_delete
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .models import Tombstone
+
+# Changes are re-read from this far behind the cursor, so a row whose
+# transaction committed after an earlier sync had already run is still seen.
+# Clients apply changes as idempotent upserts, so the overlap is harmless.
+# A write to a synced model must commit within this long of stamping
+# updated_at, or a client that synced in between never sees it.
+CURSOR_OVERLAP = timedelta(seconds=30)
+
+
+def encode_cursor(moment):
+    return base64.urlsafe_b64encode(f'v1|{moment.isoformat()}'.encode('ascii')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        version, timestamp = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('ascii').split('|', 1)
+        moment = parse_datetime(timestamp) if version == 'v1' else None
+    except (ValueError, UnicodeError, binascii.Error):
+        raise ValidationError({'cursor': 'Invalid cursor.'})
+    # Cursors are only ever encoded from aware timestamps
+    if moment is None or timezone.is_naive(moment):
+        raise ValidationError({'cursor': 'Invalid cursor.'})
+    return moment
+
+
+class SyncedQuerySet(models.QuerySet):
+    """
+    QuerySet for models served through SyncView.
+
+    Sync finds changed rows by updated_at, which auto_now only stamps in
+    Model.save() and bulk_create(). update() stamps it too, unless every
+    field it sets is one of `unsynced_fields`, which clients never see.
+    """
+    unsynced_fields = ()
+
+    def update(self, **kwargs):
+        if not set(kwargs) <= set(self.unsynced_fields):
+            kwargs.setdefault('updated_at', timezone.now())
+        return super().update(**kwargs)
+
+    update.queryset_only = True
+
+
+def record_tombstone(sender, instance, origin=None, **kwargs):
+    # Nobody is left to sync with once the whole account is being deleted
+    User = get_user_model()
+    if isinstance(origin, User) or (isinstance(origin, models.QuerySet) and origin.model is User):
+        return
+    Tombstone.objects.create(
+        user_id=instance.user_id, collection=sender.sync_collection, object_id=instance.pk
+    )
+
+
+def track_deletions(model):
+    """
+    Write a Tombstone whenever a row of `model` is deleted, including
+    queryset and admin bulk deletes. The model names its collection in a
+    `sync_collection` class attribute.
+    """
+    post_delete.connect(record_tombstone, sender=model, dispatch_uid=f'tombstone:{model.sync_collection}')
+
+
+class SyncView(generics.GenericAPIView):
+    """
+    Delta sync for one of the user's collections.
+
+    Without a cursor, returns a fresh cursor and nothing else: take it, load
+    the collection through its list endpoint, then keep calling this view
+    with the last cursor received. Each call returns the rows created or
+    updated and the ids deleted since that cursor, plus the next cursor:
+
+        {"cursor": "...", "changed": [...], "deleted": [12, 15]}
+
+    Answers 410 Gone when the cursor predates the tombstone retention window
+    or there are more than SYNC_MAX_CHANGES changes, in which case the
+    client should reload the collection from scratch.
+
+    Every write path has to stamp the model's updated_at for its changes to
+    be seen here: save() and bulk_create() do through auto_now, queryset
+    update() through SyncedQuerySet.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @property
+    def model(self):
+        return self.get_serializer_class().Meta.model
+
+    def get_queryset(self):
+        return self.model.objects.filter(user=self.request.user)
+
+    def get(self, request):
+        now = timezone.now()
+        cursor = request.query_params.get('cursor')
+        if not cursor:
+            return Response({'cursor': encode_cursor(now), 'changed': [], 'deleted': []})
+
+        since = decode_cursor(cursor)
+        if since < now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS):
+            return self.reset('Cursor has expired.')
+
+        since -= CURSOR_OVERLAP
+        limit = settings.SYNC_MAX_CHANGES
+        changed = list(self.get_queryset().filter(updated_at__gt=since).order_by('updated_at', 'id')[:limit + 1])
+        deleted = list(
+            Tombstone.objects.filter(user=request.user, collection=self.model.sync_collection, deleted_at__gt=since)
+            .order_by('deleted_at')
+            .values_list('object_id', flat=True)[:limit + 1]
+        )
+        if len(changed) + len(deleted) > limit:
+            return self.reset('Too many changes since cursor.')
+
+        return Response({
+            'cursor': encode_cursor(now),
+            'changed': self.get_serializer(changed, many=True).data,
+            'deleted': deleted,
+        })
+
+    def reset(self, reason):
+        return Response(
+            {'detail': f'{reason} Reload the collection and start again without a cursor.'},
+            status=status.HTTP_410_GONE,
+        )
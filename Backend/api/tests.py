@@ -1,3 +1,545 @@
-from django.test import TestCase
+import base64
+import hashlib
+import os
+import runpy
+import shutil
+import tempfile
+import tracemalloc
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from checkin.models import CheckIn, QuickCheckIn
+from journal.models import JournalEntry
+
+from . import replicas
+from .conditional import list_generation_cache, make_etag
+from .export import ExportThrottle
+from .pooled_postgresql import base as pooled_postgresql
+from .replicas import ReplicaRouter, ReplicaRoutingMiddleware
+from .sync import encode_cursor
+
+User = get_user_model()
+
+
+class ExportMemoryTests(TestCase):
+    """
+    Streaming an export keeps its peak Python memory flat as the history
+    grows. `manage.py benchmark_export` measures the same at 1M rows.
+    """
+    # Past EXPORT_FETCH_ROWS per collection, so the baseline already holds full fetch buffers
+    baseline_rows = 7_500
+    rows = 45_000
+    max_peak_mb = 16
+    exports = [
+        ('ndjson', {'format': 'ndjson'}),
+        ('ndjson zip', {'format': 'ndjson', 'zip': '1'}),
+        ('csv zip', {'format': 'csv', 'zip': '1'}),
+    ]
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='export-memory', email='export-memory@example.com')
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def seed(self, start, stop):
+        # A third of the rows in each collection. bulk_create skips save(),
+        # so no mood rollups or search documents are built; exports read neither.
+        indexes = range(start // 3, stop // 3)
+        CheckIn.objects.bulk_create([
+            CheckIn(user=self.user, mood='happy', reason=f'reason {i}', notes=f'note {i}', color='#aabbcc')
+            for i in indexes
+        ], batch_size=1000)
+        QuickCheckIn.objects.bulk_create([
+            QuickCheckIn(user=self.user, mood='calm', intensity=i % 10, note=f'quick {i}', type='quick')
+            for i in indexes
+        ], batch_size=1000)
+        JournalEntry.objects.bulk_create([
+            JournalEntry(user=self.user, title=f'Entry {i}', content=f'Dear diary, day {i}, "quoted", with a comma.')
+            for i in indexes
+        ], batch_size=1000)
+
+    def peak(self, params):
+        # More exports than the hourly allowance
+        cache.delete(ExportThrottle.cache_format % {'scope': ExportThrottle.scope, 'ident': self.user.pk})
+        tracemalloc.start()
+        try:
+            response = self.client.get('/api/export/', params)
+            self.assertEqual(response.status_code, 200)
+            for _ in response.streaming_content:
+                pass
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_peak_memory_does_not_grow_with_rows(self):
+        self.seed(0, self.baseline_rows)
+        baselines = {label: self.peak(params) for label, params in self.exports}
+        self.seed(self.baseline_rows, self.rows)
+        for label, params in self.exports:
+            with self.subTest(export=label):
+                peak = self.peak(params)
+                self.assertLess(peak, self.max_peak_mb * 2**20)
+                # Fetch buffers and the cursor's own bookkeeping allow some
+                # slack, but a buffered export would grow with the rows sixfold
+                self.assertLess(peak, baselines[label] * 2 + 2**20)
+
+
+class KeysetPaginationTests(TestCase):
+    url = '/api/checkin/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='keyset', email='keyset@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.start = timezone.now() - timedelta(days=1)
+        # Pairs share a timestamp, so the id breaks the ties
+        self.checkins = [self.create(self.start + timedelta(minutes=i // 2)) for i in range(7)]
+
+    def create(self, created_at):
+        return CheckIn.objects.create(user=self.user, mood='calm', reason='work', color='blue', created_at=created_at)
+
+    def ids(self, response):
+        return [row['id'] for row in response.json()['results']]
+
+    def test_unpaginated_without_cursor_or_limit(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 7)
+
+    def test_pages_cover_every_row_once_newest_first(self):
+        expected = [checkin.id for checkin in sorted(self.checkins, key=lambda c: (c.created_at, c.id), reverse=True)]
+        response = self.client.get(self.url, {'limit': 3})
+        seen = self.ids(response)
+        while response.json()['next_cursor']:
+            response = self.client.get(self.url, {'limit': 3, 'cursor': response.json()['next_cursor']})
+            seen += self.ids(response)
+        self.assertEqual(seen, expected)
+        self.assertIsNone(response.json()['next'])
+
+    def test_next_link_fetches_the_next_page(self):
+        body = self.client.get(self.url, {'limit': 3}).json()
+        by_link = self.client.get(body['next'])
+        by_cursor = self.client.get(self.url, {'limit': 3, 'cursor': body['next_cursor']})
+        self.assertEqual(self.ids(by_link), self.ids(by_cursor))
+
+    def test_rows_inserted_between_pages_do_not_shift_later_pages(self):
+        first = self.client.get(self.url, {'limit': 3}).json()
+        expected = self.ids(self.client.get(self.url, {'limit': 3, 'cursor': first['next_cursor']}))
+        # A new entry at the top, and one sharing the last timestamp of the first page
+        self.create(timezone.now())
+        self.create(self.checkins[4].created_at)
+        response = self.client.get(self.url, {'limit': 3, 'cursor': first['next_cursor']})
+        self.assertEqual(self.ids(response), expected)
+
+    def test_limit_is_capped(self):
+        with override_settings(API_MAX_PAGE_SIZE=2):
+            self.assertEqual(len(self.ids(self.client.get(self.url, {'limit': 50}))), 2)
+        self.assertEqual(len(self.ids(self.client.get(self.url, {'limit': 'many'}))), 7)
+
+    def test_rejects_invalid_cursors(self):
+        def encode(raw):
+            return base64.urlsafe_b64encode(raw.encode()).decode()
+
+        for label, cursor in [
+            ('not base64', '!!!'),
+            ('no separator', encode('2024-01-01T00:00:00+00:00')),
+            ('bad id', encode('2024-01-01T00:00:00+00:00|x')),
+            ('bad timestamp', encode('yesterday|1')),
+            ('out of range', encode('2024-13-45T00:00:00+00:00|1')),
+            ('naive timestamp', encode('2024-01-01T00:00:00|1')),
+            ('not ascii', base64.urlsafe_b64encode('2024-01-01T00:00:00+00:00|\u00e9'.encode()).decode()),
+        ]:
+            with self.subTest(cursor=label):
+                response = self.client.get(self.url, {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.json(), {'detail': 'Invalid cursor'})
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'conditional-tests'},
+    'auth': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'conditional-tests-auth'},
+})
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        list_generation_cache().clear()
+        self.user = User.objects.create_user(username='conditional', email='conditional@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.checkin = self.create()
+
+    def create(self, user=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return CheckIn.objects.create(user=user or self.user, mood='calm', reason='work', color='blue')
+
+    def revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_list_is_answered_without_queries(self):
+        response = self.client.get('/api/checkin/')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.revalidate('/api/checkin/', response).status_code, 304)
+        self.assertNotIn('Last-Modified', response)
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+    def test_list_etag_changes_with_every_write(self):
+        other = User.objects.create_user(username='conditional-other', email='conditional-other@example.com')
+        older = self.create()
+        changes = {
+            "another user's entry": lambda: self.create(other),
+            'create': lambda: self.create(),
+            'edit of an older entry': lambda: older.save(),
+            'delete of an older entry': lambda: CheckIn.objects.filter(pk=older.pk).delete(),
+            'queryset update': lambda: CheckIn.objects.filter(user=self.user).update(mood='tired'),
+            'batch create': lambda: self.client.post(
+                '/api/checkin/batch/', [{'mood': 'ok', 'reason': 'rest', 'color': 'green'}], format='json'
+            ),
+        }
+        for label, change in changes.items():
+            with self.subTest(change=label):
+                response = self.client.get('/api/checkin/')
+                with self.captureOnCommitCallbacks(execute=True):
+                    change()
+                expected = 304 if label == "another user's entry" else 200
+                self.assertEqual(self.revalidate('/api/checkin/', response).status_code, expected)
+
+    def test_list_etag_depends_on_the_page(self):
+        self.assertNotEqual(self.client.get('/api/checkin/')['ETag'], self.client.get('/api/checkin/?limit=1')['ETag'])
+
+    def test_detail_etag_and_last_modified(self):
+        url = f'/api/checkin/{self.checkin.pk}/'
+        # Changed within the current second (a little ahead, so the test cannot
+        # cross into the next): Last-Modified could not tell a second edit apart
+        CheckIn.objects.filter(pk=self.checkin.pk).update(updated_at=timezone.now() + timedelta(seconds=2))
+        response = self.client.get(url)
+        self.assertNotIn('Last-Modified', response)
+        self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+        CheckIn.objects.filter(pk=self.checkin.pk).update(updated_at=timezone.now() - timedelta(minutes=5))
+        response = self.client.get(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+        self.client.patch(url, {'mood': 'happy'}, format='json')
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 200)
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_make_etag_hashes_bytes_directly(self):
+        self.assertEqual(make_etag(b'[1]'), f'"{hashlib.sha1(b"[1]").hexdigest()}"')
+
+
+class SyncTests(TestCase):
+    url = '/api/checkin/sync/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='sync', email='sync@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create(self, **fields):
+        return CheckIn.objects.create(user=self.user, mood='calm', reason='work', color='blue', **fields)
+
+    def sync(self, cursor, url=None):
+        response = self.client.get(url or self.url, {'cursor': cursor})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def an_hour_ago(self):
+        return encode_cursor(timezone.now() - timedelta(hours=1))
+
+    def test_round_trip(self):
+        body = self.client.get(self.url).json()
+        self.assertEqual((body['changed'], body['deleted']), ([], []))
+
+        kept, edited, deleted = self.create(), self.create(), self.create()
+        CheckIn.objects.filter(pk__in=[kept.pk, edited.pk, deleted.pk]).update(updated_at=timezone.now() - timedelta(hours=2))
+        edited.mood = 'happy'
+        edited.save()
+        deleted_id = deleted.pk
+        deleted.delete()
+        body = self.sync(self.an_hour_ago())
+        self.assertEqual([row['id'] for row in body['changed']], [edited.pk])
+        self.assertEqual(body['changed'][0]['mood'], 'happy')
+        self.assertEqual(body['deleted'], [deleted_id])
+
+    def test_bulk_update_reaches_next_sync(self):
+        checkin = self.create()
+        CheckIn.objects.filter(pk=checkin.pk).update(updated_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(self.sync(self.an_hour_ago())['changed'], [])
+        CheckIn.objects.filter(user=self.user).update(mood='tired')
+        self.assertEqual([row['mood'] for row in self.sync(self.an_hour_ago())['changed']], ['tired'])
+
+    def test_search_reindex_is_not_a_change(self):
+        entry = JournalEntry.objects.create(user=self.user, title='Day', content='Fine.')
+        JournalEntry.objects.filter(pk=entry.pk).update(updated_at=timezone.now() - timedelta(hours=2))
+        JournalEntry.objects.filter(pk=entry.pk).update(search_document=None)
+        self.assertEqual(self.sync(self.an_hour_ago(), '/api/journal/sync/')['changed'], [])
+
+    def test_only_own_changes(self):
+        other = User.objects.create_user(username='sync-other', email='sync-other@example.com')
+        checkin = CheckIn.objects.create(user=other, mood='calm', reason='work', color='blue')
+        checkin.delete()
+        self.assertEqual(self.sync(self.an_hour_ago()), {'cursor': mock.ANY, 'changed': [], 'deleted': []})
+
+    def test_expired_cursor_and_too_many_changes_reset(self):
+        response = self.client.get(self.url, {'cursor': encode_cursor(timezone.now() - timedelta(days=365))})
+        self.assertEqual(response.status_code, 410)
+        self.create()
+        self.create()
+        with override_settings(SYNC_MAX_CHANGES=1):
+            self.assertEqual(self.client.get(self.url, {'cursor': self.an_hour_ago()}).status_code, 410)
+
+    def test_rejects_tampered_cursors(self):
+        def encode(raw):
+            return base64.urlsafe_b64encode(raw.encode()).decode()
+
+        for label, cursor in [
+            ('not base64', '!!!'),
+            ('no separator', encode('v1')),
+            ('unknown version', encode('v2|2024-01-01T00:00:00+00:00')),
+            ('bad timestamp', encode('v1|yesterday')),
+            ('out of range', encode('v1|2024-13-45T00:00:00')),
+            ('naive timestamp', encode('v1|2024-01-01T00:00:00')),
+        ]:
+            with self.subTest(cursor=label):
+                response = self.client.get(self.url, {'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {'cursor': 'Invalid cursor.'})
+
+
+REPLICA = 'replica_test'
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'replica-pins'}},
+    REPLICA_PIN_CACHE='default',
+)
+class ReplicaRoutingTests(SimpleTestCase):
+    """
+    Routing through ReplicaRoutingMiddleware with a second SQLite alias as
+    the replica. TestCase would wrap every read in a transaction, which the
+    router sends to the primary, so these only look at where reads go.
+    """
+    # Opened by transaction.atomic(); nothing is written
+    databases = {DEFAULT_DB_ALIAS}
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.add_replica(os.path.join(directory, 'replica.sqlite3'))
+        for patcher in (
+            mock.patch.object(replicas, 'replica_aliases', return_value=[REPLICA]),
+            # A per-process cache is only accepted in place of a shared one here
+            mock.patch.object(replicas, 'is_shared_cache', return_value=True),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        replicas._health.clear()
+        self.addCleanup(replicas._health.clear)
+        cache.clear()
+
+    def add_replica(self, name):
+        configured = connections.configure_settings({
+            DEFAULT_DB_ALIAS: connections.settings[DEFAULT_DB_ALIAS],
+            REPLICA: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': name},
+        })
+        connections.settings[REPLICA] = configured[REPLICA]
+        self.addCleanup(self.remove_replica)
+
+    def remove_replica(self):
+        if REPLICA in connections.settings:
+            connections[REPLICA].close()
+            del connections[REPLICA]
+            del connections.settings[REPLICA]
+
+    def read(self, method='get', write_first=False, atomic=False, model=CheckIn, **extra):
+        """The alias a read of `model` in a request's view is routed to."""
+        def view(request):
+            if write_first:
+                router.db_for_write(CheckIn)
+            if atomic:
+                with transaction.atomic():
+                    return HttpResponse(model.objects.all().db)
+            return HttpResponse(model.objects.all().db)
+
+        request = getattr(RequestFactory(), method)('/', **{'REMOTE_ADDR': '198.51.100.1', **extra})
+        return ReplicaRoutingMiddleware(view)(request).content.decode()
+
+    def test_safe_reads_go_to_the_replica(self):
+        self.assertEqual(self.read('get'), REPLICA)
+        self.assertEqual(self.read('head'), REPLICA)
+        self.assertEqual(self.read('post'), DEFAULT_DB_ALIAS)
+
+    def test_primary_reads(self):
+        self.assertEqual(self.read(model=User), DEFAULT_DB_ALIAS)
+        self.assertEqual(self.read(write_first=True), DEFAULT_DB_ALIAS)
+        self.assertEqual(self.read(atomic=True, REMOTE_ADDR='203.0.113.1'), DEFAULT_DB_ALIAS)
+        # Outside a request
+        self.assertEqual(CheckIn.objects.all().db, DEFAULT_DB_ALIAS)
+
+    def test_writes_pin_the_client(self):
+        self.read('post', write_first=True)
+        self.assertEqual(self.read(), DEFAULT_DB_ALIAS)
+        self.assertEqual(self.read(REMOTE_ADDR='203.0.113.1'), REPLICA)
+        cache.clear()
+        self.assertEqual(self.read(), REPLICA)
+
+    def test_token_clients_are_pinned_by_user_not_address(self):
+        auth = f'Bearer {AccessToken.for_user(User(pk=42))}'
+        self.read('post', write_first=True, HTTP_AUTHORIZATION=auth, REMOTE_ADDR='192.0.2.1')
+        self.assertEqual(self.read(HTTP_AUTHORIZATION=auth, REMOTE_ADDR='192.0.2.2'), DEFAULT_DB_ALIAS)
+        self.assertEqual(self.read(REMOTE_ADDR='192.0.2.1'), REPLICA)
+
+    def test_unreachable_replica_falls_back_to_the_primary(self):
+        self.remove_replica()
+        self.add_replica(os.path.join(tempfile.gettempdir(), 'missing-directory', 'replica.sqlite3'))
+        self.assertEqual(self.read(), DEFAULT_DB_ALIAS)
+        # The failed check is remembered for REPLICA_HEALTH_CHECK_INTERVAL
+        with mock.patch.object(replicas, 'replica_lag') as replica_lag:
+            self.assertEqual(self.read(), DEFAULT_DB_ALIAS)
+        replica_lag.assert_not_called()
+
+    def test_lagging_or_marked_replica_is_skipped(self):
+        with override_settings(REPLICA_MAX_LAG_SECONDS=5), \
+                mock.patch.object(replicas, 'replica_lag', return_value=30):
+            self.assertEqual(self.read(), DEFAULT_DB_ALIAS)
+        replicas._health.clear()
+        self.assertEqual(self.read(), REPLICA)
+        replicas.mark_unhealthy(REPLICA)
+        self.assertEqual(self.read(), DEFAULT_DB_ALIAS)
+
+    def test_migrations_only_run_on_the_primary(self):
+        self.assertTrue(ReplicaRouter().allow_migrate(DEFAULT_DB_ALIAS, 'checkin'))
+        self.assertFalse(ReplicaRouter().allow_migrate(REPLICA, 'checkin'))
+
+    def test_per_process_pin_cache_fails_at_startup(self):
+        with mock.patch.object(replicas, 'is_shared_cache', return_value=False):
+            self.assertEqual([error.id for error in replicas.check_pin_cache()], ['api.E001'])
+            with self.assertRaises(ImproperlyConfigured):
+                ReplicaRoutingMiddleware(lambda request: HttpResponse())
+        with mock.patch.object(replicas, 'replica_aliases', return_value=[]):
+            self.assertEqual(replicas.check_pin_cache(), [])
+
+
+def fake_pool(name, **stats):
+    pool = mock.Mock(get_stats=mock.Mock(return_value=stats))
+    # name= would only name the mock itself
+    pool.name = name
+    return pool
+
+
+class DatabasePoolSettingsTests(SimpleTestCase):
+    """DATABASE_POOL switches the PostgreSQL databases to api.pooled_postgresql."""
+
+    def load_settings(self, **env):
+        env = {
+            'DATABASE_URL': 'postgres://app@db.example.com/youmatter',
+            'DATABASE_REPLICA_URLS': 'postgres://app@replica.example.com/youmatter,sqlite:////tmp/replica.sqlite3',
+            **env,
+        }
+        with mock.patch.dict(os.environ, env):
+            return runpy.run_path(str(settings.BASE_DIR / 'project' / 'settings.py'))['DATABASES']
+
+    def test_pooling_is_off_by_default(self):
+        databases = self.load_settings(DATABASE_POOL='False')
+        self.assertEqual(databases['default']['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual(databases['default']['CONN_MAX_AGE'], 600)
+        self.assertNotIn('pool', databases['default'].get('OPTIONS', {}))
+
+    def test_pool_settings_apply_to_postgresql_databases(self):
+        databases = self.load_settings(DATABASE_POOL='True', DATABASE_POOL_MAX_SIZE='4', DATABASE_POOL_CHECK='False')
+        for alias in ('default', 'replica_0'):
+            with self.subTest(alias=alias):
+                database = databases[alias]
+                self.assertEqual(database['ENGINE'], 'api.pooled_postgresql')
+                self.assertEqual(database['CONN_MAX_AGE'], 0)
+                self.assertFalse(database['CONN_HEALTH_CHECKS'])
+                self.assertEqual(database['OPTIONS']['pool'], {
+                    'min_size': 2, 'max_size': 4, 'timeout': 10.0,
+                    'max_idle': 600.0, 'max_lifetime': 3600.0, 'check': False,
+                })
+        self.assertEqual(databases['replica_1']['ENGINE'], 'django.db.backends.sqlite3')
+
+
+class PooledDatabaseWrapperTests(SimpleTestCase):
+    def wrapper(self, **settings_dict):
+        configured = connections.configure_settings({
+            DEFAULT_DB_ALIAS: {
+                'ENGINE': 'api.pooled_postgresql', 'NAME': 'youmatter', 'USER': 'app', 'HOST': 'db.example.com',
+                'CONN_MAX_AGE': 0, 'OPTIONS': {'pool': {'max_size': 4, 'check': False}}, **settings_dict,
+            },
+        })
+        return pooled_postgresql.DatabaseWrapper(configured[DEFAULT_DB_ALIAS], 'pooled')
+
+    def test_pool_options_reach_the_pool(self):
+        with mock.patch.dict(pooled_postgresql._pools, clear=True), \
+                mock.patch.object(pooled_postgresql, 'ConnectionPool') as pool_class, \
+                mock.patch.object(pooled_postgresql.atexit, 'register'):
+            wrapper = self.wrapper()
+            self.assertIs(wrapper.pool, wrapper.pool)
+        pool_class.assert_called_once()
+        kwargs = pool_class.call_args.kwargs
+        self.assertNotIn('pool', kwargs.pop('kwargs'))
+        self.assertEqual(kwargs, {
+            'name': 'pooled', 'check': None, 'open': True,
+            'min_size': 2, 'max_size': 4, 'timeout': 10.0, 'max_idle': 600.0, 'max_lifetime': 3600.0,
+        })
+
+    def test_persistent_connections_are_rejected(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, 'CONN_MAX_AGE'):
+            self.wrapper(CONN_MAX_AGE=600)
+
+    def test_stats_report_connections_in_use(self):
+        pools = {('pooled', 'youmatter'): fake_pool(
+            'pooled', pool_size=5, pool_available=2, requests_num=4, requests_wait_ms=10,
+        )}
+        with mock.patch.dict(pooled_postgresql._pools, pools, clear=True):
+            stats = pooled_postgresql.pool_stats()['pooled']
+        self.assertEqual((stats['in_use'], stats['idle'], stats['waiting']), (3, 2, 0))
+        self.assertEqual(stats['average_wait_ms'], 2.5)
+
+
+@skipUnless(
+    connections.settings[DEFAULT_DB_ALIAS]['ENGINE'] == 'api.pooled_postgresql', 'needs DATABASE_POOL on PostgreSQL'
+)
+class PooledConnectionTests(TransactionTestCase):
+    def test_close_gives_the_connection_back(self):
+        connection = connections[DEFAULT_DB_ALIAS]
+        connection.close()
+        idle = pooled_postgresql.pool_stats()[DEFAULT_DB_ALIAS]['idle']
+        connection.ensure_connection()
+        self.assertEqual(pooled_postgresql.pool_stats()[DEFAULT_DB_ALIAS]['idle'], max(idle - 1, 0))
+        connection.close()
+        stats = pooled_postgresql.pool_stats()[DEFAULT_DB_ALIAS]
+        self.assertEqual(stats['in_use'], 0)
+        self.assertGreaterEqual(stats['idle'], 1)
+
+
+class DatabasePoolStatsViewTests(TestCase):
+    url = '/api/ops/db-pool/'
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_requires_an_admin(self):
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        self.client.force_authenticate(User.objects.create_user(username='pool-user', email='pool-user@example.com'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_reports_this_process_pools(self):
+        self.client.force_authenticate(User.objects.create_superuser(username='pool-admin', email='pool-admin@example.com'))
+        pools = {('default', 'youmatter'): fake_pool('default', pool_size=2, pool_available=2)}
+        with mock.patch.dict(pooled_postgresql._pools, pools, clear=True):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['pid'], os.getpid())
+        self.assertEqual(response.data['pools']['default']['in_use'], 0)
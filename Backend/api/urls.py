@@ -1,4 +1,6 @@
 from django.urls import path, include
+from .export import ExportView
+from .views import DatabasePoolStatsView
 
 # Register your viewsets here
 # Example: router.register(r'items', ItemViewSet)
@@ -7,4 +9,6 @@ urlpatterns = [
     path('checkin/', include('checkin.urls')),
     path('journal/', include('journal.urls')),
     path('auth/', include('authentication.urls')),
+    path('export/', ExportView.as_view(), name='export'),
+    path('ops/db-pool/', DatabasePoolStatsView.as_view(), name='db-pool-stats'),
 ]
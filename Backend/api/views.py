@@ -1,9 +1,23 @@
+import os
+
 from django.shortcuts import render
 from .models import *
 from .serializers import *
 from rest_framework.views import APIView
-from rest_framework import generics
+from rest_framework import generics, permissions
 from rest_framework.response import Response
+from .pooled_postgresql.base import pool_stats
 # Create your views here.
 
 
+
+class DatabasePoolStatsView(APIView):
+    """
+    Connection pool counters (api.pooled_postgresql) of the worker process
+    that answers; every process keeps its own pools, so poll repeatedly to
+    see them all. Empty when pooling is off.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({'pid': os.getpid(), 'pools': pool_stats()})
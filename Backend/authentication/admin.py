@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from api.changelist import prefix_search
 from .models import User
 
 @admin.register(User)
@@ -7,4 +8,11 @@ class CustomUserAdmin(UserAdmin):
     list_display = ('email', 'username', 'is_active', 'date_joined')
     list_filter = ('is_active', 'is_staff', 'date_joined')
     search_fields = ('email', 'username')
-    ordering = ('-date_joined',)
\ No newline at end of file
+    ordering = ('-date_joined',)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Autocomplete widgets, such as the journal admin's user filter, match
+        # by prefix so the username and email indexes answer them
+        if request.resolver_match and request.resolver_match.url_name == 'autocomplete':
+            return prefix_search(queryset, ('username', 'email'), search_term.strip()), False
+        return super().get_search_results(request, queryset, search_term)
@@ -2,4 +2,19 @@ from django.apps import AppConfig
 
 class AuthenticationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'authentication'
\ No newline at end of file
+    name = 'authentication'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from psychartist.models import Psychartist, PsychartistApplication
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+        from .models import User
+        from .signals import blacklisted_token_saved, user_changed, user_relation_changed
+
+        # The cached profile embeds the user's application and psychartist profile
+        receivers = [(User, user_changed), (PsychartistApplication, user_relation_changed), (Psychartist, user_relation_changed)]
+        for model, receiver in receivers:
+            post_save.connect(receiver, sender=model, dispatch_uid=f'profile-cache-save-{model._meta.label}')
+            post_delete.connect(receiver, sender=model, dispatch_uid=f'profile-cache-delete-{model._meta.label}')
+
+        post_save.connect(blacklisted_token_saved, sender=BlacklistedToken, dispatch_uid='token-revocation-filter')
@@ -0,0 +1,39 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .cache import get_cached_user, set_cached_user
+from .tokens import TOKEN_VERSION_CLAIM
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the user from a short-lived cache.
+
+    The cache is keyed by user id and the entry is only used while its
+    token_version matches the token's, so a token issued before a password
+    change or deactivation fails without a query. Saving the user and
+    logging out drop the entry; other processes see the change at most
+    AUTH_USER_CACHE_TIMEOUT seconds later when AUTH_USER_CACHE is per-process.
+    """
+
+    def get_user(self, validated_token):
+        user_id, version = self.get_identity(validated_token)
+        user = get_cached_user(user_id)
+        if user is None or user.token_version < version:
+            user = super().get_user(validated_token)
+            set_cached_user(user)
+        return self.check_version(user, version)
+
+    def get_identity(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+        return user_id, validated_token.get(TOKEN_VERSION_CLAIM, 0)
+
+    def check_version(self, user, version):
+        if user.token_version != version:
+            raise AuthenticationFailed(_('Token has been revoked'), code='token_revoked')
+        return user
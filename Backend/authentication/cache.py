@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.cache import caches
+
+from api.counters import bump_counter, read_counter
+
+
+def profile_cache():
+    return caches[settings.PROFILE_CACHE]
+
+
+def auth_user_cache():
+    return caches[settings.AUTH_USER_CACHE]
+
+
+def auth_user_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def get_cached_user(user_id):
+    return auth_user_cache().get(auth_user_key(user_id))
+
+
+def set_cached_user(user):
+    auth_user_cache().set(auth_user_key(user.pk), user, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+
+
+def invalidate_auth_user(user_id):
+    auth_user_cache().delete(auth_user_key(user_id))
+
+
+def version_key(user_id):
+    return f'auth:profile:{user_id}:version'
+
+
+def current_version(user_id):
+    """
+    Per-user version folded into the profile cache key.
+
+    Invalidating bumps the version instead of deleting the entry: a request
+    that read the database before the change and stores its result afterwards
+    writes under the old version, where nothing will ever read it.
+    """
+    return read_counter(profile_cache(), version_key(user_id))
+
+
+def invalidate_profile(user_id):
+    """Drop the cached profile of one user. Call once the change has committed."""
+    bump_counter(profile_cache(), version_key(user_id))
+
+
+def get_or_build_profile(user_id, build):
+    """Return the cached profile data for `user_id`, calling `build()` on a miss."""
+    cache = profile_cache()
+    key = f'auth:profile:{user_id}:{current_version(user_id)}'
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, timeout=settings.PROFILE_CACHE_TIMEOUT)
+    return data
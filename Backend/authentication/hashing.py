@@ -0,0 +1,61 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import JsonResponse
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+def _pool():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASHING_WORKERS, thread_name_prefix='password-hashing'
+            )
+            _slots = threading.BoundedSemaphore(settings.PASSWORD_HASHING_WORKERS + settings.PASSWORD_HASHING_QUEUE)
+    return _executor, _slots
+
+
+def _run(view, request, *args, **kwargs):
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+    finally:
+        # Pool threads never see request_finished, so release their connections here
+        close_old_connections()
+
+
+def offload_hashing(view):
+    """
+    Wrap a sync view that hashes passwords as an async view run in a bounded pool.
+
+    At most PASSWORD_HASHING_WORKERS requests hash at once and at most
+    PASSWORD_HASHING_QUEUE more wait; beyond that the view answers 503
+    straight away. Under ASGI the event loop, and with it every other
+    endpoint, keeps serving while a credential flood queues here.
+    """
+
+    async def async_view(request, *args, **kwargs):
+        executor, slots = _pool()
+        if not slots.acquire(blocking=False):
+            response = JsonResponse({'detail': 'Too many sign-in attempts in progress. Try again shortly.'}, status=503)
+            response['Retry-After'] = '1'
+            return response
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, partial(_run, view, request, *args, **kwargs))
+        finally:
+            slots.release()
+
+    # DRF views are csrf_exempt; Django 4.2's decorator cannot wrap async views
+    async_view.csrf_exempt = True
+    return async_view
@@ -0,0 +1,64 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from api.benchmarks import rolled_back
+from authentication.authentication import CachedJWTAuthentication
+from authentication.tokens import VersionedRefreshToken
+
+User = get_user_model()
+
+ENDPOINTS = ['/api/checkin/?limit=20', '/api/journal/?limit=20', '/api/checkin/quick/?limit=20']
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure authenticated request throughput on the check-in and journal '
+        'lists with JWTAuthentication and with CachedJWTAuthentication'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self.run(options['requests'])
+
+    def run(self, requests):
+        user = User.objects.create_user(username='benchmark-auth', email='benchmark-auth@example.com')
+        client = APIClient(HTTP_HOST='localhost')
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {VersionedRefreshToken.for_user(user).access_token}')
+
+        default_classes = APIView.authentication_classes
+        results = {}
+        try:
+            for authenticator in (JWTAuthentication, CachedJWTAuthentication):
+                # Views without their own authentication_classes inherit this attribute
+                APIView.authentication_classes = [authenticator]
+                results[authenticator.__name__] = self.measure(client, requests)
+        finally:
+            APIView.authentication_classes = default_classes
+
+        for name, (rate, queries) in results.items():
+            self.stdout.write(f'{name:<24} {rate:8.0f} req/s   {queries:.1f} queries/request')
+        base, cached = results['JWTAuthentication'][0], results['CachedJWTAuthentication'][0]
+        self.stdout.write(self.style.SUCCESS(f'Cached authentication: {cached / base:.2f}x throughput'))
+
+    def measure(self, client, requests):
+        # Warm up caches and lazily imported code before timing
+        for path in ENDPOINTS:
+            assert client.get(path).status_code == 200
+
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for i in range(requests):
+                response = client.get(ENDPOINTS[i % len(ENDPOINTS)])
+                assert response.status_code == 200, response.content
+            elapsed = time.perf_counter() - start
+        return requests / elapsed, len(queries) / requests
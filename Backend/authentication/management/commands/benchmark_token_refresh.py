@@ -0,0 +1,84 @@
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from api.benchmarks import rolled_back
+from api.counters import is_process_local
+from authentication.revocation import blacklist_pruned, revocation_cache, token_blacklisted
+from authentication.tokens import VersionedRefreshToken
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Time POST /api/auth/token/refresh/ as the outstanding and blacklisted '
+        'token tables grow; latency should stay flat. Everything runs in a '
+        'transaction that is rolled back, so no rows outlive the benchmark.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tokens', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+        parser.add_argument('--requests', type=int, default=200)
+
+    def handle(self, *args, **options):
+        if is_process_local(revocation_cache()):
+            self.stdout.write('TOKEN_REVOCATION_CACHE is per process; measuring the database check')
+        else:
+            self.stdout.write('Revocation filter in use; each rotation reloads it incrementally')
+        try:
+            with rolled_back():
+                user = User.objects.create_user(username='benchmark-refresh', email='benchmark-refresh@example.com')
+                self.run(user, options['tokens'], options['requests'])
+        finally:
+            # Every filter may have loaded rows that were rolled back, and on
+            # SQLite their ids will be handed out again
+            blacklist_pruned()
+
+    def run(self, user, sizes, requests):
+        client = APIClient(HTTP_HOST='localhost')
+        seeded = 0
+        for size in sorted(sizes):
+            self.seed(user, seeded, size)
+            seeded = size
+
+            refresh = str(VersionedRefreshToken.for_user(user))
+            timings = []
+            for _ in range(requests):
+                start = time.perf_counter()
+                response = client.post('/api/auth/token/refresh/', {'refresh': refresh}, format='json')
+                timings.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.content
+                refresh = response.json()['refresh']
+                # The rotation's on_commit() never runs inside the rolled-back
+                # transaction; tell the filters as it would
+                token_blacklisted()
+
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            self.stdout.write(
+                f'{size:>9} issued tokens: p50 {statistics.median(timings) * 1000:6.2f} ms   p95 {p95 * 1000:6.2f} ms'
+            )
+
+    def seed(self, user, start, stop, batch_size=10_000):
+        # Every other token was rotated out, like a week of refreshes
+        expires = timezone.now() + timedelta(days=7)
+        for offset in range(start, stop, batch_size):
+            tokens = OutstandingToken.objects.bulk_create([
+                OutstandingToken(user=user, jti=uuid.uuid4().hex, token='', expires_at=expires)
+                for _ in range(offset, min(offset + batch_size, stop))
+            ])
+            BlacklistedToken.objects.bulk_create([BlacklistedToken(token=token) for token in tokens[::2]])
+        # Rotated out over the past week, not just now; bulk_create() stamps
+        # blacklisted_at and skips the signal that tells the filters
+        BlacklistedToken.objects.filter(token__user=user, blacklisted_at__gte=timezone.now() - timedelta(hours=1)).update(
+            blacklisted_at=timezone.now() - timedelta(days=1)
+        )
+        blacklist_pruned()
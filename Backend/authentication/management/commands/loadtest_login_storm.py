@@ -0,0 +1,94 @@
+import json
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+
+PROBE_PATHS = ['/api/checkin/?limit=20', '/api/journal/?limit=20']
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test a running server: measure check-in/journal latency on their '
+        'own and then during a storm of failing logins. Run against a deployment '
+        'configured like production (gunicorn workers, shared cache).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument('--storm-clients', type=int, default=16)
+        parser.add_argument('--probe-clients', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per phase')
+
+    def handle(self, *args, **options):
+        self.url = options['url'].rstrip('/')
+        access = self.sign_up()
+
+        baseline = self.phase(access, options['probe_clients'], 0, options['duration'])
+        storm = self.phase(access, options['probe_clients'], options['storm_clients'], options['duration'])
+
+        for label, (latencies, statuses) in (('baseline', baseline), ('login storm', storm)):
+            latencies.sort()
+            p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)]
+            self.stdout.write(
+                f'{label:<12} {len(latencies):6} probe requests   '
+                f'p50 {statistics.median(latencies) * 1000:8.1f} ms   p99 {p99 * 1000:8.1f} ms'
+            )
+        self.stdout.write(f'login responses during the storm: {dict(storm[1])}')
+
+    def sign_up(self):
+        name = f'loadtest-{uuid.uuid4().hex[:12]}'
+        status, body = self.request('POST', '/api/auth/register/', {
+            'username': name, 'email': f'{name}@example.com',
+            'password': 'Load-test-password-1', 'password_confirm': 'Load-test-password-1',
+        })
+        if status != 201:
+            raise CommandError(f'Could not register the probe user ({status}): {body}')
+        return json.loads(body)['access']
+
+    def phase(self, access, probe_clients, storm_clients, duration):
+        deadline = time.monotonic() + duration
+        latencies, statuses = [], Counter()
+        lock = threading.Lock()
+
+        def probe():
+            i = 0
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                status, _ = self.request('GET', PROBE_PATHS[i % len(PROBE_PATHS)], access=access)
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+                i += 1
+
+        def storm():
+            while time.monotonic() < deadline:
+                status, _ = self.request('POST', '/api/auth/token/', {
+                    'username': f'storm-{uuid.uuid4().hex[:8]}', 'password': 'wrong-password',
+                })
+                with lock:
+                    statuses[status] += 1
+
+        threads = [threading.Thread(target=probe) for _ in range(probe_clients)]
+        threads += [threading.Thread(target=storm) for _ in range(storm_clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return latencies, statuses
+
+    def request(self, method, path, payload=None, access=None):
+        headers = {'Content-Type': 'application/json'}
+        if access:
+            headers['Authorization'] = f'Bearer {access}'
+        data = json.dumps(payload).encode() if payload is not None else None
+        try:
+            with urlopen(Request(self.url + path, data=data, headers=headers, method=method), timeout=60) as response:
+                return response.status, response.read()
+        except HTTPError as error:
+            return error.code, error.read()
@@ -1,13 +1,36 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+# Changing any of these revokes every token issued to the user
+REVOKING_FIELDS = ('password', 'is_active')
+
 class User(AbstractUser):
     email = models.EmailField(unique=True)
     date_joined = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
+    # Copied into issued tokens; tokens carrying an older version are rejected
+    token_version = models.PositiveIntegerField(default=0, editable=False)
     
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = ['email']
     
     def __str__(self):
-        return self.username
\ No newline at end of file
+        return self.username
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        user._revoking_values = {
+            name: value for name, value in zip(field_names, values) if name in REVOKING_FIELDS
+        }
+        return user
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_revoking_values', {})
+        if any(getattr(self, name) != value for name, value in loaded.items()):
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+        super().save(*args, **kwargs)
+        self._revoking_values = {name: getattr(self, name) for name in loaded}
@@ -0,0 +1,140 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from api.counters import bump_counter, is_process_local, read_counter
+
+GENERATION_KEY = 'auth:revoked:generation'
+EPOCH_KEY = 'auth:revoked:epoch'
+# Ids missing below the highest one loaded are re-read for this long, in case
+# their transaction commits late (same idea as api.sync.CURSOR_OVERLAP)
+LOAD_OVERLAP = timedelta(seconds=60)
+# Most blacklistings expected in flight at once; longer runs of missing ids are pruned rows
+MAX_IN_FLIGHT = 1000
+MIN_CAPACITY = 100_000
+ERROR_RATE = 0.001
+
+
+def revocation_cache():
+    return caches[settings.TOKEN_REVOCATION_CACHE]
+
+
+def token_blacklisted():
+    """Tell every process a token was blacklisted. Call once the row has committed."""
+    bump_counter(revocation_cache(), GENERATION_KEY)
+
+
+def blacklist_pruned():
+    """Tell every process to rebuild its filter without the pruned tokens."""
+    bump_counter(revocation_cache(), EPOCH_KEY)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings: no false negatives, ERROR_RATE false positives."""
+
+    def __init__(self, capacity, error_rate=ERROR_RATE):
+        self.capacity = capacity
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class RevocationFilter:
+    """
+    Per-process Bloom filter over the jti of every blacklisted token.
+
+    A token the filter has never seen is certainly not blacklisted, so the
+    refresh and logout paths skip the blacklist query for almost every
+    token; only filter hits are confirmed against the database. The filter
+    follows two counters in the shared cache: the generation, bumped after
+    each blacklisting, triggers an incremental load of the rows past the
+    highest id loaded, and the epoch, bumped after pruning, triggers a full
+    rebuild. Each load walks the primary key, so its cost depends on the
+    rows blacklisted since the last one, not on the size of the table.
+
+    The counters have to be seen by every process that refreshes tokens: the
+    default file cache is, for the workers of one host, and Redis or
+    Memcached are across hosts. With a per-process cache a blacklisting in
+    another process would go unseen, so every token is checked in the
+    database instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._state = None
+        self._max_id = 0
+        # {id: monotonic time first found missing} below _max_id, still expected to commit
+        self._gaps = {}
+
+    def might_be_revoked(self, jti):
+        if is_process_local(revocation_cache()):
+            return True
+        self.sync()
+        return jti in self._filter
+
+    def sync(self):
+        cache = revocation_cache()
+        state = (read_counter(cache, EPOCH_KEY), read_counter(cache, GENERATION_KEY))
+        if state == self._state:
+            return
+        with self._lock:
+            if state == self._state:
+                return
+            if self._state is None or state[0] != self._state[0] or self._filter.count > self._filter.capacity:
+                blacklisted = BlacklistedToken.objects.all()
+                bloom = BloomFilter(max(MIN_CAPACITY, 2 * blacklisted.count()))
+                self._max_id, self._gaps = 0, {}
+                self._load(bloom, blacklisted)
+                # Swap in the filter only once it is complete; readers never take the lock
+                self._filter = bloom
+            else:
+                now = time.monotonic()
+                self._gaps = {
+                    pk: since for pk, since in self._gaps.items() if now - since < LOAD_OVERLAP.total_seconds()
+                }
+                recent = BlacklistedToken.objects.filter(Q(id__gt=self._max_id) | Q(id__in=list(self._gaps)))
+                self._load(self._filter, recent)
+            self._state = state
+
+    def _load(self, bloom, blacklisted):
+        now = time.monotonic()
+        recent = timezone.now() - LOAD_OVERLAP
+        rows = blacklisted.order_by('id').values_list('id', 'blacklisted_at', 'token__jti')
+        for pk, blacklisted_at, jti in rows.iterator(chunk_size=10_000):
+            if jti not in bloom:
+                bloom.add(jti)
+            self._gaps.pop(pk, None)
+            if pk > self._max_id:
+                # Lower ids still missing next to a recent row may belong to
+                # transactions that have not committed yet
+                if blacklisted_at >= recent:
+                    first = max(self._max_id + 1, pk - MAX_IN_FLIGHT)
+                    self._gaps.update(dict.fromkeys(range(first, pk), now))
+                self._max_id = pk
+
+
+revocations = RevocationFilter()
@@ -1,7 +1,9 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
 from .models import User
+from .tokens import VersionedRefreshToken
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, validators=[validate_password])
@@ -41,6 +43,26 @@ class UserLoginSerializer(serializers.Serializer):
         
         return attrs
 
+PROFILE_RELATIONS = ('psychartist_application', 'psychartist_profile')
+
+
+def profile_queryset():
+    """Users with both psychartist relations joined in, for UserProfileSerializer."""
+    return User.objects.select_related(*PROFILE_RELATIONS)
+
+
+def mark_without_profile_relations(user):
+    """Record that a just-created user has no application or profile, so serializing it runs no queries."""
+    for name in PROFILE_RELATIONS:
+        getattr(User, name).related.set_cached_value(user, None)
+
+
+class VersionedTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = VersionedRefreshToken
+
+class VersionedTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = VersionedRefreshToken
+
 class UserProfileSerializer(serializers.ModelSerializer):
     psychartist_status = serializers.SerializerMethodField()
     psychartist_profile = serializers.SerializerMethodField()
@@ -52,33 +74,32 @@ class UserProfileSerializer(serializers.ModelSerializer):
     
     def get_psychartist_status(self, obj):
         """Get psychartist application status"""
-        try:
-            application = obj.psychartist_application
-            return {
-                'has_application': True,
-                'status': application.status,
-                'applied_at': application.applied_at
-            }
-        except:
+        # A missing reverse one-to-one raises RelatedObjectDoesNotExist, an AttributeError
+        application = getattr(obj, 'psychartist_application', None)
+        if application is None:
             return {
                 'has_application': False,
                 'status': None,
                 'applied_at': None
             }
+        return {
+            'has_application': True,
+            'status': application.status,
+            'applied_at': application.applied_at
+        }
     
     def get_psychartist_profile(self, obj):
         """Get psychartist profile if approved"""
-        try:
-            profile = obj.psychartist_profile
-            return {
-                'id': profile.id,
-                'full_name': profile.full_name,
-                'specialization': profile.specialization,
-                'years_of_experience': profile.years_of_experience,
-                'profile_picture': profile.profile_picture.url if profile.profile_picture else None,
-                'is_active': profile.is_active,
-                'average_rating': float(profile.average_rating),
-                'total_reviews': profile.total_reviews
-            }
-        except:
-            return None
\ No newline at end of file
+        profile = getattr(obj, 'psychartist_profile', None)
+        if profile is None:
+            return None
+        return {
+            'id': profile.id,
+            'full_name': profile.full_name,
+            'specialization': profile.specialization,
+            'years_of_experience': profile.years_of_experience,
+            'profile_picture': profile.profile_picture.url if profile.profile_picture else None,
+            'is_active': profile.is_active,
+            'average_rating': float(profile.average_rating),
+            'total_reviews': profile.total_reviews
+        }
@@ -0,0 +1,21 @@
+from functools import partial
+
+from django.db import transaction
+
+from .cache import invalidate_auth_user, invalidate_profile
+from .revocation import token_blacklisted
+
+
+def user_changed(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_auth_user, instance.pk))
+    transaction.on_commit(partial(invalidate_profile, instance.pk))
+
+
+def user_relation_changed(sender, instance, **kwargs):
+    """Receiver for models shown in a user's profile, which all carry a `user` FK."""
+    transaction.on_commit(partial(invalidate_profile, instance.user_id))
+
+
+def blacklisted_token_saved(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(token_blacklisted)
@@ -0,0 +1,277 @@
+import os
+import tempfile
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+from rest_framework.throttling import SimpleRateThrottle
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from . import hashing
+from .authentication import CachedJWTAuthentication
+from .cache import auth_user_cache
+from .revocation import BloomFilter, blacklist_pruned, revocation_cache, revocations, token_blacklisted
+from .throttling import LoginUsernameThrottle
+from .tokens import VersionedRefreshToken
+from .views import LoginView
+
+User = get_user_model()
+
+LOCAL_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'authentication-tests'},
+    'auth': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'authentication-tests-auth'},
+}
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        auth_user_cache().clear()
+        self.user = User.objects.create_user(username='jwt', email='jwt@example.com', password='old-password')
+        self.access = str(VersionedRefreshToken.for_user(self.user).access_token)
+
+    def authenticate(self, access=None):
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {access or self.access}')
+        user, _ = CachedJWTAuthentication().authenticate(request)
+        return user
+
+    def change(self, **fields):
+        user = User.objects.get(pk=self.user.pk)
+        for name, value in fields.items():
+            setattr(user, name, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        return user
+
+    def assertRevoked(self, code='token_revoked'):
+        with self.assertRaises(AuthenticationFailed) as raised:
+            self.authenticate()
+        self.assertEqual(raised.exception.detail['code'], code)
+
+    def test_cached_user_needs_no_query(self):
+        self.authenticate()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate().pk, self.user.pk)
+
+    def test_password_change_revokes_tokens(self):
+        self.authenticate()
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new-password')
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.assertRevoked()
+        # A token issued afterwards works straight away
+        self.assertEqual(self.authenticate(str(VersionedRefreshToken.for_user(user).access_token)).pk, user.pk)
+
+    def test_deactivation_revokes_tokens(self):
+        self.authenticate()
+        self.change(is_active=False)
+        self.assertRevoked('user_inactive')
+        # Reactivating does not bring the old tokens back
+        self.change(is_active=True)
+        self.assertRevoked()
+
+    def test_token_version_bump_revokes_tokens(self):
+        self.authenticate()
+        user = User.objects.get(pk=self.user.pk)
+        user.token_version += 1
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.assertRevoked()
+
+    def test_other_changes_keep_tokens(self):
+        self.authenticate()
+        self.change(first_name='Ada')
+        self.assertEqual(self.authenticate().first_name, 'Ada')
+
+    def test_other_workers_see_revocation_after_their_cache_expires(self):
+        self.authenticate()
+        # Another worker changed the user: this process's entry stays until it expires
+        User.objects.filter(pk=self.user.pk).update(token_version=self.user.token_version + 1)
+        self.assertEqual(self.authenticate().pk, self.user.pk)
+        auth_user_cache().clear()
+        self.assertRevoked()
+
+    def test_logout_drops_cached_user(self):
+        refresh = VersionedRefreshToken.for_user(self.user)
+        self.authenticate()
+        response = self.client.post(
+            '/api/auth/logout/', {'refresh': str(refresh)}, content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {self.access}',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(auth_user_cache().get(f'auth:user:{self.user.pk}'))
+
+
+# The filter is only used with a cache every process sees, such as the file backend
+@override_settings(CACHES={
+    **LOCAL_CACHES,
+    'revocation': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'youmatter-revocation-tests'),
+    },
+}, TOKEN_REVOCATION_CACHE='revocation')
+class RevocationFilterTests(TestCase):
+    url = '/api/auth/token/refresh/'
+
+    def setUp(self):
+        # Fresh counters make every process-wide filter rebuild
+        revocation_cache().clear()
+        self.user = User.objects.create_user(username='revoked', email='revoked@example.com')
+
+    def refresh(self, token):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, {'refresh': str(token)}, content_type='application/json')
+
+    def blacklist(self, **fields):
+        token = OutstandingToken.objects.create(
+            user=self.user, jti=uuid.uuid4().hex, token='', expires_at=timezone.now() + timedelta(days=1)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            BlacklistedToken.objects.create(token=token, **fields)
+        return token.jti
+
+    def test_rotated_refresh_token_is_rejected(self):
+        token = VersionedRefreshToken.for_user(self.user)
+        self.assertEqual(self.refresh(token).status_code, 200)
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+    def test_unknown_tokens_skip_the_database(self):
+        self.blacklist()
+        revocations.sync()
+        with self.assertNumQueries(0):
+            self.assertFalse(revocations.might_be_revoked(uuid.uuid4().hex))
+
+    def test_prune_rebuilds_the_filter(self):
+        jti = self.blacklist()
+        self.assertTrue(revocations.might_be_revoked(jti))
+        BlacklistedToken.objects.all().delete()
+        blacklist_pruned()
+        self.assertFalse(revocations.might_be_revoked(jti))
+
+    def test_late_commit_below_loaded_ids_is_picked_up(self):
+        self.blacklist(id=50)
+        revocations.sync()
+        # A row whose transaction took its id earlier but committed later
+        jti = self.blacklist(id=40)
+        self.assertTrue(revocations.might_be_revoked(jti))
+
+    def test_false_positive_is_confirmed_in_the_database(self):
+        token = VersionedRefreshToken.for_user(self.user)
+        with mock.patch.object(BloomFilter, '__contains__', return_value=True):
+            self.assertTrue(revocations.might_be_revoked(token['jti']))
+            self.assertEqual(self.refresh(token).status_code, 200)
+
+    def test_per_process_cache_checks_every_token(self):
+        with override_settings(TOKEN_REVOCATION_CACHE='default'), self.assertNumQueries(0):
+            self.assertTrue(revocations.might_be_revoked(uuid.uuid4().hex))
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class LoginThrottleTests(TestCase):
+    rates = {'login_ip': '100/min', 'login_username': '3/min', 'login_account': '5/hour', 'register_ip': '10/hour'}
+
+    def setUp(self):
+        patcher = mock.patch.dict(SimpleRateThrottle.THROTTLE_RATES, self.rates)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        cache.clear()
+        User.objects.create_user(username='victim', email='victim@example.com', password='right-password')
+        self.client = APIClient()
+
+    def login(self, ip='10.0.0.1', username='victim', password='wrong-password'):
+        return self.client.post(
+            '/api/auth/token/', {'username': username, 'password': password}, format='json', REMOTE_ADDR=ip
+        )
+
+    def test_guesses_from_one_address_get_429_with_retry_after(self):
+        for _ in range(3):
+            self.assertEqual(self.login().status_code, 401)
+        response = self.login()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '20')
+        # Another address still gets its own per-address bucket
+        self.assertEqual(self.login(ip='10.0.0.2').status_code, 401)
+
+    def test_username_is_normalised(self):
+        for username in ('victim', 'Victim', ' VICTIM '):
+            self.login(username=username)
+        self.assertEqual(self.login().status_code, 429)
+
+    def test_guesses_spread_over_addresses_hit_the_account_limit(self):
+        for n in range(5):
+            self.assertEqual(self.login(ip=f'10.0.1.{n}').status_code, 401)
+        response = self.login(ip='10.0.1.99')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '720')
+        # Other accounts are unaffected
+        self.assertEqual(self.login(ip='10.0.1.99', username='someone-else').status_code, 401)
+
+    def test_bucket_refills_over_time(self):
+        now = [1000.0]
+        with mock.patch.object(SimpleRateThrottle, 'timer', lambda self: now[0]), \
+                mock.patch.dict(SimpleRateThrottle.THROTTLE_RATES, {'login_account': '100/min'}):
+            for _ in range(3):
+                self.login()
+            self.assertEqual(self.login().status_code, 429)
+            now[0] += 20
+            self.assertEqual(self.login().status_code, 401)
+            self.assertEqual(self.login().status_code, 429)
+            now[0] += 60
+            for _ in range(3):
+                self.assertEqual(self.login().status_code, 401)
+
+    def test_non_object_bodies_are_not_throttled_by_username(self):
+        request = RequestFactory().post('/api/auth/token/')
+        for data in (['victim'], 'victim', 7, {'username': ['victim']}, {'username': '  '}):
+            request.data = data
+            self.assertIsNone(LoginUsernameThrottle().get_cache_key(request, None))
+        response = self.client.post('/api/auth/token/', ['victim'], format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CACHES=LOCAL_CACHES, PASSWORD_HASHING_WORKERS=1)
+class OffloadedLoginThrottleTests(TransactionTestCase):
+    """The hashing pool runs the view on its own thread and connection."""
+
+    def setUp(self):
+        for patcher in (
+            mock.patch.dict(SimpleRateThrottle.THROTTLE_RATES, LoginThrottleTests.rates),
+            mock.patch.multiple(hashing, _executor=None, _slots=None),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(self.stop_pool)
+        cache.clear()
+        User.objects.create_user(username='victim', email='victim@example.com', password='right-password')
+
+    def stop_pool(self):
+        # The worker's connection would otherwise outlive the test database
+        if hashing._executor is not None:
+            hashing._executor.submit(connections.close_all).result()
+            hashing._executor.shutdown()
+
+    def test_offloaded_login_is_throttled(self):
+        view = hashing.offload_hashing(LoginView.as_view())
+
+        def login():
+            request = RequestFactory().post(
+                '/api/auth/token/', {'username': 'victim', 'password': 'wrong-password'},
+                content_type='application/json', REMOTE_ADDR='10.0.0.1',
+            )
+            return async_to_sync(view)(request)
+
+        for _ in range(3):
+            self.assertEqual(login().status_code, 401)
+        response = login()
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
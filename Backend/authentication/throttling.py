@@ -0,0 +1,95 @@
+from collections.abc import Mapping
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Token-bucket throttle over the shared default cache.
+
+    A rate of 'N/period' is a bucket of N tokens refilled at N per period:
+    a client can burst N requests and then sustain one every period/N.
+    The bucket is two numbers, so state per client stays constant however
+    fast it retries, unlike SimpleRateThrottle's timestamp history.
+
+    The read-modify-write is not atomic; concurrent requests from one
+    client can each spend the same token, which only loosens the limit
+    by the number of requests in flight.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        tokens, updated = self.cache.get(self.key, (self.num_requests, self.now))
+        refill = self.num_requests / self.duration
+        self.tokens = min(self.num_requests, tokens + (self.now - updated) * refill)
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        self.cache.set(self.key, (self.tokens, self.now), self.duration)
+        return True
+
+    def wait(self):
+        return (1 - self.tokens) * self.duration / self.num_requests
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+def login_username(request):
+    """The normalised username a login attempt names, or None."""
+    if not isinstance(request.data, Mapping):
+        return None
+    username = request.data.get('username')
+    if not isinstance(username, str) or not username.strip():
+        return None
+    return username.strip().lower()
+
+
+class LoginUsernameThrottle(TokenBucketThrottle):
+    """
+    Limits guesses against one account from one address.
+
+    Keyed by username and address together, so one client guessing at an
+    account runs dry quickly without locking its owner out elsewhere.
+    """
+    scope = 'login_username'
+
+    def get_cache_key(self, request, view):
+        username = login_username(request)
+        if username is None:
+            return None
+        ident = f'{username}:{self.get_ident(request)}'
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class LoginAccountThrottle(TokenBucketThrottle):
+    """
+    Limits guesses against one account from all addresses together.
+
+    Catches credential stuffing spread over many addresses, which the
+    per-address buckets never see. Its rate is well above what the owner
+    needs, so someone sending an account's username cannot lock it out
+    at the owner's normal pace, only slow it down while they keep going.
+    """
+    scope = 'login_account'
+
+    def get_cache_key(self, request, view):
+        username = login_username(request)
+        if username is None:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': username}
+
+
+class RegisterIPThrottle(LoginIPThrottle):
+    scope = 'register_ip'
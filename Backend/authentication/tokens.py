@@ -0,0 +1,26 @@
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .revocation import revocations
+
+TOKEN_VERSION_CLAIM = 'ver'
+
+
+class VersionedRefreshToken(RefreshToken):
+    """
+    Refresh token stamped with the user's token_version.
+
+    Access tokens minted from it, including after rotation, copy the claim,
+    so bumping User.token_version revokes both. The blacklist is checked
+    through the in-process revocation filter first (see revocation.py).
+    """
+
+    def check_blacklist(self):
+        if revocations.might_be_revoked(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        return token
@@ -1,10 +1,18 @@
+from django.conf import settings
 from django.urls import path
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .views import RegisterView, LogoutView, ProfileView
+from rest_framework_simplejwt.views import TokenRefreshView
+from .hashing import offload_hashing
+from .views import RegisterView, LoginView, LogoutView, ProfileView
+
+register_view = RegisterView.as_view()
+login_view = LoginView.as_view()
+if settings.PASSWORD_HASHING_OFFLOAD:
+    register_view = offload_hashing(register_view)
+    login_view = offload_hashing(login_view)
 
 urlpatterns = [
-    path('register/', RegisterView.as_view(), name='register'),
-    path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('register/', register_view, name='register'),
+    path('token/', login_view, name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('profile/', ProfileView.as_view(), name='profile'),
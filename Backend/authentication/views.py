@@ -2,21 +2,31 @@ from rest_framework import generics, status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenObtainPairView
+from .cache import get_or_build_profile, invalidate_auth_user
 from .models import User
-from .serializers import UserRegistrationSerializer, UserProfileSerializer
+from .serializers import (
+    UserRegistrationSerializer,
+    UserProfileSerializer,
+    mark_without_profile_relations,
+    profile_queryset,
+)
+from .throttling import LoginAccountThrottle, LoginIPThrottle, LoginUsernameThrottle, RegisterIPThrottle
+from .tokens import VersionedRefreshToken
 
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserRegistrationSerializer
     permission_classes = [AllowAny]
+    throttle_classes = [RegisterIPThrottle]
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
+        mark_without_profile_relations(user)
         
-        refresh = RefreshToken.for_user(user)
+        refresh = VersionedRefreshToken.for_user(user)
         
         return Response({
             'user': UserProfileSerializer(user).data,
@@ -24,13 +34,17 @@ class RegisterView(generics.CreateAPIView):
             'access': str(refresh.access_token),
         }, status=status.HTTP_201_CREATED)
 
+class LoginView(TokenObtainPairView):
+    throttle_classes = [LoginIPThrottle, LoginUsernameThrottle, LoginAccountThrottle]
+
 class LogoutView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
+        invalidate_auth_user(request.user.pk)
         try:
             refresh_token = request.data["refresh"]
-            token = RefreshToken(refresh_token)
+            token = VersionedRefreshToken(refresh_token)
             token.blacklist()
             return Response({"message": "Successfully logged out"}, status=status.HTTP_200_OK)
         except Exception as e:
@@ -40,4 +54,7 @@ class ProfileView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        return Response(UserProfileSerializer(request.user).data)
\ No newline at end of file
+        user_id = request.user.pk
+        return Response(get_or_build_profile(
+            user_id, lambda: dict(UserProfileSerializer(profile_queryset().get(pk=user_id)).data)
+        ))
\ No newline at end of file
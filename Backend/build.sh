@@ -11,4 +11,7 @@ python manage.py collectstatic --no-input
 echo "Running all migrations..."
 python manage.py migrate
 
+echo "Backfilling mood rollups..."
+python manage.py rebuild_mood_rollups --missing-only
+
 echo "Build completed successfully!"
\ No newline at end of file
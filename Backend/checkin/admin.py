@@ -1,11 +1,14 @@
 from django.contrib import admin
+from api.changelist import ScalableModelAdmin
 from .models import CheckIn, QuickCheckIn
 
 # Enable one by one to identify 500 error source
 @admin.register(CheckIn)
-class CheckInAdmin(admin.ModelAdmin):
+class CheckInAdmin(ScalableModelAdmin):
     list_display = ('user', 'mood', 'reason', 'created_at')
-    list_filter = ('created_at', 'mood')
+    list_select_related = ('user',)
+    list_filter = ('mood',)
+    date_hierarchy = 'created_at'
     search_fields = ('user__username', 'user__email', 'reason', 'notes')
     readonly_fields = ('created_at',)
     ordering = ('-created_at',)
@@ -34,9 +37,11 @@ class CheckInAdmin(admin.ModelAdmin):
         return obj.user == request.user
 
 @admin.register(QuickCheckIn)
-class QuickCheckInAdmin(admin.ModelAdmin):
+class QuickCheckInAdmin(ScalableModelAdmin):
     list_display = ('user', 'mood', 'intensity', 'type', 'created_at')
-    list_filter = ('created_at', 'type', 'intensity')
+    list_select_related = ('user',)
+    list_filter = ('type', 'intensity')
+    date_hierarchy = 'created_at'
     search_fields = ('user__username', 'user__email', 'note')
     readonly_fields = ('created_at',)
     ordering = ('-created_at',)
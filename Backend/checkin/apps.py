@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class CheckinConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'checkin'
+
+    def ready(self):
+        from django.db.models.signals import post_delete
+
+        from api.conditional import track_changes
+        from api.sync import track_deletions
+        from .models import CheckIn, QuickCheckIn, rollup_row_deleted
+
+        for model in (CheckIn, QuickCheckIn):
+            track_changes(model)
+            track_deletions(model)
+            post_delete.connect(rollup_row_deleted, sender=model, dispatch_uid=f'rollup:{model.sync_collection}')
@@ -0,0 +1,25 @@
+from api.async_views import AsyncListCreateView, AsyncRetrieveUpdateDestroyView
+from .models import CheckIn, QuickCheckIn
+from .serializers import CheckInListSerializer, CheckInSerializer, QuickCheckInListSerializer, QuickCheckInSerializer
+
+
+class CheckInListCreateView(AsyncListCreateView):
+    model = CheckIn
+    serializer_class = CheckInSerializer
+    fast_serializer_class = CheckInListSerializer
+
+
+class CheckInRetrieveUpdateDestroyView(AsyncRetrieveUpdateDestroyView):
+    model = CheckIn
+    serializer_class = CheckInSerializer
+
+
+class QuickCheckInListCreateView(AsyncListCreateView):
+    model = QuickCheckIn
+    serializer_class = QuickCheckInSerializer
+    fast_serializer_class = QuickCheckInListSerializer
+
+
+class QuickCheckInRetrieveUpdateDestroyView(AsyncRetrieveUpdateDestroyView):
+    model = QuickCheckIn
+    serializer_class = QuickCheckInSerializer
@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+from checkin.models import CheckIn, DailyMoodRollup, QuickCheckIn
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Rebuild DailyMoodRollup rows from CheckIn and QuickCheckIn, a chunk of users at a time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='Users rebuilt per transaction')
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help='Only rebuild these user ids')
+        parser.add_argument(
+            '--missing-only',
+            action='store_true',
+            help='Only rebuild users who have check-ins but no rollup rows yet',
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('id')
+        if options['user_ids']:
+            users = users.filter(id__in=options['user_ids'])
+        if options['missing_only']:
+            users = users.filter(
+                Q(Exists(CheckIn.objects.filter(user=OuterRef('pk'))))
+                | Q(Exists(QuickCheckIn.objects.filter(user=OuterRef('pk')))),
+                ~Exists(DailyMoodRollup.objects.filter(user=OuterRef('pk'))),
+            )
+
+        chunk_size = options['chunk_size']
+        last_id = 0
+        total_users = total_rows = 0
+        while True:
+            user_ids = list(users.filter(id__gt=last_id).values_list('id', flat=True)[:chunk_size])
+            if not user_ids:
+                break
+            last_id = user_ids[-1]
+
+            with transaction.atomic():
+                DailyMoodRollup.objects.filter(user_id__in=user_ids).delete()
+                rollups = DailyMoodRollup.objects.build(
+                    CheckIn.objects.filter(user_id__in=user_ids),
+                    QuickCheckIn.objects.filter(user_id__in=user_ids),
+                )
+                DailyMoodRollup.objects.bulk_create(rollups, batch_size=1000)
+
+            total_users += len(user_ids)
+            total_rows += len(rollups)
+            self.stdout.write(f'Rebuilt {total_users} users ({total_rows} daily rollups)')
+
+        self.stdout.write(self.style.SUCCESS(f'Done: {total_rows} daily rollups for {total_users} users'))
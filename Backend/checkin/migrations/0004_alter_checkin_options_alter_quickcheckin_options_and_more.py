@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checkin', '0003_alter_checkin_user_alter_quickcheckin_user'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='checkin',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AlterModelOptions(
+            name='quickcheckin',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='checkin',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='checkin_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quickcheckin',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='quickcheckin_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:03
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('checkin', '0004_alter_checkin_options_alter_quickcheckin_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyMoodRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('local_date', models.DateField()),
+                ('mood_counts', models.JSONField(default=dict)),
+                ('reason_counts', models.JSONField(default=dict)),
+                ('checkin_count', models.IntegerField(default=0)),
+                ('quick_checkin_count', models.IntegerField(default=0)),
+                ('intensity_sum', models.IntegerField(default=0)),
+                ('intensity_count', models.IntegerField(default=0)),
+                ('first_checkin_at', models.DateTimeField(blank=True, null=True)),
+                ('last_checkin_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mood_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-local_date'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailymoodrollup',
+            constraint=models.UniqueConstraint(fields=('user', 'local_date'), name='unique_user_daily_mood_rollup'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:08
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    # Existing rows were never edited as far as we know; start them at creation
+    for name in ('CheckIn', 'QuickCheckIn'):
+        model = apps.get_model('checkin', name)
+        model.objects.using(schema_editor.connection.alias).update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checkin', '0005_dailymoodrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checkin',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='quickcheckin',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='checkin',
+            index=models.Index(fields=['user', 'updated_at'], name='checkin_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quickcheckin',
+            index=models.Index(fields=['user', 'updated_at'], name='quickcheckin_user_updated_idx'),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:09
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checkin', '0006_checkin_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='checkin',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='quickcheckin',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checkin', '0007_checkin_client_created_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='checkin',
+            index=models.Index(fields=['created_at'], name='checkin_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quickcheckin',
+            index=models.Index(fields=['created_at'], name='quickcheckin_created_idx'),
+        ),
+    ]
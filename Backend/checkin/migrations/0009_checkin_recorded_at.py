@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checkin', '0008_created_at_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checkin',
+            name='recorded_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='quickcheckin',
+            name='recorded_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
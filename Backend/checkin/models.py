@@ -1,28 +1,280 @@
-from django.db import models
+import threading
+from functools import partial
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from django.db import models, transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncDate
 from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from api.conditional import list_changed
+from api.sync import SyncedQuerySet
+
+
+def rollup_timezone():
+    """Timezone that DailyMoodRollup.local_date is bucketed in."""
+    return ZoneInfo(settings.MOOD_ROLLUP_TIME_ZONE)
+
+
+def rollup_date(value):
+    return timezone.localtime(value, rollup_timezone()).date()
+
+
+class RollupMaintainedQuerySet(SyncedQuerySet):
+    def update(self, **kwargs):
+        """
+        Update the rows, then refresh the rollup days they were in and are now
+        in, and the owners' list ETags.
+        """
+        with transaction.atomic(using=self.db):
+            pks = list(self.values_list('pk', flat=True))
+            days = rollup_days(self.model._base_manager.filter(pk__in=pks))
+            rows = super().update(**kwargs)
+            days |= rollup_days(self.model._base_manager.filter(pk__in=pks))
+            for user_id, day in days:
+                DailyMoodRollup.objects.refresh(user_id, day)
+            user_ids = {user_id for user_id, _ in days}
+            transaction.on_commit(partial(list_changed, self.model, user_ids), using=self.db)
+        return rows
+
+    update.queryset_only = True
+
+
+class RollupMaintainedModel(models.Model):
+    """
+    Keeps the owner's DailyMoodRollup in step with every save and delete.
+
+    Saves refresh the rollup here; deletes, including queryset and admin
+    bulk deletes, refresh it from rollup_row_deleted, and queryset update()
+    from RollupMaintainedQuerySet. bulk_create() skips all of these, so its
+    callers refresh the days they touched.
+    """
+    objects = RollupMaintainedQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The day the row was loaded in, which a save may move it out of
+        if {'user_id', 'created_at'} <= set(field_names):
+            instance._loaded_day = instance.rollup_day()
+        return instance
+
+    def rollup_day(self):
+        """The (user_id, local_date) DailyMoodRollup key this row counts towards."""
+        return self.user_id, rollup_date(self.created_at)
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            day = self.rollup_day()
+            DailyMoodRollup.objects.refresh(*day)
+            loaded_day = getattr(self, '_loaded_day', None)
+            if loaded_day not in (None, day):
+                DailyMoodRollup.objects.refresh(*loaded_day)
+            self._loaded_day = day
+
+
+def rollup_days(queryset):
+    """Set of (user_id, local_date) the rows of `queryset` are rolled up into."""
+    days = queryset.annotate(day=TruncDate('created_at', tzinfo=rollup_timezone())).values_list('user_id', 'day')
+    return set(days.order_by().distinct())
+
+
+# The delete (a queryset, or the instance deleted first) whose rollup days
+# have been refreshed so far. Django sends post_delete once every row of a
+# model in that delete is gone, so each day only needs refreshing once.
+_deleting = threading.local()
+
+
+def rollup_row_deleted(sender, instance, origin=None, **kwargs):
+    """post_delete receiver for RollupMaintainedModel subclasses."""
+    origin_model = origin.model if isinstance(origin, models.QuerySet) else type(origin)
+    if origin_model is get_user_model():
+        # Deleting the user deletes its rollups as well
+        return
+    if origin is None or getattr(_deleting, 'origin', None) is not origin:
+        _deleting.origin, _deleting.days = origin, set()
+    day = instance.rollup_day()
+    if day not in _deleting.days:
+        _deleting.days.add(day)
+        DailyMoodRollup.objects.refresh(*day)
 
 
-class CheckIn(models.Model):
+class CheckIn(RollupMaintainedModel):
+    sync_collection = 'checkin'
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='checkins')
     mood = models.CharField(max_length=255)
     reason = models.CharField(max_length=500)
     notes = models.TextField(blank=True, null=True)
     color = models.CharField(max_length=50)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Assigned by the server on insert, never taken from a client, so new rows
+    # always sort ahead of keyset cursors that clients already hold
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    # When an offline client says the entry was recorded; null for entries
+    # created online. Only reported back, never used to order or bucket rows
+    recorded_at = models.DateTimeField(null=True, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # Serves "this user's history, newest first" without a sort step
+            models.Index(fields=['user', '-created_at', '-id'], name='checkin_user_created_idx'),
+            # Serves max(updated_at) for conditional GETs and change tracking
+            models.Index(fields=['user', 'updated_at'], name='checkin_user_updated_idx'),
+            # Serves the admin's date hierarchy and its MIN/MAX across all users
+            models.Index(fields=['created_at'], name='checkin_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.mood} - {self.reason}"
 
 
 
-class QuickCheckIn(models.Model):
+class QuickCheckIn(RollupMaintainedModel):
     MOOD_MAX = 16
+    sync_collection = 'quick_checkin'
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='quick_checkins')
     mood = models.CharField(max_length=MOOD_MAX)   # store emoji or short label
     intensity = models.IntegerField(null=True, blank=True)
     note = models.CharField(max_length=500, blank=True)
     type = models.CharField(max_length=20, default="full")  # "full" or "quick"
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Assigned by the server on insert, never taken from a client, so new rows
+    # always sort ahead of keyset cursors that clients already hold
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    # When an offline client says the entry was recorded; null for entries
+    # created online. Only reported back, never used to order or bucket rows
+    recorded_at = models.DateTimeField(null=True, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='quickcheckin_user_created_idx'),
+            models.Index(fields=['user', 'updated_at'], name='quickcheckin_user_updated_idx'),
+            models.Index(fields=['created_at'], name='quickcheckin_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.mood} ({self.created_at})"
+
+
+class DailyMoodRollupManager(models.Manager):
+    def build(self, checkins, quick_checkins):
+        """
+        Aggregate the given CheckIn and QuickCheckIn querysets into unsaved
+        DailyMoodRollup instances, one per (user, local_date).
+        """
+        tz = rollup_timezone()
+        rollups = {}
+
+        def rollup_for(row):
+            key = (row['user_id'], row['day'])
+            if key not in rollups:
+                rollups[key] = self.model(user_id=key[0], local_date=key[1], mood_counts={}, reason_counts={})
+            return rollups[key]
+
+        checkin_rows = (
+            checkins.annotate(day=TruncDate('created_at', tzinfo=tz))
+            .values('user_id', 'day', 'mood', 'reason')
+            .annotate(count=Count('id'), first=Min('created_at'), last=Max('created_at'))
+            .order_by()
+        )
+        for row in checkin_rows:
+            rollup = rollup_for(row)
+            rollup.add(row['mood'], row['count'], row['first'], row['last'])
+            rollup.checkin_count += row['count']
+            rollup.reason_counts[row['reason']] = rollup.reason_counts.get(row['reason'], 0) + row['count']
+
+        quick_rows = (
+            quick_checkins.annotate(day=TruncDate('created_at', tzinfo=tz))
+            .values('user_id', 'day', 'mood')
+            .annotate(
+                count=Count('id'),
+                intensity_sum=Sum('intensity'),
+                intensity_count=Count('intensity'),
+                first=Min('created_at'),
+                last=Max('created_at'),
+            )
+            .order_by()
+        )
+        for row in quick_rows:
+            rollup = rollup_for(row)
+            rollup.add(row['mood'], row['count'], row['first'], row['last'])
+            rollup.quick_checkin_count += row['count']
+            rollup.intensity_sum += row['intensity_sum'] or 0
+            rollup.intensity_count += row['intensity_count']
+
+        return list(rollups.values())
+
+    def refresh(self, user_id, day):
+        """
+        Recompute one user's rollup row for one local date from the source rows.
+
+        The row is locked first, so concurrent writers for the same user and
+        day serialize here and the last one to commit sees every check-in.
+        """
+        tz = rollup_timezone()
+        start = datetime.combine(day, time.min, tzinfo=tz)
+        end = datetime.combine(day + timedelta(days=1), time.min, tzinfo=tz)
+
+        self.get_or_create(user_id=user_id, local_date=day)
+        rollup = self.select_for_update().get(user_id=user_id, local_date=day)
+        built = self.build(
+            CheckIn.objects.filter(user_id=user_id, created_at__gte=start, created_at__lt=end),
+            QuickCheckIn.objects.filter(user_id=user_id, created_at__gte=start, created_at__lt=end),
+        )
+        if not built:
+            rollup.delete()
+            return None
+
+        fresh = built[0]
+        fresh.pk = rollup.pk
+        fresh.save()
+        return fresh
+
+
+class DailyMoodRollup(models.Model):
+    """
+    Per-user, per-local-day summary of CheckIn and QuickCheckIn rows.
+
+    Maintained by RollupMaintainedModel on every write and rebuilt in bulk by
+    the rebuild_mood_rollups command. local_date is bucketed in
+    MOOD_ROLLUP_TIME_ZONE, so changing that setting requires a rebuild.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='mood_rollups')
+    local_date = models.DateField()
+    mood_counts = models.JSONField(default=dict)
+    reason_counts = models.JSONField(default=dict)
+    checkin_count = models.IntegerField(default=0)
+    quick_checkin_count = models.IntegerField(default=0)
+    intensity_sum = models.IntegerField(default=0)
+    intensity_count = models.IntegerField(default=0)
+    first_checkin_at = models.DateTimeField(null=True, blank=True)
+    last_checkin_at = models.DateTimeField(null=True, blank=True)
+
+    objects = DailyMoodRollupManager()
+
+    class Meta:
+        ordering = ['-local_date']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'local_date'], name='unique_user_daily_mood_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.local_date}"
+
+    def add(self, mood, count, first, last):
+        self.mood_counts[mood] = self.mood_counts.get(mood, 0) + count
+        if self.first_checkin_at is None or first < self.first_checkin_at:
+            self.first_checkin_at = first
+        if self.last_checkin_at is None or last > self.last_checkin_at:
+            self.last_checkin_at = last
@@ -1,24 +1,78 @@
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
+from api.fast import FastListSerializer
 from .models import CheckIn, QuickCheckIn
 
+DATETIME_FORMAT = "%Y %b %d, %I:%M %p"
+
+# Tolerated clock skew for client-supplied timestamps
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+
+
+class ClientTimestampMixin:
+    """Lets offline clients send when an entry was actually recorded."""
+
+    def validate_recorded_at(self, value):
+        if value > timezone.now() + MAX_CLOCK_SKEW:
+            raise serializers.ValidationError('Timestamp cannot be in the future.')
+        return value
+
 class CheckInSerializer(serializers.ModelSerializer):
     created_at = serializers.DateTimeField(
-        format="%Y %b %d, %I:%M %p",
+        format=DATETIME_FORMAT,
+        read_only=True
+    )
+    updated_at = serializers.DateTimeField(
+        format=DATETIME_FORMAT,
+        read_only=True
+    )
+    recorded_at = serializers.DateTimeField(
+        format=DATETIME_FORMAT,
         read_only=True
     )
 
     class Meta:
         model = CheckIn
         fields = "__all__"
-        read_only_fields = ['user', 'created_at']
+        read_only_fields = ['user', 'created_at', 'updated_at']
 
 class QuickCheckInSerializer(serializers.ModelSerializer):
     created_at = serializers.DateTimeField(
-        format="%Y %b %d, %I:%M %p",
+        format=DATETIME_FORMAT,
+        read_only=True
+    )
+    recorded_at = serializers.DateTimeField(
+        format=DATETIME_FORMAT,
         read_only=True
     )
     
     class Meta:
         model = QuickCheckIn
-        fields = ['id', 'user', 'mood', 'intensity', 'note', 'type', 'created_at']
-        read_only_fields = ['id', 'user', 'created_at']
\ No newline at end of file
+        fields = ['id', 'user', 'mood', 'intensity', 'note', 'type', 'created_at', 'recorded_at']
+        read_only_fields = ['id', 'user', 'created_at', 'recorded_at']
+
+
+class CheckInBatchItemSerializer(ClientTimestampMixin, CheckInSerializer):
+    recorded_at = serializers.DateTimeField(required=False)
+
+
+class QuickCheckInBatchItemSerializer(ClientTimestampMixin, QuickCheckInSerializer):
+    recorded_at = serializers.DateTimeField(required=False)
+
+
+class CheckInListSerializer(FastListSerializer):
+    """Fast GET-list path with the same output as CheckInSerializer."""
+    fields = ['id', 'created_at', 'updated_at', 'recorded_at', 'mood', 'reason', 'notes', 'color', 'user']
+    sources = {'user': 'user_id'}
+    datetime_fields = ['created_at', 'updated_at', 'recorded_at']
+    datetime_format = DATETIME_FORMAT
+
+
+class QuickCheckInListSerializer(FastListSerializer):
+    """Fast GET-list path with the same output as QuickCheckInSerializer."""
+    fields = ['id', 'user', 'mood', 'intensity', 'note', 'type', 'created_at', 'recorded_at']
+    sources = {'user': 'user_id'}
+    datetime_fields = ['created_at', 'recorded_at']
+    datetime_format = DATETIME_FORMAT
@@ -0,0 +1,170 @@
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import Avg, Count, DateField
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import CheckIn, DailyMoodRollup, QuickCheckIn
+
+MOOD_MODELS = (CheckIn, QuickCheckIn)
+
+
+def local_midnight(day, tz):
+    return datetime.combine(day, time.min, tzinfo=tz)
+
+
+def period_mood_counts(user, trunc, since, tz):
+    """
+    Mood counts per period for both check-in kinds, grouped in the database.
+
+    Returns a list of {'period', 'moods', 'total'} dicts, oldest first.
+    """
+    buckets = defaultdict(Counter)
+    for model in MOOD_MODELS:
+        rows = (
+            model.objects.filter(user=user, created_at__gte=since)
+            .annotate(period=trunc('created_at', tzinfo=tz, output_field=DateField()))
+            .values('period', 'mood')
+            .annotate(count=Count('id'))
+            .order_by()
+        )
+        for row in rows:
+            buckets[row['period']][row['mood']] += row['count']
+
+    return [
+        {'period': period, 'moods': dict(moods), 'total': sum(moods.values())}
+        for period, moods in sorted(buckets.items())
+    ]
+
+
+def checkin_dates(user, tz):
+    """Distinct local dates on which the user checked in at all."""
+    dates = set()
+    for model in MOOD_MODELS:
+        dates.update(
+            model.objects.filter(user=user)
+            .annotate(day=TruncDate('created_at', tzinfo=tz))
+            .values_list('day', flat=True)
+            .distinct()
+            .order_by()
+        )
+    return dates
+
+
+def compute_streaks(dates, today):
+    """
+    Current and longest runs of consecutive check-in days.
+
+    The current streak is still alive if the last check-in was yesterday, so
+    it does not drop to zero first thing in the morning.
+    """
+    if not dates:
+        return {'current': 0, 'longest': 0}
+
+    longest = run = 0
+    previous = None
+    for day in sorted(dates):
+        run = run + 1 if previous is not None and day - previous == timedelta(days=1) else 1
+        longest = max(longest, run)
+        previous = day
+
+    current = 0
+    day = today if today in dates else today - timedelta(days=1)
+    while day in dates:
+        current += 1
+        day -= timedelta(days=1)
+
+    return {'current': current, 'longest': longest}
+
+
+def stat_windows(today, days, weeks, months):
+    """First local date of the daily, weekly and monthly windows ending today."""
+    day_start = today - timedelta(days=days - 1)
+    week_start = today - timedelta(days=today.weekday(), weeks=weeks - 1)
+    month_start = today.replace(day=1)
+    for _ in range(months - 1):
+        month_start = (month_start - timedelta(days=1)).replace(day=1)
+    return day_start, week_start, month_start
+
+
+def mood_stats(user, tz, days=30, weeks=12, months=12, top_reasons=5):
+    """
+    Mood statistics for one user, bucketed in `tz`.
+
+    Reads the DailyMoodRollup table when `tz` is the timezone it is kept in,
+    and falls back to aggregating the raw check-ins for any other timezone.
+    """
+    today = timezone.now().astimezone(tz).date()
+    windows = stat_windows(today, days, weeks, months)
+    if str(tz) == settings.MOOD_ROLLUP_TIME_ZONE:
+        stats = rollup_mood_stats(user, windows, top_reasons)
+    else:
+        stats = live_mood_stats(user, tz, windows, top_reasons)
+    stats['streaks'] = compute_streaks(stats.pop('dates'), today)
+    return {'timezone': str(tz), 'today': today, **stats}
+
+
+def live_mood_stats(user, tz, windows, top_reasons):
+    day_start, week_start, month_start = windows
+    window_start = local_midnight(min(windows), tz)
+
+    intensity = QuickCheckIn.objects.filter(
+        user=user, created_at__gte=local_midnight(day_start, tz), intensity__isnull=False
+    ).aggregate(average=Avg('intensity'))['average']
+
+    reasons = (
+        CheckIn.objects.filter(user=user, created_at__gte=window_start)
+        .values('reason')
+        .annotate(count=Count('id'))
+        .order_by('-count', 'reason')[:top_reasons]
+    )
+
+    return {
+        'daily': period_mood_counts(user, TruncDate, local_midnight(day_start, tz), tz),
+        'weekly': period_mood_counts(user, TruncWeek, local_midnight(week_start, tz), tz),
+        'monthly': period_mood_counts(user, TruncMonth, local_midnight(month_start, tz), tz),
+        'average_intensity': round(intensity, 2) if intensity is not None else None,
+        'top_reasons': list(reasons),
+        'dates': checkin_dates(user, tz),
+    }
+
+
+def rollup_mood_stats(user, windows, top_reasons):
+    """Same result as live_mood_stats, from at most one rollup row per day."""
+    day_start, week_start, month_start = windows
+    rows = DailyMoodRollup.objects.filter(user=user, local_date__gte=min(windows)).values(
+        'local_date', 'mood_counts', 'reason_counts', 'intensity_sum', 'intensity_count'
+    )
+
+    daily, weekly, monthly = defaultdict(Counter), defaultdict(Counter), defaultdict(Counter)
+    reasons = Counter()
+    intensity_sum = intensity_count = 0
+    for row in rows:
+        day = row['local_date']
+        if day >= day_start:
+            daily[day].update(row['mood_counts'])
+            intensity_sum += row['intensity_sum']
+            intensity_count += row['intensity_count']
+        if day >= week_start:
+            weekly[day - timedelta(days=day.weekday())].update(row['mood_counts'])
+        if day >= month_start:
+            monthly[day.replace(day=1)].update(row['mood_counts'])
+        reasons.update(row['reason_counts'])
+
+    def as_periods(buckets):
+        return [
+            {'period': period, 'moods': dict(moods), 'total': sum(moods.values())}
+            for period, moods in sorted(buckets.items())
+        ]
+
+    top = sorted(reasons.items(), key=lambda item: (-item[1], item[0]))[:top_reasons]
+    return {
+        'daily': as_periods(daily),
+        'weekly': as_periods(weekly),
+        'monthly': as_periods(monthly),
+        'average_intensity': round(intensity_sum / intensity_count, 2) if intensity_count else None,
+        'top_reasons': [{'reason': reason, 'count': count} for reason, count in top],
+        'dates': set(DailyMoodRollup.objects.filter(user=user).values_list('local_date', flat=True)),
+    }
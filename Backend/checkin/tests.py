@@ -1,3 +1,446 @@
-from django.test import TestCase
+from datetime import datetime, timedelta
+from unittest import mock
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DatabaseError, connection
+from django.db.models import Q
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.throttling import UserRateThrottle
+
+from authentication.tokens import VersionedRefreshToken
+
+from . import async_views, views
+from .models import CheckIn, DailyMoodRollup, QuickCheckIn, rollup_timezone
+from .serializers import CheckInListSerializer, CheckInSerializer, QuickCheckInListSerializer, QuickCheckInSerializer
+from .stats import live_mood_stats, rollup_mood_stats, stat_windows
+
+User = get_user_model()
+
+
+class DailyMoodRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='rollup', email='rollup@example.com')
+        self.monday = datetime(2024, 3, 4, 9, tzinfo=rollup_timezone())
+        self.tuesday = datetime(2024, 3, 5, 9, tzinfo=rollup_timezone())
+        for mood in ('happy', 'happy', 'sad'):
+            CheckIn.objects.create(user=self.user, mood=mood, reason='work', color='blue', created_at=self.monday)
+        QuickCheckIn.objects.create(user=self.user, mood='calm', intensity=3, created_at=self.monday)
+
+    def rollup(self, when):
+        return DailyMoodRollup.objects.filter(user=self.user, local_date=when.date()).first()
+
+    def test_save_maintains_rollup(self):
+        rollup = self.rollup(self.monday)
+        self.assertEqual(rollup.checkin_count, 3)
+        self.assertEqual(rollup.quick_checkin_count, 1)
+        self.assertEqual(rollup.mood_counts, {'happy': 2, 'sad': 1, 'calm': 1})
+        self.assertEqual(rollup.intensity_sum, 3)
+
+    def test_save_moving_day_refreshes_old_and_new_days(self):
+        checkin = CheckIn.objects.filter(mood='sad').get()
+        checkin.created_at = self.tuesday
+        checkin.save()
+        self.assertEqual(self.rollup(self.monday).mood_counts, {'happy': 2, 'calm': 1})
+        self.assertEqual(self.rollup(self.tuesday).mood_counts, {'sad': 1})
+
+        # The instance now remembers Tuesday as its day
+        checkin.created_at = self.monday
+        checkin.save()
+        self.assertEqual(self.rollup(self.monday).mood_counts, {'happy': 2, 'sad': 1, 'calm': 1})
+        self.assertIsNone(self.rollup(self.tuesday))
+
+    def test_instance_delete_refreshes_rollup(self):
+        CheckIn.objects.filter(mood='sad').get().delete()
+        self.assertEqual(self.rollup(self.monday).mood_counts, {'happy': 2, 'calm': 1})
+
+    def test_queryset_delete_refreshes_rollup(self):
+        CheckIn.objects.filter(user=self.user).delete()
+        rollup = self.rollup(self.monday)
+        self.assertEqual(rollup.checkin_count, 0)
+        self.assertEqual(rollup.mood_counts, {'calm': 1})
+
+        QuickCheckIn.objects.filter(user=self.user).delete()
+        self.assertIsNone(self.rollup(self.monday))
+
+    def test_queryset_update_refreshes_old_and_new_days(self):
+        CheckIn.objects.filter(mood='happy').update(mood='tired', created_at=self.tuesday)
+        self.assertEqual(self.rollup(self.monday).mood_counts, {'sad': 1, 'calm': 1})
+        self.assertEqual(self.rollup(self.tuesday).mood_counts, {'tired': 2})
+
+    def test_user_delete_removes_rollups(self):
+        self.user.delete()
+        self.assertFalse(DailyMoodRollup.objects.exists())
+
+    def test_rollup_date_uses_rollup_time_zone(self):
+        late = timezone.localtime(self.monday, rollup_timezone()).replace(hour=23, minute=59)
+        CheckIn.objects.create(user=self.user, mood='sad', reason='work', color='blue', created_at=late)
+        self.assertEqual(self.rollup(self.monday).checkin_count, 4)
+
+
+class HistoryQueryPlanTests(TestCase):
+    """The per-user check-in lists use the (user, created_at, id) indexes without a sort step."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Enough rows per user that the planner prefers the index to a scan and sort
+        User.objects.bulk_create([User(username=f'explain-{i}', email=f'explain-{i}@example.com') for i in range(100)])
+        cls.users = list(User.objects.filter(username__startswith='explain-'))
+        now = timezone.now()
+        CheckIn.objects.bulk_create([
+            CheckIn(user=cls.users[i % 100], mood='calm', reason='work', color='blue', created_at=now - timedelta(minutes=i))
+            for i in range(25_000)
+        ], batch_size=1000)
+        QuickCheckIn.objects.bulk_create([
+            QuickCheckIn(user=cls.users[i % 100], mood='calm', intensity=3, created_at=now - timedelta(minutes=i))
+            for i in range(25_000)
+        ], batch_size=1000)
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'ANALYZE {CheckIn._meta.db_table}')
+                cursor.execute(f'ANALYZE {QuickCheckIn._meta.db_table}')
+            elif connection.vendor == 'sqlite':
+                cursor.execute('ANALYZE')
+
+    def assertIndexScan(self, queryset):
+        plan = queryset.explain()
+        if connection.vendor == 'postgresql':
+            self.assertNotIn('Sort', plan)
+            self.assertNotIn('Seq Scan', plan)
+            self.assertIn('Index', plan)
+        elif connection.vendor == 'sqlite':
+            self.assertNotIn('TEMP B-TREE', plan)
+            self.assertIn('_user_created_idx', plan)
+
+    def test_history_lists_use_index(self):
+        user = self.users[50]
+        checkins = CheckIn.objects.filter(user=user).order_by('-created_at', '-id')
+        anchor = checkins[100]
+        queries = {
+            'checkin list': checkins[:20],
+            'checkin keyset page': checkins.filter(
+                Q(created_at__lt=anchor.created_at) | Q(created_at=anchor.created_at, id__lt=anchor.id)
+            )[:20],
+            'quick checkin list': QuickCheckIn.objects.filter(user=user).order_by('-created_at', '-id')[:20],
+        }
+        for label, queryset in queries.items():
+            with self.subTest(query=label):
+                self.assertIndexScan(queryset)
+
+
+class MoodStatsTests(TestCase):
+    url = '/api/checkin/stats/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='stats', email='stats@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # Half an hour before midnight UTC is the next morning in Tokyo
+        self.late = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(minutes=30)
+
+    def test_buckets_days_in_requested_timezone(self):
+        CheckIn.objects.create(user=self.user, mood='happy', reason='work', color='blue', created_at=self.late)
+        QuickCheckIn.objects.create(user=self.user, mood='calm', intensity=4, created_at=self.late)
+        for tz in ('UTC', 'Asia/Tokyo'):
+            with self.subTest(tz=tz):
+                body = self.client.get(self.url, {'tz': tz}).json()
+                day = self.late.astimezone(ZoneInfo(tz)).date().isoformat()
+                self.assertEqual(body['timezone'], tz)
+                self.assertEqual(body['daily'], [{'period': day, 'moods': {'happy': 1, 'calm': 1}, 'total': 2}])
+                self.assertEqual(body['average_intensity'], 4)
+
+    def test_rollups_match_live_aggregation(self):
+        for i in range(40):
+            created_at = self.late - timedelta(days=i, hours=i % 7)
+            CheckIn.objects.create(user=self.user, mood=('happy', 'sad')[i % 2], reason=f'r{i % 3}', color='blue', created_at=created_at)
+            QuickCheckIn.objects.create(user=self.user, mood='calm', intensity=i % 10, created_at=created_at)
+        tz = rollup_timezone()
+        windows = stat_windows(timezone.now().astimezone(tz).date(), 30, 12, 12)
+        self.assertEqual(rollup_mood_stats(self.user, windows, 5), live_mood_stats(self.user, tz, windows, 5))
+
+    def test_rejects_unknown_timezone(self):
+        for name in ('Mars/Olympus', '../../etc/passwd'):
+            with self.subTest(tz=name):
+                response = self.client.get(self.url, {'tz': name})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {'tz': f'Unknown timezone "{name}".'})
+
+    def test_rejects_windows_out_of_range(self):
+        for params in ({'days': '0'}, {'weeks': '105'}, {'months': 'all'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
+
+    def test_empty_history(self):
+        body = self.client.get(self.url, {'tz': 'Europe/Berlin'}).json()
+        self.assertEqual([body['daily'], body['weekly'], body['monthly'], body['top_reasons']], [[], [], [], []])
+        self.assertIsNone(body['average_intensity'])
+        self.assertEqual(body['streaks'], {'current': 0, 'longest': 0})
+
+    def test_history_older_than_windows(self):
+        CheckIn.objects.create(user=self.user, mood='sad', reason='work', color='blue', created_at=self.late - timedelta(days=800))
+        for tz in ('UTC', 'Asia/Tokyo'):
+            with self.subTest(tz=tz):
+                body = self.client.get(self.url, {'tz': tz, 'days': '1', 'weeks': '1', 'months': '1'}).json()
+                self.assertEqual([body['daily'], body['weekly'], body['monthly'], body['top_reasons']], [[], [], [], []])
+                self.assertEqual(body['streaks'], {'current': 0, 'longest': 1})
+
+
+class BatchCreateTests(TestCase):
+    url = '/api/checkin/batch/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='batch', email='batch@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recorded = timezone.now() - timedelta(days=3)
+
+    def item(self, **fields):
+        return {'mood': 'calm', 'reason': 'work', 'color': 'blue', **fields}
+
+    def rollup_count(self, when):
+        rollup = DailyMoodRollup.objects.filter(user=self.user, local_date=timezone.localtime(when, rollup_timezone()).date()).first()
+        return rollup.checkin_count if rollup else 0
+
+    def test_creates_every_item(self):
+        response = self.client.post(self.url, [self.item(), self.item(mood='sad')], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([result['status'] for result in response.json()], ['created', 'created'])
+        self.assertEqual(CheckIn.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(self.rollup_count(timezone.now()), 2)
+
+    def test_partial_failure_creates_valid_items(self):
+        response = self.client.post(self.url, [self.item(), {'mood': 'sad'}, self.item(mood='ok')], format='json')
+        self.assertEqual(response.status_code, 207)
+        results = response.json()
+        self.assertEqual([(result['index'], result['status']) for result in results], [(0, 'created'), (1, 'invalid'), (2, 'created')])
+        self.assertIn('reason', results[1]['errors'])
+        self.assertEqual(sorted(CheckIn.objects.values_list('mood', flat=True)), ['calm', 'ok'])
+
+    def test_nothing_valid_creates_nothing(self):
+        response = self.client.post(self.url, [{'mood': 'sad'}, {}], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(CheckIn.objects.exists())
+
+    def test_failure_while_inserting_rolls_back_every_item(self):
+        with mock.patch('checkin.views.DailyMoodRollup.objects.refresh', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.client.post(self.url, [self.item(), self.item(mood='sad')], format='json')
+        self.assertFalse(CheckIn.objects.exists())
+
+    def test_rejects_malformed_batches(self):
+        self.assertEqual(self.client.post(self.url, self.item(), format='json').status_code, 400)
+        self.assertEqual(self.client.post(self.url, [], format='json').status_code, 400)
+        with override_settings(CHECKIN_BATCH_MAX_ITEMS=2):
+            self.assertEqual(self.client.post(self.url, [self.item()] * 3, format='json').status_code, 400)
+        self.assertFalse(CheckIn.objects.exists())
+
+    def test_client_time_is_recorded_but_does_not_position_rows(self):
+        response = self.client.post('/api/checkin/quick/batch/', [
+            {'mood': 'calm', 'recorded_at': self.recorded.isoformat(), 'created_at': self.recorded.isoformat()},
+        ], format='json')
+        self.assertEqual(response.status_code, 201)
+        quick = QuickCheckIn.objects.get()
+        self.assertEqual(quick.recorded_at, self.recorded)
+        self.assertGreater(quick.created_at, timezone.now() - timedelta(minutes=1))
+
+    def test_uploaded_rows_land_ahead_of_existing_cursors(self):
+        for _ in range(3):
+            CheckIn.objects.create(user=self.user, mood='calm', reason='work', color='blue')
+        first = self.client.get('/api/checkin/', {'limit': 2}).json()
+        self.client.post(self.url, [self.item(mood='late', recorded_at=self.recorded.isoformat())], format='json')
+        rest = self.client.get('/api/checkin/', {'limit': 2, 'cursor': first['next_cursor']}).json()
+        self.assertNotIn('late', [row['mood'] for row in rest['results']])
+        self.assertEqual(self.client.get('/api/checkin/', {'limit': 1}).json()['results'][0]['mood'], 'late')
+
+    def test_rejects_future_timestamps(self):
+        future = timezone.now() + timedelta(hours=1)
+        response = self.client.post(self.url, [self.item(recorded_at=future.isoformat())], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('recorded_at', response.json()[0]['errors'])
+
+
+class FastListSerializerParityTests(TestCase):
+    """The .values() list serializers render byte for byte what the ModelSerializers render."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='fast-lists', email='fast-lists@example.com')
+        now = timezone.now()
+        # Seven minutes apart covers both halves of the day and every minute digit
+        CheckIn.objects.bulk_create([
+            CheckIn(
+                user=cls.user, mood='calm', reason=f'reason {i % 13}', notes=None if i % 5 == 0 else f'note {i}',
+                color='#aabbcc', created_at=now - timedelta(minutes=7 * i),
+                recorded_at=now - timedelta(minutes=7 * i + 30) if i % 3 == 0 else None,
+            )
+            for i in range(500)
+        ])
+        QuickCheckIn.objects.bulk_create([
+            QuickCheckIn(
+                user=cls.user, mood='ok', intensity=None if i % 7 == 0 else i % 10, note=f'quick {i}',
+                type='quick', created_at=now - timedelta(minutes=7 * i),
+                recorded_at=now - timedelta(minutes=7 * i + 30) if i % 3 == 0 else None,
+            )
+            for i in range(500)
+        ])
+
+    def test_output_is_identical(self):
+        renderer = JSONRenderer()
+        cases = [
+            (CheckIn, CheckInSerializer, CheckInListSerializer),
+            (QuickCheckIn, QuickCheckInSerializer, QuickCheckInListSerializer),
+        ]
+        for tz in ('UTC', 'Asia/Kolkata'):
+            for model, serializer_class, fast_class in cases:
+                with self.subTest(model=model.__name__, tz=tz), timezone.override(tz):
+                    queryset = model.objects.filter(user=self.user).order_by('-created_at', '-id')
+                    fast = fast_class()
+                    rows = queryset.values(*fast.lookups())
+                    self.assertEqual(
+                        renderer.render([fast.to_representation(row) for row in rows]),
+                        renderer.render(serializer_class(queryset, many=True).data),
+                    )
+
+
+class TwoPerMinuteThrottle(UserRateThrottle):
+    rate = '2/min'
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'checkin-async'},
+    'auth': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'checkin-async-auth'},
+})
+class AsyncViewTests(TestCase):
+    """The ASYNC_API views answer exactly as the sync views they replace."""
+
+    def setUp(self):
+        for alias in ('default', 'auth'):
+            caches[alias].clear()
+        self.user = User.objects.create_user(username='async', email='async@example.com')
+        self.checkin = CheckIn.objects.create(user=self.user, mood='happy', reason='work', color='blue')
+        QuickCheckIn.objects.create(user=self.user, mood='calm', intensity=3)
+        self.auth = f'Bearer {VersionedRefreshToken.for_user(self.user).access_token}'
+        self.factory = APIRequestFactory()
+
+    def call(self, view_class, method='get', path='/api/checkins/', data=None, auth=True, **kwargs):
+        headers = {'HTTP_AUTHORIZATION': self.auth} if auth else {}
+        request = getattr(self.factory, method)(path, data, format='json', **headers)
+        view = view_class.as_view()
+        response = async_to_sync(view)(request, **kwargs) if view_class.view_is_async else view(request, **kwargs)
+        response.render()
+        return response
+
+    def assertSameResponse(self, sync_view, async_view, **kwargs):
+        expected = self.call(sync_view, **kwargs)
+        actual = self.call(async_view, **kwargs)
+        self.assertEqual(actual.status_code, expected.status_code)
+        self.assertEqual(actual.content, expected.content)
+        self.assertEqual(actual['Content-Type'], expected['Content-Type'])
+        return actual
+
+    def test_list_and_detail_match_sync_views(self):
+        self.assertSameResponse(views.CheckInListCreateView, async_views.CheckInListCreateView)
+        self.assertSameResponse(views.QuickCheckInListCreateView, async_views.QuickCheckInListCreateView)
+        self.assertSameResponse(
+            views.CheckInRetrieveUpdateDestroyView, async_views.CheckInRetrieveUpdateDestroyView, id=self.checkin.id
+        )
+
+    def test_errors_match_sync_views(self):
+        detail = (views.CheckInRetrieveUpdateDestroyView, async_views.CheckInRetrieveUpdateDestroyView)
+        self.assertSameResponse(*detail, id=self.checkin.id + 100)
+        self.assertSameResponse(*detail, method='patch', data={'mood': ''}, id=self.checkin.id)
+        response = self.assertSameResponse(views.CheckInListCreateView, async_views.CheckInListCreateView, auth=False)
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('WWW-Authenticate', response)
+
+    def test_revoked_token_is_rejected(self):
+        self.user.token_version += 1
+        self.user.save()
+        response = self.call(async_views.CheckInListCreateView)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['code'], 'token_revoked')
+
+    def test_create_and_delete(self):
+        response = self.call(async_views.CheckInListCreateView, method='post', data={
+            'mood': 'sad', 'reason': 'family', 'color': 'grey',
+        })
+        self.assertEqual(response.status_code, 201)
+        created = CheckIn.objects.get(id=response.data['id'])
+        self.assertEqual(created.user, self.user)
+        response = self.call(async_views.CheckInRetrieveUpdateDestroyView, method='delete', id=created.id)
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(CheckIn.objects.filter(id=created.id).exists())
+
+    def test_view_throttles_apply(self):
+        view = type('ThrottledView', (async_views.CheckInListCreateView,), {'throttle_classes': [TwoPerMinuteThrottle]})
+        for _ in range(2):
+            self.assertEqual(self.call(view).status_code, 200)
+        response = self.call(view)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+
+# The manifest storage needs collectstatic to have run first
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class AdminChangelistQueryBudgetTests(TestCase):
+    """The check-in changelists stay within changelist_query_budget however many rows there are."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = User.objects.create_superuser(
+            username='admin-queries', email='admin-queries@example.com', password='admin-queries'
+        )
+        users = User.objects.bulk_create(
+            [User(username=f'admin-queries-{i}', email=f'admin-queries-{i}@example.com') for i in range(20)]
+        )
+        # Spread over two years so every level of the date hierarchy has choices.
+        # bulk_create skips save(), so no mood rollups are built.
+        now = timezone.now()
+        CheckIn.objects.bulk_create([
+            CheckIn(
+                user=users[i % 20], mood=('happy', 'sad', 'calm')[i % 3], reason=f'reason {i % 13}',
+                notes=f'note {i}', color='blue', created_at=now - timedelta(hours=17 * i),
+            )
+            for i in range(1000)
+        ])
+        QuickCheckIn.objects.bulk_create([
+            QuickCheckIn(
+                user=users[i % 20], mood='calm', intensity=i % 10, note=f'quick {i}',
+                type=('quick', 'full')[i % 2], created_at=now - timedelta(hours=17 * i),
+            )
+            for i in range(1000)
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.superuser)
+
+    def assertWithinBudget(self, model, pages):
+        url = reverse(f'admin:checkin_{model._meta.model_name}_changelist')
+        local = timezone.localtime()
+        pages = [
+            {}, {'p': 1}, {'q': 'admin-queries-1'}, *pages,
+            {'created_at__year': local.year},
+            {'created_at__year': local.year, 'created_at__month': local.month},
+            {'created_at__year': local.year, 'created_at__month': local.month, 'created_at__day': local.day},
+        ]
+        for params in pages:
+            with self.subTest(params=params):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 200)
+                self.assertLessEqual(len(queries), admin.site._registry[model].changelist_query_budget)
+
+    def test_checkin_changelist(self):
+        self.assertWithinBudget(CheckIn, [{'mood__exact': 'sad'}])
+
+    def test_quick_checkin_changelist(self):
+        self.assertWithinBudget(QuickCheckIn, [{'type__exact': 'quick'}, {'intensity__exact': 3}])
@@ -1,9 +1,19 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# With ASYNC_API (ASGI deployments, see project/asgi.py) the list and detail
+# endpoints are served by async views with the same URLs and responses
+entry_views = async_views if settings.ASYNC_API else views
 
 urlpatterns = [
-    path('', views.CheckInListCreateView.as_view(), name='checkin-list-create'),
-    path('<int:id>/', views.CheckInRetrieveUpdateDestroyView.as_view(), name='checkin-detail'),
-    path('quick/', views.QuickCheckInListCreateView.as_view(), name='quick-checkin-list-create'),
-    path('quick/<int:id>/', views.QuickCheckInRetrieveUpdateDestroyView.as_view(), name='quick-checkin-detail'),
+    path('', entry_views.CheckInListCreateView.as_view(), name='checkin-list-create'),
+    path('<int:id>/', entry_views.CheckInRetrieveUpdateDestroyView.as_view(), name='checkin-detail'),
+    path('batch/', views.CheckInBatchCreateView.as_view(), name='checkin-batch-create'),
+    path('sync/', views.CheckInSyncView.as_view(), name='checkin-sync'),
+    path('stats/', views.MoodStatsView.as_view(), name='checkin-stats'),
+    path('quick/', entry_views.QuickCheckInListCreateView.as_view(), name='quick-checkin-list-create'),
+    path('quick/batch/', views.QuickCheckInBatchCreateView.as_view(), name='quick-checkin-batch-create'),
+    path('quick/sync/', views.QuickCheckInSyncView.as_view(), name='quick-checkin-sync'),
+    path('quick/<int:id>/', entry_views.QuickCheckInRetrieveUpdateDestroyView.as_view(), name='quick-checkin-detail'),
 ]
\ No newline at end of file
@@ -1,21 +1,43 @@
-from rest_framework import generics
+from functools import partial
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
-from .models import CheckIn, QuickCheckIn
-from .serializers import CheckInSerializer, QuickCheckInSerializer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from api.conditional import ConditionalGetMixin, list_changed
+from api.fast import FastListMixin
+from api.pagination import KeysetPagination
+from api.sync import SyncView
+from .models import CheckIn, DailyMoodRollup, QuickCheckIn, rollup_date
+from .serializers import (
+    CheckInSerializer,
+    QuickCheckInSerializer,
+    CheckInListSerializer,
+    QuickCheckInListSerializer,
+    CheckInBatchItemSerializer,
+    QuickCheckInBatchItemSerializer,
+)
+from .stats import mood_stats
 
 
-class CheckInListCreateView(generics.ListCreateAPIView):
+class CheckInListCreateView(ConditionalGetMixin, FastListMixin, generics.ListCreateAPIView):
     serializer_class = CheckInSerializer
+    fast_serializer_class = CheckInListSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
-        return CheckIn.objects.filter(user=self.request.user).order_by('-id')
+        return CheckIn.objects.filter(user=self.request.user).order_by('-created_at', '-id')
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
-class CheckInRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class CheckInRetrieveUpdateDestroyView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = CheckInSerializer
     lookup_field = "id"
     permission_classes = [IsAuthenticated]
@@ -24,21 +46,137 @@ class CheckInRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
         return CheckIn.objects.filter(user=self.request.user)
 
 
-class QuickCheckInListCreateView(generics.ListCreateAPIView):
+class QuickCheckInListCreateView(ConditionalGetMixin, FastListMixin, generics.ListCreateAPIView):
     serializer_class = QuickCheckInSerializer
+    fast_serializer_class = QuickCheckInListSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
-        return QuickCheckIn.objects.filter(user=self.request.user).order_by('-created_at')
+        return QuickCheckIn.objects.filter(user=self.request.user).order_by('-created_at', '-id')
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
-class QuickCheckInRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class QuickCheckInRetrieveUpdateDestroyView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = QuickCheckInSerializer
     lookup_field = "id"
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
         return QuickCheckIn.objects.filter(user=self.request.user)
+
+
+class CheckInSyncView(SyncView):
+    serializer_class = CheckInSerializer
+
+
+class QuickCheckInSyncView(SyncView):
+    serializer_class = QuickCheckInSerializer
+
+
+class BatchCreateView(generics.GenericAPIView):
+    """
+    Create many entries from one request, e.g. an offline client's queue.
+
+    Expects a JSON list of objects. Every item is validated, the valid ones
+    are inserted with a single bulk_create in one transaction, and the
+    response has one result per input item, in order:
+
+        {"index": 0, "status": "created", "data": {...}}
+        {"index": 1, "status": "invalid", "errors": {...}}
+
+    Returns 201 if every item was created, 207 if only some were, and 400 if
+    none were. Items may say when they were recorded offline in `recorded_at`;
+    `created_at` is always the time of the upload.
+    """
+    permission_classes = [IsAuthenticated]
+    output_serializer_class = None
+
+    def post(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({'detail': 'Expected a list of items.'})
+        if not items:
+            raise ValidationError({'detail': 'Expected at least one item.'})
+        if len(items) > settings.CHECKIN_BATCH_MAX_ITEMS:
+            raise ValidationError({'detail': f'At most {settings.CHECKIN_BATCH_MAX_ITEMS} items per batch.'})
+
+        model = self.get_serializer_class().Meta.model
+        results = [None] * len(items)
+        pending = []
+        for index, item in enumerate(items):
+            serializer = self.get_serializer(data=item)
+            if serializer.is_valid():
+                pending.append((index, model(user=request.user, **serializer.validated_data)))
+            else:
+                results[index] = {'index': index, 'status': 'invalid', 'errors': serializer.errors}
+
+        if pending:
+            with transaction.atomic():
+                created = model.objects.bulk_create([obj for _, obj in pending])
+                # bulk_create skips Model.save() and its signals, so refresh the
+                # touched rollup days and the list ETag here
+                for day in {rollup_date(obj.created_at) for obj in created}:
+                    DailyMoodRollup.objects.refresh(request.user.pk, day)
+                transaction.on_commit(partial(list_changed, model, [request.user.pk]))
+            for (index, _), obj in zip(pending, created):
+                results[index] = {'index': index, 'status': 'created', 'data': self.output_serializer_class(obj).data}
+
+        if len(pending) == len(items):
+            response_status = status.HTTP_201_CREATED
+        elif pending:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(results, status=response_status)
+
+
+class CheckInBatchCreateView(BatchCreateView):
+    serializer_class = CheckInBatchItemSerializer
+    output_serializer_class = CheckInSerializer
+
+
+class QuickCheckInBatchCreateView(BatchCreateView):
+    serializer_class = QuickCheckInBatchItemSerializer
+    output_serializer_class = QuickCheckInSerializer
+
+
+class MoodStatsView(APIView):
+    """
+    Aggregated mood history for the authenticated user.
+
+    Query params:
+        tz      IANA timezone the days are bucketed in (default: TIME_ZONE)
+        days    number of daily buckets, also the window for average_intensity
+        weeks   number of weekly buckets
+        months  number of monthly buckets
+    """
+    permission_classes = [IsAuthenticated]
+    limits = {'days': (30, 366), 'weeks': (12, 104), 'months': (12, 60)}
+
+    def get(self, request):
+        tz = self.get_timezone(request)
+        windows = {name: self.get_window(request, name) for name in self.limits}
+        return Response(mood_stats(request.user, tz, **windows))
+
+    def get_timezone(self, request):
+        name = request.query_params.get('tz') or settings.TIME_ZONE
+        try:
+            return ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValidationError({'tz': f'Unknown timezone "{name}".'})
+
+    def get_window(self, request, name):
+        default, maximum = self.limits[name]
+        value = request.query_params.get(name)
+        if value is None:
+            return default
+        try:
+            value = int(value)
+        except ValueError:
+            raise ValidationError({name: 'Must be an integer.'})
+        if not 1 <= value <= maximum:
+            raise ValidationError({name: f'Must be between 1 and {maximum}.'})
+        return value
@@ -1,17 +1,27 @@
 from django.contrib import admin
+from django.contrib.auth import get_user_model
+from api.changelist import AutocompleteListFilter, ScalableModelAdmin, prefix_search
 from .models import JournalEntry
+from .search import filter_entries
+
+# Search words starting with this match usernames and emails by prefix
+USER_PREFIX = '@'
 
 @admin.register(JournalEntry)
-class JournalEntryAdmin(admin.ModelAdmin):
+class JournalEntryAdmin(ScalableModelAdmin):
     list_display = ('title', 'user', 'created_at', 'updated_at')
+    list_select_related = ('user',)
+    # Searched through the full-text index and user prefixes; see get_search_results
     search_fields = ('title', 'content', 'user__username', 'user__email')
-    list_filter = ('created_at', 'user')
+    search_help_text = 'Words match titles and entries; @name matches usernames and emails starting with name.'
+    list_filter = (('user', AutocompleteListFilter),)
+    date_hierarchy = 'created_at'
     readonly_fields = ('created_at', 'updated_at')
     ordering = ('-created_at',)
     
     def get_queryset(self, request):
         """Filter journal entries based on user permissions"""
-        qs = super().get_queryset(request)
+        qs = super().get_queryset(request).defer('search_document')
         if request.user.is_superuser:
             return qs  # Superuser can see all entries
         return qs.filter(user=request.user)  # Regular users see only their entries
@@ -31,3 +41,13 @@ class JournalEntryAdmin(admin.ModelAdmin):
         if request.user.is_superuser:
             return True
         return obj.user == request.user
+
+    def get_search_results(self, request, queryset, search_term):
+        words = search_term.split()
+        prefixes = [word[len(USER_PREFIX):] for word in words if word.startswith(USER_PREFIX)]
+        text = ' '.join(word for word in words if not word.startswith(USER_PREFIX))
+        for prefix in filter(None, prefixes):
+            queryset = queryset.filter(
+                user__in=prefix_search(get_user_model().objects.all(), ('username', 'email'), prefix)
+            )
+        return filter_entries(queryset, text), False
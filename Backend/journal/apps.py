@@ -3,3 +3,11 @@ from django.apps import AppConfig
 class JournalConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'journal'
+
+    def ready(self):
+        from api.conditional import track_changes
+        from api.sync import track_deletions
+        from .models import JournalEntry
+
+        track_changes(JournalEntry)
+        track_deletions(JournalEntry)
@@ -0,0 +1,18 @@
+from api.async_views import AsyncListCreateView, AsyncRetrieveUpdateDestroyView
+from .models import JournalEntry
+from .serializers import JournalEntryListSerializer, JournalEntrySerializer
+
+
+class JournalEntryListCreateView(AsyncListCreateView):
+    model = JournalEntry
+    serializer_class = JournalEntrySerializer
+    fast_serializer_class = JournalEntryListSerializer
+
+
+class JournalEntryRetrieveUpdateDestroyView(AsyncRetrieveUpdateDestroyView):
+    model = JournalEntry
+    serializer_class = JournalEntrySerializer
+
+    def get_queryset(self):
+        # The serializer shows the username; a lazy load would be a sync query
+        return super().get_queryset().select_related('user').defer('search_document')
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0004_alter_journalentry_user'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='journalentry',
+            options={'ordering': ['-created_at', '-id'], 'verbose_name_plural': 'Journal Entries'},
+        ),
+        migrations.AddIndex(
+            model_name='journalentry',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='journal_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:06
+
+import api.operations
+import api.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+def populate_search_document(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    JournalEntry = apps.get_model('journal', 'JournalEntry')
+    JournalEntry.objects.using(schema_editor.connection.alias).update(search_document=(
+        SearchVector('title', weight='A', config='english')
+        + SearchVector('content', weight='B', config='english')
+    ))
+
+
+SQLITE_FTS_SQL = [
+    # The owner column holds 'u<user_id>' and every query is ANDed with it, so
+    # the FTS index itself only ever yields the searching user's rows.
+    """CREATE VIRTUAL TABLE journal_entry_fts USING fts5(
+        owner, title, content, tokenize = 'porter unicode61'
+    )""",
+    """CREATE TRIGGER journal_entry_fts_insert AFTER INSERT ON journal_journalentry BEGIN
+        INSERT INTO journal_entry_fts (rowid, owner, title, content)
+        VALUES (new.id, 'u' || new.user_id, coalesce(new.title, ''), new.content);
+    END""",
+    """CREATE TRIGGER journal_entry_fts_update AFTER UPDATE ON journal_journalentry BEGIN
+        DELETE FROM journal_entry_fts WHERE rowid = old.id;
+        INSERT INTO journal_entry_fts (rowid, owner, title, content)
+        VALUES (new.id, 'u' || new.user_id, coalesce(new.title, ''), new.content);
+    END""",
+    """CREATE TRIGGER journal_entry_fts_delete AFTER DELETE ON journal_journalentry BEGIN
+        DELETE FROM journal_entry_fts WHERE rowid = old.id;
+    END""",
+    """INSERT INTO journal_entry_fts (rowid, owner, title, content)
+        SELECT id, 'u' || user_id, coalesce(title, ''), content FROM journal_journalentry""",
+]
+
+SQLITE_FTS_REVERSE_SQL = [
+    'DROP TRIGGER IF EXISTS journal_entry_fts_delete',
+    'DROP TRIGGER IF EXISTS journal_entry_fts_update',
+    'DROP TRIGGER IF EXISTS journal_entry_fts_insert',
+    'DROP TABLE IF EXISTS journal_entry_fts',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0005_alter_journalentry_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='journalentry',
+            name='search_document',
+            field=api.search.SearchDocumentField(editable=False, null=True),
+        ),
+        # Leading user_id column keeps every search inside one user's entries
+        api.operations.RunPostgresSQL(
+            [
+                'CREATE EXTENSION IF NOT EXISTS btree_gin',
+                'CREATE INDEX journal_search_document_gin ON journal_journalentry '
+                'USING gin (user_id, search_document)',
+            ],
+            'DROP INDEX IF EXISTS journal_search_document_gin',
+        ),
+        migrations.RunPython(populate_search_document, migrations.RunPython.noop),
+        api.operations.RunSQLiteSQL(SQLITE_FTS_SQL, SQLITE_FTS_REVERSE_SQL),
+    ]
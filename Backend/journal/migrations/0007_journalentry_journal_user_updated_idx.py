@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0006_journalentry_search_document'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='journalentry',
+            index=models.Index(fields=['user', 'updated_at'], name='journal_user_updated_idx'),
+        ),
+    ]
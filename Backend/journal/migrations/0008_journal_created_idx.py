@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0007_journalentry_journal_user_updated_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='journalentry',
+            index=models.Index(fields=['created_at'], name='journal_created_idx'),
+        ),
+    ]
@@ -1,18 +1,60 @@
-from django.db import models
+from django.db import connections, models, transaction
+from django.contrib.postgres.search import SearchVector
 from django.conf import settings
 
+from api.search import SEARCH_CONFIG, SearchDocumentField, is_postgres
+from api.sync import SyncedQuerySet
+
+
+class JournalEntryQuerySet(SyncedQuerySet):
+    # Rebuilding the search index is no change a client has to sync
+    unsynced_fields = ('search_document',)
+
+    def update_search_document(self):
+        """
+        Rebuild the PostgreSQL search document for every row in the queryset.
+
+        SQLite keeps its FTS5 index current with triggers instead, so this is
+        a no-op there.
+        """
+        if not is_postgres(connections[self.db]):
+            return 0
+        return self.update(search_document=(
+            SearchVector('title', weight='A', config=SEARCH_CONFIG)
+            + SearchVector('content', weight='B', config=SEARCH_CONFIG)
+        ))
+
+
 class JournalEntry(models.Model):
+    sync_collection = 'journal'
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='journal_entries')
     title = models.CharField(max_length=200, blank=True, null=True)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Weighted title/content tsvector on PostgreSQL; see journal/search.py
+    search_document = SearchDocumentField(null=True, editable=False)
+
+    objects = JournalEntryQuerySet.as_manager()
+
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
         verbose_name_plural = 'Journal Entries'
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='journal_user_created_idx'),
+            models.Index(fields=['user', 'updated_at'], name='journal_user_updated_idx'),
+            # Serves the admin's date hierarchy and its ordering across all users
+            models.Index(fields=['created_at'], name='journal_created_idx'),
+        ]
 
     def __str__(self):
         username = self.user.username if self.user else "Unknown"
         title = self.title if self.title else f"Entry from {self.created_at.strftime('%Y-%m-%d')}"
         return f"{username}: {title}"
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            JournalEntry.objects.filter(pk=self.pk).update_search_document()
@@ -0,0 +1,109 @@
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+
+from api.search import SEARCH_CONFIG, is_postgres, search_terms
+from .models import JournalEntry
+
+# The database marks matches with these private-use characters; headline()
+# escapes the entry text and only then turns them into <mark> tags
+HIGHLIGHT_START = '\ue000'
+HIGHLIGHT_STOP = '\ue001'
+
+
+def headline(snippet):
+    """The database's highlighted snippet as HTML, matches wrapped in <mark> tags."""
+    return escape(snippet).replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_STOP, '</mark>')
+
+
+def search_journal(user, query, limit=20):
+    """
+    Ranked full-text search over one user's journal entries.
+
+    Returns JournalEntry instances, best match first, each annotated with
+    `rank` (higher is better) and a `headline` snippet of the content with
+    the matching words wrapped in <mark> tags. The rest of the headline is
+    HTML-escaped, so it is safe to render as markup.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+
+    entries = JournalEntry.objects.filter(user=user)
+    if is_postgres(connections[entries.db]):
+        results = list(_search_postgres(entries, query, limit))
+    else:
+        results = _search_sqlite(entries, user, terms, limit)
+    for entry in results:
+        entry.headline = headline(entry.headline)
+    return results
+
+
+def filter_entries(entries, query):
+    """
+    Narrow `entries`, across any number of users, to those whose title or
+    content match the words of `query`, through the same full-text index as
+    search_journal. Unranked, so the caller's ordering and slicing apply.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return entries
+    if is_postgres(connections[entries.db]):
+        return entries.filter(search_document=SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch'))
+    # The column filter keeps a term like "u12" from matching the owner column
+    match = ' AND '.join(f'{{title content}} : "{term}"' for term in terms)
+    return entries.filter(id__in=RawSQL('SELECT rowid FROM journal_entry_fts WHERE journal_entry_fts MATCH %s', [match]))
+
+
+def _search_postgres(entries, query, limit):
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+    return (
+        entries.filter(search_document=search_query)
+        .defer('search_document')
+        .annotate(
+            rank=SearchRank(F('search_document'), search_query),
+            headline=SearchHeadline(
+                'content',
+                search_query,
+                config=SEARCH_CONFIG,
+                start_sel=HIGHLIGHT_START,
+                stop_sel=HIGHLIGHT_STOP,
+                max_words=35,
+                min_words=15,
+            ),
+        )
+        .order_by('-rank', '-created_at', '-id')[:limit]
+    )
+
+
+def _search_sqlite(entries, user, terms, limit):
+    # Quote every term so user input can never be parsed as FTS5 syntax
+    match = f'owner:u{user.pk} AND ' + ' AND '.join(f'"{term}"' for term in terms)
+    with connections[entries.db].cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT rowid,
+                   bm25(journal_entry_fts, 0.0, 2.0, 1.0) AS score,
+                   snippet(journal_entry_fts, 2, %s, %s, '...', 32) AS headline
+            FROM journal_entry_fts
+            WHERE journal_entry_fts MATCH %s
+            ORDER BY score
+            LIMIT %s
+            """,
+            [HIGHLIGHT_START, HIGHLIGHT_STOP, match, limit],
+        )
+        hits = cursor.fetchall()
+
+    by_id = entries.defer('search_document').in_bulk([row[0] for row in hits])
+    results = []
+    for entry_id, score, headline in hits:
+        entry = by_id.get(entry_id)
+        if entry is None:
+            continue
+        # bm25() is lower-is-better; flip it so rank means the same on both backends
+        entry.rank = -score
+        entry.headline = headline
+        results.append(entry)
+    return results
@@ -1,12 +1,36 @@
 from rest_framework import serializers
+from api.fast import FastListSerializer
 from .models import JournalEntry
 
+DATETIME_FORMAT = "%Y %b %d, %I:%M %p"
+
 class JournalEntrySerializer(serializers.ModelSerializer):
-    created_at = serializers.DateTimeField(format="%Y %b %d, %I:%M %p", read_only=True)
-    updated_at = serializers.DateTimeField(format="%Y %b %d, %I:%M %p", read_only=True)
+    created_at = serializers.DateTimeField(format=DATETIME_FORMAT, read_only=True)
+    updated_at = serializers.DateTimeField(format=DATETIME_FORMAT, read_only=True)
     user = serializers.StringRelatedField(read_only=True)  # Show username instead of ID
     
     class Meta:
         model = JournalEntry
         fields = ['id', 'user', 'title', 'content', 'created_at', 'updated_at']
         read_only_fields = ['id', 'user', 'created_at', 'updated_at']
+
+
+class JournalSearchResultSerializer(serializers.ModelSerializer):
+    created_at = serializers.DateTimeField(format=DATETIME_FORMAT, read_only=True)
+    updated_at = serializers.DateTimeField(format=DATETIME_FORMAT, read_only=True)
+    rank = serializers.FloatField(read_only=True)
+    headline = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = JournalEntry
+        fields = ['id', 'title', 'headline', 'rank', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+
+class JournalEntryListSerializer(FastListSerializer):
+    """Fast GET-list path with the same output as JournalEntrySerializer."""
+    fields = ['id', 'user', 'title', 'content', 'created_at', 'updated_at']
+    # JournalEntrySerializer shows str(user), which is the username
+    sources = {'user': 'user__username'}
+    datetime_fields = ['created_at', 'updated_at']
+    datetime_format = DATETIME_FORMAT
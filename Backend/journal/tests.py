@@ -0,0 +1,196 @@
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from . import async_views, views
+from .models import JournalEntry
+from .serializers import JournalEntryListSerializer, JournalEntrySerializer
+
+User = get_user_model()
+
+
+class JournalSearchTests(TestCase):
+    url = '/api/journal/search/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='searcher', email='searcher@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search(self, q, **params):
+        response = self.client.get(self.url, {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_ranks_title_matches_first(self):
+        in_content = JournalEntry.objects.create(user=self.user, title='Monday', content='Walked the dog in the rain.')
+        in_title = JournalEntry.objects.create(user=self.user, title='Rain again', content='Stayed inside.')
+        JournalEntry.objects.create(user=self.user, title='Sunny', content='Nothing to report.')
+        self.assertEqual([result['id'] for result in self.search('rain')], [in_title.id, in_content.id])
+
+    def test_only_searches_own_entries(self):
+        other = User.objects.create_user(username='other', email='other@example.com')
+        JournalEntry.objects.create(user=other, title='Secret', content='My secret plans.')
+        self.assertEqual(self.search('secret'), [])
+
+    def test_headline_escapes_entry_html(self):
+        JournalEntry.objects.create(
+            user=self.user, title='Bad day',
+            content='<script>alert("x")</script> I felt <b>anxious</b> & tired today.',
+        )
+        [result] = self.search('anxious')
+        self.assertIn('<mark>anxious</mark>', result['headline'])
+        self.assertIn('&amp; tired', result['headline'])
+        # ts_headline drops the tags, SQLite's snippet() keeps them escaped
+        markup = result['headline'].replace('<mark>', '').replace('</mark>', '')
+        self.assertNotIn('<', markup)
+        self.assertNotIn('>', markup)
+
+    def test_query_syntax_is_not_interpreted(self):
+        JournalEntry.objects.create(user=self.user, title='Notes', content='Quotes " and stars * and OR.')
+        for q in ('"', 'OR', 'stars*', 'owner:u1', 'NEAR(a b)', '-'):
+            with self.subTest(q=q):
+                self.search(q)
+
+    def test_validates_parameters(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'q': 'rain', 'limit': 'ten'}).status_code, 400)
+
+
+class HistoryQueryPlanTests(TestCase):
+    """The per-user journal list uses the (user, created_at, id) index without a sort step."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Enough rows per user that the planner prefers the index to a scan and sort
+        User.objects.bulk_create([User(username=f'explain-{i}', email=f'explain-{i}@example.com') for i in range(100)])
+        cls.users = list(User.objects.filter(username__startswith='explain-'))
+        JournalEntry.objects.bulk_create([
+            JournalEntry(user=cls.users[i % 100], title=f'Entry {i}', content='Dear diary')
+            for i in range(25_000)
+        ], batch_size=1000)
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'ANALYZE {JournalEntry._meta.db_table}')
+            elif connection.vendor == 'sqlite':
+                cursor.execute('ANALYZE')
+
+    def test_history_list_uses_index(self):
+        plan = JournalEntry.objects.filter(user=self.users[50])[:20].explain()
+        if connection.vendor == 'postgresql':
+            self.assertNotIn('Sort', plan)
+            self.assertNotIn('Seq Scan', plan)
+            self.assertIn('Index', plan)
+        elif connection.vendor == 'sqlite':
+            self.assertNotIn('TEMP B-TREE', plan)
+            self.assertIn('journal_user_created_idx', plan)
+
+
+class FastListSerializerParityTests(TestCase):
+    """JournalEntryListSerializer renders byte for byte what JournalEntrySerializer renders."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='fast-lists', email='fast-lists@example.com')
+        entries = JournalEntry.objects.bulk_create([
+            JournalEntry(user=cls.user, title=None if i % 4 == 0 else f'Entry {i}', content=f'Dear diary, day {i}, "quoted", with a comma.')
+            for i in range(500)
+        ])
+        # created_at is auto_now_add; seven minutes apart covers both halves of the day
+        now = timezone.now()
+        for i, entry in enumerate(entries):
+            entry.created_at = entry.updated_at = now - timedelta(minutes=7 * i)
+        JournalEntry.objects.bulk_update(entries, ['created_at', 'updated_at'])
+
+    def test_output_is_identical(self):
+        renderer = JSONRenderer()
+        for tz in ('UTC', 'Asia/Kolkata'):
+            with self.subTest(tz=tz), timezone.override(tz):
+                queryset = JournalEntry.objects.filter(user=self.user)
+                fast = JournalEntryListSerializer()
+                rows = queryset.values(*fast.lookups())
+                self.assertEqual(
+                    renderer.render([fast.to_representation(row) for row in rows]),
+                    renderer.render(JournalEntrySerializer(queryset, many=True).data),
+                )
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'journal-async'}})
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='async', email='async@example.com')
+        self.entry = JournalEntry.objects.create(user=self.user, title='Sunday', content='Slept in.')
+
+    def call(self, view_class, **kwargs):
+        request = APIRequestFactory().get('/api/journal/')
+        force_authenticate(request, self.user)
+        view = view_class.as_view()
+        response = async_to_sync(view)(request, **kwargs) if view_class.view_is_async else view(request, **kwargs)
+        return response.render()
+
+    def test_responses_match_sync_views(self):
+        pairs = [
+            (views.JournalEntryListCreateView, async_views.JournalEntryListCreateView, {}),
+            (views.JournalEntryRetrieveUpdateDestroyView, async_views.JournalEntryRetrieveUpdateDestroyView, {'id': self.entry.id}),
+        ]
+        for sync_view, async_view, kwargs in pairs:
+            expected = self.call(sync_view, **kwargs)
+            actual = self.call(async_view, **kwargs)
+            self.assertEqual(actual.status_code, 200)
+            self.assertEqual(actual.content, expected.content)
+
+
+# The manifest storage needs collectstatic to have run first
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class AdminChangelistQueryBudgetTests(TestCase):
+    """The journal changelist stays within changelist_query_budget however many rows there are."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = User.objects.create_superuser(
+            username='admin-queries', email='admin-queries@example.com', password='admin-queries'
+        )
+        cls.users = User.objects.bulk_create(
+            [User(username=f'admin-queries-{i}', email=f'admin-queries-{i}@example.com') for i in range(20)]
+        )
+        # Spread over two years so every level of the date hierarchy has choices.
+        # bulk_create skips save(), so no search documents are built.
+        now = timezone.now()
+        entries = JournalEntry.objects.bulk_create([
+            JournalEntry(user=cls.users[i % 20], title=f'Entry {i}', content=f'Dear diary, day {i}.')
+            for i in range(1000)
+        ])
+        for i, entry in enumerate(entries):
+            entry.created_at = now - timedelta(hours=17 * i)
+        # created_at is auto_now_add, so the spread is applied after the insert
+        JournalEntry.objects.bulk_update(entries, ['created_at'], batch_size=500)
+
+    def setUp(self):
+        self.client.force_login(self.superuser)
+
+    def test_changelist_pages_within_query_budget(self):
+        url = reverse('admin:journal_journalentry_changelist')
+        local = timezone.localtime()
+        pages = [
+            {}, {'p': 1}, {'user__id__exact': self.users[1].pk},
+            {'q': 'diary'}, {'q': '@admin-queries-1'},
+            {'created_at__year': local.year},
+            {'created_at__year': local.year, 'created_at__month': local.month},
+            {'created_at__year': local.year, 'created_at__month': local.month, 'created_at__day': local.day},
+        ]
+        for params in pages:
+            with self.subTest(params=params):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 200)
+                self.assertLessEqual(len(queries), admin.site._registry[JournalEntry].changelist_query_budget)
@@ -1,7 +1,14 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# With ASYNC_API (ASGI deployments, see project/asgi.py) the list and detail
+# endpoints are served by async views with the same URLs and responses
+entry_views = async_views if settings.ASYNC_API else views
 
 urlpatterns = [
-    path('', views.JournalEntryListCreateView.as_view(), name='journal-list-create'),
-    path('<int:id>/', views.JournalEntryRetrieveUpdateDestroyView.as_view(), name='journal-detail'),
+    path('', entry_views.JournalEntryListCreateView.as_view(), name='journal-list-create'),
+    path('sync/', views.JournalEntrySyncView.as_view(), name='journal-sync'),
+    path('search/', views.JournalEntrySearchView.as_view(), name='journal-search'),
+    path('<int:id>/', entry_views.JournalEntryRetrieveUpdateDestroyView.as_view(), name='journal-detail'),
 ]
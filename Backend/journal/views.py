@@ -1,11 +1,20 @@
 from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 from .models import JournalEntry
-from .serializers import JournalEntrySerializer
+from .search import search_journal
+from .serializers import JournalEntrySerializer, JournalEntryListSerializer, JournalSearchResultSerializer
 from rest_framework.permissions import IsAuthenticated
+from api.conditional import ConditionalGetMixin
+from api.fast import FastListMixin
+from api.pagination import KeysetPagination
+from api.sync import SyncView
 
-class JournalEntryListCreateView(generics.ListCreateAPIView):
+class JournalEntryListCreateView(ConditionalGetMixin, FastListMixin, generics.ListCreateAPIView):
     serializer_class = JournalEntrySerializer
+    fast_serializer_class = JournalEntryListSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         # Only return journal entries for the authenticated user
@@ -15,7 +24,7 @@ class JournalEntryListCreateView(generics.ListCreateAPIView):
         # Set the user when creating a new journal entry
         serializer.save(user=self.request.user)
 
-class JournalEntryRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class JournalEntryRetrieveUpdateDestroyView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = JournalEntrySerializer
     lookup_field = "id"
     permission_classes = [IsAuthenticated]
@@ -23,3 +32,24 @@ class JournalEntryRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIVie
     def get_queryset(self):
         # Only allow access to user's own journal entries
         return JournalEntry.objects.filter(user=self.request.user)
+
+class JournalEntrySyncView(SyncView):
+    serializer_class = JournalEntrySerializer
+
+class JournalEntrySearchView(generics.GenericAPIView):
+    """Ranked, highlighted full-text search over the user's own entries (?q=, ?limit=)."""
+    serializer_class = JournalSearchResultSerializer
+    permission_classes = [IsAuthenticated]
+    max_limit = 50
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'This parameter is required.'})
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), self.max_limit)
+        except ValueError:
+            raise ValidationError({'limit': 'Must be an integer.'})
+
+        results = search_journal(request.user, query, limit=max(limit, 1))
+        return Response(self.get_serializer(results, many=True).data)
@@ -5,6 +5,23 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+ASGI deployment mode
+--------------------
+Set ASYNC_API=True so the check-in and journal list/detail endpoints are
+served by async views (checkin/async_views.py, journal/async_views.py),
+then run under uvicorn workers managed by gunicorn:
+
+    gunicorn project.asgi:application -k uvicorn.workers.UvicornWorker -w 4
+
+or uvicorn on its own:
+
+    uvicorn project.asgi:application --workers 4
+
+Everything else keeps running as sync DRF views in a thread. Set
+PASSWORD_HASHING_OFFLOAD=True as well so logins are hashed in their own
+bounded pool. `manage.py loadtest_api` compares this mode with the WSGI
+one (`gunicorn project.wsgi`).
 """
 
 import os
@@ -12,7 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
-from decouple import config
+from decouple import Csv, config
 import dj_database_url
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',
     'api',
     'checkin',
     'journal',
@@ -54,6 +55,7 @@ MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'api.replicas.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -93,6 +95,93 @@ DATABASES = {
     )
 }
 
+# Read replicas (api.replicas): comma-separated URLs, added as replica_0,
+# replica_1, ... Safe-method requests read from a healthy one; leave empty
+# to send everything to the primary. Replicas are never migrated: they copy
+# the primary, by streaming replication or, locally, a copied SQLite file.
+for index, url in enumerate(config('DATABASE_REPLICA_URLS', default='', cast=Csv())):
+    DATABASES[f'replica_{index}'] = {
+        **dj_database_url.parse(url, conn_max_age=600, conn_health_checks=True),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Connection pooling (api.pooled_postgresql) for the PostgreSQL databases:
+# the threads of a worker process share at most DATABASE_POOL_MAX_SIZE
+# connections per database instead of each keeping its own
+if config('DATABASE_POOL', default=False, cast=bool):
+    for database in DATABASES.values():
+        if database['ENGINE'] == 'django.db.backends.postgresql':
+            database.update(ENGINE='api.pooled_postgresql', CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False)
+            database.setdefault('OPTIONS', {})['pool'] = {
+                'min_size': config('DATABASE_POOL_MIN_SIZE', default=2, cast=int),
+                'max_size': config('DATABASE_POOL_MAX_SIZE', default=10, cast=int),
+                'timeout': config('DATABASE_POOL_TIMEOUT', default=10, cast=float),
+                'max_idle': config('DATABASE_POOL_MAX_IDLE', default=600, cast=float),
+                'max_lifetime': config('DATABASE_POOL_MAX_LIFETIME', default=3600, cast=float),
+                'check': config('DATABASE_POOL_CHECK', default=True, cast=bool),
+            }
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+
+# Clients read from the primary for this long after they write; keep it above the allowed lag
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=10, cast=float)
+# Holds the pins; must be Redis or Memcached so every worker on every host sees
+# them. The default cache only qualifies with CACHE_BACKEND set to one of them;
+# with replicas configured, startup fails otherwise (system check api.E001).
+REPLICA_PIN_CACHE = config('REPLICA_PIN_CACHE', default='default')
+REPLICA_MAX_LAG_SECONDS = config('REPLICA_MAX_LAG_SECONDS', default=5, cast=float)
+REPLICA_HEALTH_CHECK_INTERVAL = config('REPLICA_HEALTH_CHECK_INTERVAL', default=10, cast=float)
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# The file backend is shared by every worker on a host, so invalidations are
+# seen by all of them; point CACHE_BACKEND/CACHE_LOCATION at Redis or
+# Memcached when running on more than one machine.
+
+CACHE_BACKEND = config('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache')
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / '.cache')),
+        # Redis and Memcached pass OPTIONS to their client and evict on their own
+        'OPTIONS': {
+            'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=10000, cast=int),
+        } if CACHE_BACKEND.endswith(('FileBasedCache', 'LocMemCache')) else {},
+    },
+    # Per-process, for short-lived entries read on every request
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'auth',
+    },
+}
+
+# Pre-rendered public psychartist directory responses (psychartist/cache.py).
+# Only cached when this is a Redis or Memcached cache; see caching_enabled()
+PSYCHARTIST_DIRECTORY_CACHE = 'default'
+PSYCHARTIST_DIRECTORY_CACHE_TIMEOUT = config('PSYCHARTIST_DIRECTORY_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Users resolved by authentication.authentication.CachedJWTAuthentication. The
+# per-process default is only invalidated in the process that changed the user:
+# other workers keep accepting the tokens of a user who was deactivated, changed
+# their password or logged out for up to AUTH_USER_CACHE_TIMEOUT seconds. Point
+# AUTH_USER_CACHE at a shared backend to make revocation immediate everywhere.
+AUTH_USER_CACHE = config('AUTH_USER_CACHE', default='auth')
+AUTH_USER_CACHE_TIMEOUT = config('AUTH_USER_CACHE_TIMEOUT', default=30, cast=int)
+
+# Shared counters that keep each process's blacklisted-token filter current
+# (authentication/revocation.py). Every process that refreshes tokens must
+# see this cache, so use Redis or Memcached on more than one machine; with a
+# local-memory cache the filter is off and every refresh checks the table.
+TOKEN_REVOCATION_CACHE = config('TOKEN_REVOCATION_CACHE', default='default')
+
+# Per-user generation counters that list ETags are keyed on (api/conditional.py)
+LIST_GENERATION_CACHE = 'default'
+
+# Serialized /api/auth/profile/ responses, one entry per user
+PROFILE_CACHE = 'default'
+PROFILE_CACHE_TIMEOUT = config('PROFILE_CACHE_TIMEOUT', default=900, cast=int)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -123,6 +212,9 @@ USE_I18N = True
 
 USE_TZ = True
 
+# Day boundaries for checkin.DailyMoodRollup; run `rebuild_mood_rollups` after changing
+MOOD_ROLLUP_TIME_ZONE = config('MOOD_ROLLUP_TIME_ZONE', default=TIME_ZONE)
+
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
@@ -133,6 +225,10 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 # WhiteNoise configuration
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Profile picture uploads and their variants (psychartist/images.py)
+PROFILE_PICTURE_MAX_BYTES = config('PROFILE_PICTURE_MAX_BYTES', default=5 * 2**20, cast=int)
+IMAGE_VARIANT_WORKERS = config('IMAGE_VARIANT_WORKERS', default=1, cast=int)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -186,14 +282,56 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
+    'TOKEN_OBTAIN_SERIALIZER': 'authentication.serializers.VersionedTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'authentication.serializers.VersionedTokenRefreshSerializer',
 }
 
 # REST Framework Settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Token buckets for authentication.throttling, kept in the shared default cache
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': config('LOGIN_IP_THROTTLE_RATE', default='20/min'),
+        'login_username': config('LOGIN_USERNAME_THROTTLE_RATE', default='5/min'),
+        'login_account': config('LOGIN_ACCOUNT_THROTTLE_RATE', default='30/hour'),
+        'register_ip': config('REGISTER_IP_THROTTLE_RATE', default='10/hour'),
+        'export': config('EXPORT_THROTTLE_RATE', default='6/hour'),
+    },
+    # Proxies in front of the app that append to X-Forwarded-For; throttles
+    # key on the address the outermost of them saw. 0 uses REMOTE_ADDR and
+    # ignores the header, which clients can set to anything. Behind one
+    # load balancer or nginx set NUM_PROXIES=1.
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
 }
+
+# Serve the check-in and journal list/detail endpoints from async views;
+# enable together with an ASGI server (see project/asgi.py)
+ASYNC_API = config('ASYNC_API', default=False, cast=bool)
+
+# Run password hashing for login and registration in a bounded thread pool
+# behind async views (authentication/hashing.py); most useful under ASGI
+PASSWORD_HASHING_OFFLOAD = config('PASSWORD_HASHING_OFFLOAD', default=False, cast=bool)
+PASSWORD_HASHING_WORKERS = config('PASSWORD_HASHING_WORKERS', default=2, cast=int)
+PASSWORD_HASHING_QUEUE = config('PASSWORD_HASHING_QUEUE', default=32, cast=int)
+
+# Keyset pagination (api.pagination.KeysetPagination) for per-user history lists
+API_PAGE_SIZE = config('API_PAGE_SIZE', default=20, cast=int)
+API_MAX_PAGE_SIZE = config('API_MAX_PAGE_SIZE', default=100, cast=int)
+
+# Delta sync (api.sync): tombstones older than this are pruned and their cursors expire
+SYNC_TOMBSTONE_RETENTION_DAYS = config('SYNC_TOMBSTONE_RETENTION_DAYS', default=30, cast=int)
+SYNC_MAX_CHANGES = config('SYNC_MAX_CHANGES', default=1000, cast=int)
+
+# Admin changelists (api.changelist) estimate their row count past this many rows
+ADMIN_EXACT_COUNT_LIMIT = config('ADMIN_EXACT_COUNT_LIMIT', default=100_000, cast=int)
+
+# Largest offline queue accepted by the check-in batch endpoints
+CHECKIN_BATCH_MAX_ITEMS = config('CHECKIN_BATCH_MAX_ITEMS', default=200, cast=int)
+
+# Most psychartist applications one bulk review request may approve or reject
+APPLICATION_REVIEW_MAX_ITEMS = config('APPLICATION_REVIEW_MAX_ITEMS', default=500, cast=int)
@@ -1,6 +1,6 @@
 from django.contrib import admin
-from django.utils import timezone
-from .models import PsychartistApplication, Psychartist
+from .models import PsychartistApplication, Psychartist, Review
+from .review import APPROVED, DECISIONS, REJECTED, review_applications
 
 @admin.register(PsychartistApplication)
 class PsychartistApplicationAdmin(admin.ModelAdmin):
@@ -25,71 +25,34 @@ class PsychartistApplicationAdmin(admin.ModelAdmin):
         }),
     )
     
+    actions = ['approve_applications', 'reject_applications']
+
     def save_model(self, request, obj, form, change):
-        # If status is being changed to approved, create Psychartist profile
-        if change and 'status' in form.changed_data and obj.status == 'approved':
-            obj.reviewed_at = timezone.now()
-            obj.reviewed_by = request.user
-            
-            # Create or update Psychartist profile
-            psychartist, created = Psychartist.objects.get_or_create(
-                user=obj.user,
-                defaults={
-                    'application': obj,
-                    'full_name': obj.full_name,
-                    'license_number': obj.license_number,
-                    'contact_email': obj.contact_email,
-                    'phone_number': obj.phone_number,
-                    'profile_picture': obj.profile_picture,
-                    'specialization': obj.specialization,
-                    'years_of_experience': obj.years_of_experience,
-                    'education': obj.education,
-                    'certifications': obj.certifications,
-                    'approach': obj.approach,
-                    'languages': obj.languages,
-                    'available_hours': obj.available_hours,
-                    'session_rate': obj.session_rate,
-                    'bio': obj.bio,
-                    'is_active': True,
-                    'is_verified': True,
-                }
-            )
-            
-            if not created:
-                # Update existing profile with latest application data
-                psychartist.full_name = obj.full_name
-                psychartist.license_number = obj.license_number
-                psychartist.contact_email = obj.contact_email
-                psychartist.phone_number = obj.phone_number
-                psychartist.profile_picture = obj.profile_picture
-                psychartist.specialization = obj.specialization
-                psychartist.years_of_experience = obj.years_of_experience
-                psychartist.education = obj.education
-                psychartist.certifications = obj.certifications
-                psychartist.approach = obj.approach
-                psychartist.languages = obj.languages
-                psychartist.available_hours = obj.available_hours
-                psychartist.session_rate = obj.session_rate
-                psychartist.bio = obj.bio
-                psychartist.is_active = True
-                psychartist.is_verified = True
-                psychartist.save()
-        
-        elif change and 'status' in form.changed_data and obj.status == 'rejected':
-            obj.reviewed_at = timezone.now()
-            obj.reviewed_by = request.user
-            
-            # Deactivate psychartist profile if it exists
-            try:
-                psychartist = Psychartist.objects.get(user=obj.user)
-                psychartist.is_active = False
-                psychartist.is_verified = False
-                psychartist.save()
-            except Psychartist.DoesNotExist:
-                pass
-        
+        decision = obj.status
+        if change and 'status' in form.changed_data and decision in DECISIONS:
+            # Save the other edits under the old status, then let the review
+            # service move it, so the profile is written the same way as
+            # through the API
+            obj.status = form.initial['status']
+            super().save_model(request, obj, form, change)
+            review_applications([obj.pk], decision, request.user, obj.review_notes, from_statuses=[obj.status])
+            obj.refresh_from_db()
+            return
         super().save_model(request, obj, form, change)
 
+    def review_selected(self, request, queryset, decision):
+        ids = list(queryset.values_list('pk', flat=True))
+        reviewed = review_applications(ids, decision, request.user)
+        self.message_user(request, f'{len(reviewed)} application(s) {decision}; {len(ids) - len(reviewed)} already reviewed.')
+
+    @admin.action(description='Approve selected pending applications')
+    def approve_applications(self, request, queryset):
+        self.review_selected(request, queryset, APPROVED)
+
+    @admin.action(description='Reject selected pending applications')
+    def reject_applications(self, request, queryset):
+        self.review_selected(request, queryset, REJECTED)
+
 @admin.register(Psychartist)
 class PsychartistAdmin(admin.ModelAdmin):
     list_display = ['full_name', 'user', 'specialization', 'is_active', 'is_verified', 'average_rating', 'created_at']
@@ -114,4 +77,14 @@ class PsychartistAdmin(admin.ModelAdmin):
         ('Rating & Reviews', {
             'fields': ('average_rating', 'total_reviews')
         }),
-    )
\ No newline at end of file
+    )
+
+@admin.register(Review)
+class ReviewAdmin(admin.ModelAdmin):
+    list_display = ['psychartist', 'user', 'rating', 'created_at']
+    list_filter = ['rating']
+    list_select_related = ['psychartist', 'user']
+    search_fields = ['psychartist__full_name', 'user__username', 'comment']
+    raw_id_fields = ['psychartist', 'user']
+    readonly_fields = ['created_at', 'updated_at']
+    ordering = ['-created_at']
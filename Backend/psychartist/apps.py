@@ -3,4 +3,13 @@ from django.apps import AppConfig
 
 class PsychartistConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'psychartist'
\ No newline at end of file
+    name = 'psychartist'
+
+    def ready(self):
+        from django.conf import settings
+        from django.db.models.signals import post_delete, post_save
+        from .models import Psychartist, Review, psychartist_deleted, review_deleted, user_saved
+
+        post_delete.connect(review_deleted, sender=Review, dispatch_uid='review-ratings-delete')
+        post_delete.connect(psychartist_deleted, sender=Psychartist, dispatch_uid='psychartist-directory-delete')
+        post_save.connect(user_saved, sender=settings.AUTH_USER_MODEL, dispatch_uid='psychartist-directory-user-save')
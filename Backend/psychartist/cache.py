@@ -0,0 +1,77 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.http import urlencode
+
+from api.counters import bump_counter, is_shared_cache, read_counter
+
+GENERATION_KEY = 'psychartist:directory:generation'
+LOCK_TIMEOUT = 10
+
+
+def directory_cache():
+    return caches[settings.PSYCHARTIST_DIRECTORY_CACHE]
+
+
+def caching_enabled():
+    """
+    Whether directory responses are cached at all. Invalidation bumps a
+    generation counter every process has to see, so it needs a shared cache
+    with an atomic incr() (see api.counters.is_shared_cache); with the file
+    or local-memory backends every request builds its own response.
+    """
+    return is_shared_cache(directory_cache())
+
+
+def current_generation():
+    """
+    Generation every cached directory entry is stamped with.
+
+    Bumping it invalidates every cached list and detail variant at once
+    without having to know which query strings were cached.
+    """
+    return read_counter(directory_cache(), GENERATION_KEY)
+
+
+def invalidate_directory():
+    """Drop every cached directory response. Call once the change has committed."""
+    bump_counter(directory_cache(), GENERATION_KEY)
+
+
+def variant_key(name, query_params):
+    """Cache key for one view and one normalized set of query parameters."""
+    params = sorted((key, sorted(values)) for key, values in query_params.lists())
+    digest = hashlib.sha1(urlencode(params, doseq=True).encode()).hexdigest()
+    return f'psychartist:directory:{name}:{digest}'
+
+
+def get_or_build(key, build, keep=lambda body: True):
+    """
+    Return the bytes cached for `key`, rebuilding them at most once at a time.
+
+    Entries hold the generation they were built in. When that is out of date,
+    the first request takes a short-lived lock with cache.add() and rebuilds
+    the entry; concurrent requests serve the previous bytes in the meantime
+    rather than all hitting the database, and only build their own when
+    nothing was cached yet. Bytes for which `keep(body)` is false are
+    returned without being stored.
+    """
+    cache = directory_cache()
+    generation = current_generation()
+    entry = cache.get(key)
+    if entry is not None and entry[0] == generation:
+        return entry[1]
+
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+        return entry[1] if entry is not None else build()
+    try:
+        body = build()
+        # Stamped with the generation read before building, so a change
+        # committed meanwhile still invalidates it
+        if keep(body):
+            cache.set(key, (generation, body), timeout=settings.PSYCHARTIST_DIRECTORY_CACHE_TIMEOUT)
+    finally:
+        cache.delete(lock_key)
+    return body
@@ -0,0 +1,163 @@
+import io
+import logging
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+ALLOWED_FORMATS = {'JPEG', 'PNG', 'WEBP', 'GIF'}
+# Larger images are refused before Pillow decodes them
+MAX_PIXELS = 40_000_000
+# The stored original is re-encoded without metadata and capped at this size
+ORIGINAL_MAX_SIZE = 1600
+# Square crops at twice the size the directory card (64px) and profile page (128px) show
+VARIANT_SIZES = {
+    'thumbnail': 128,
+    'card': 256,
+}
+VARIANT_FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 6}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+VARIANT_DIRECTORY = 'variants'
+
+_executor = None
+_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+def check_upload(upload):
+    """Raise InvalidImage unless `upload` is a reasonably sized JPEG, PNG, WebP or GIF."""
+    if upload.size > settings.PROFILE_PICTURE_MAX_BYTES:
+        raise InvalidImage(f'Image files must be smaller than {settings.PROFILE_PICTURE_MAX_BYTES // 2**20} MB.')
+    upload.seek(0)
+    try:
+        # Opening only reads the header; nothing is decoded yet
+        with Image.open(upload) as image:
+            image_format, (width, height) = image.format, image.size
+            animated = getattr(image, 'is_animated', False)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        raise InvalidImage('Upload a valid JPEG, PNG, WebP or GIF image.')
+    finally:
+        upload.seek(0)
+    if image_format not in ALLOWED_FORMATS:
+        raise InvalidImage('Upload a valid JPEG, PNG, WebP or GIF image.')
+    if width * height > MAX_PIXELS:
+        raise InvalidImage('Image dimensions are too large.')
+    if animated:
+        raise InvalidImage('Animated images are not supported.')
+
+
+def _run(func, *args):
+    try:
+        return func(*args)
+    except Exception:
+        # Nobody waits on the future, so the failure would otherwise go unseen
+        logger.exception('Image job %s%r failed', func.__name__, args)
+        raise
+    finally:
+        # Pool threads never see request_finished, so release their connections here
+        close_old_connections()
+
+
+def submit(func, *args):
+    """
+    Run `func(*args)` on the process's image worker pool, off the request path.
+
+    Failures are logged. Work queued in a worker that is then restarted is
+    lost; `manage.py build_profile_picture_variants` picks up whatever is
+    missing.
+    """
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_VARIANT_WORKERS, thread_name_prefix='image-variants'
+            )
+    return _executor.submit(_run, func, *args)
+
+
+def _encode(image, image_format, options):
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def _flatten(image):
+    """RGB copy of `image`, with any transparency composited onto white."""
+    image = image.convert('RGBA') if image.mode in ('P', 'LA', 'RGBA', 'PA') else image.convert('RGB')
+    if image.mode == 'RGBA':
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image
+
+
+def variant_names(variants):
+    """Every storage name in a {variant: {format: name}} mapping."""
+    return {name for names in variants.values() for name in names.values()}
+
+
+def delete_files(names, storage=default_storage):
+    """Delete the stored files `names`, logging rather than raising on failure."""
+    for name in names:
+        try:
+            storage.delete(name)
+        except OSError:
+            logger.exception('Could not delete %s', name)
+
+
+def render_variants(name, storage=default_storage):
+    """
+    Sanitize the stored image `name` and write its variants next to it.
+
+    The original is rewritten in its own format, upright, at most
+    ORIGINAL_MAX_SIZE pixels on its longer side and without EXIF or other
+    metadata (which can hold the camera's GPS position). Every file is
+    written under a name the storage has not used yet, so nothing a client
+    may be loading is overwritten or removed; the caller points its rows
+    at the returned names and then deletes the old files. Returns the new
+    original's name and the variant names as {variant: {format: name}}.
+
+    Animated images raise InvalidImage rather than being flattened to
+    their first frame.
+    """
+    with storage.open(name, 'rb') as source:
+        with Image.open(source) as opened:
+            if getattr(opened, 'is_animated', False):
+                raise InvalidImage(f'{name} is animated.')
+            original_format = opened.format
+            image = ImageOps.exif_transpose(opened)
+            image.load()
+
+    sanitized = image.copy()
+    sanitized.thumbnail((ORIGINAL_MAX_SIZE, ORIGINAL_MAX_SIZE), Image.LANCZOS)
+    if original_format == 'JPEG':
+        sanitized = _flatten(sanitized)
+    # Saving without exif=/pnginfo= drops every metadata block
+    name = storage.save(name, _encode(sanitized, original_format, {}))
+
+    flat = _flatten(image)
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    variants = {}
+    for variant, size in VARIANT_SIZES.items():
+        fitted = ImageOps.fit(flat, (size, size), Image.LANCZOS)
+        variants[variant] = {
+            key: storage.save(
+                posixpath.join(directory, VARIANT_DIRECTORY, f'{stem}-{variant}.{extension}'),
+                _encode(fitted, image_format, options),
+            )
+            for key, (image_format, extension, options) in VARIANT_FORMATS.items()
+        }
+    return name, variants
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from psychartist.models import Psychartist, PsychartistApplication, build_profile_picture_variants
+
+
+class Command(BaseCommand):
+    help = (
+        'Sanitize stored profile pictures and build their thumbnail and card '
+        'variants. By default only pictures without variants are processed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Rebuild variants for every picture')
+
+    def handle(self, *args, **options):
+        names = set()
+        for model in (PsychartistApplication, Psychartist):
+            pictures = model.objects.exclude(profile_picture='').exclude(profile_picture__isnull=True)
+            if not options['all']:
+                pictures = pictures.filter(profile_picture_variants={})
+            names.update(pictures.values_list('profile_picture', flat=True).distinct())
+
+        built = failed = 0
+        for name in sorted(names):
+            try:
+                build_profile_picture_variants(name)
+            except (OSError, ValueError) as exc:
+                # A missing or corrupt file should not stop the rest of the backfill
+                failed += 1
+                self.stderr.write(f'{name}: {exc}')
+            else:
+                built += 1
+        self.stdout.write(self.style.SUCCESS(f'Built variants for {built} pictures ({failed} failed)'))
@@ -0,0 +1,57 @@
+from functools import partial
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from authentication.cache import invalidate_profile
+from psychartist.cache import invalidate_directory
+from psychartist.models import Psychartist, Review, rating_average
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the rating sum, review count and average of every psychartist '
+        'from its reviews, a chunk of profiles at a time, and repair those that drifted'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Profiles checked per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Report drifted profiles without repairing them')
+
+    def handle(self, *args, **options):
+        reviews = Review.objects.filter(psychartist=OuterRef('pk')).order_by().values('psychartist')
+        actual_sum = Coalesce(Subquery(reviews.annotate(total=Sum('rating')).values('total')), 0)
+        actual_count = Coalesce(Subquery(reviews.annotate(total=Count('id')).values('total')), 0)
+        drifted = Psychartist.objects.order_by('id').alias(actual_sum=actual_sum, actual_count=actual_count).filter(
+            ~Q(rating_sum=F('actual_sum')) | ~Q(total_reviews=F('actual_count'))
+        )
+
+        chunk_size = options['chunk_size']
+        last_id = checked = repaired = 0
+        while True:
+            ids = list(Psychartist.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:chunk_size])
+            if not ids:
+                break
+            last_id = ids[-1]
+            checked += len(ids)
+
+            with transaction.atomic():
+                # Locking first makes concurrent review saves wait, so their
+                # increments land on top of the recomputed values
+                rows = list(drifted.select_for_update().filter(id__in=ids).values_list('id', 'user_id'))
+                if rows and not options['dry_run']:
+                    Psychartist.objects.filter(id__in=[pk for pk, _ in rows]).update(
+                        rating_sum=actual_sum,
+                        total_reviews=actual_count,
+                        average_rating=rating_average(actual_sum, actual_count),
+                    )
+                    transaction.on_commit(invalidate_directory)
+                    for _, user_id in rows:
+                        transaction.on_commit(partial(invalidate_profile, user_id))
+            repaired += len(rows)
+            self.stdout.write(f'Checked {checked} profiles ({repaired} drifted)')
+
+        verb = 'found' if options['dry_run'] else 'repaired'
+        self.stdout.write(self.style.SUCCESS(f'Done: {repaired} of {checked} profiles {verb}'))
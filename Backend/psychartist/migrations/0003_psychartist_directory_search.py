@@ -0,0 +1,61 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:05
+
+import api.operations
+import api.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+from django.db.models import TextField, Value
+from django.db.models.functions import Concat, Lower
+
+
+def populate_search_document(apps, schema_editor):
+    Psychartist = apps.get_model('psychartist', 'Psychartist')
+    if schema_editor.connection.vendor == 'postgresql':
+        document = (
+            SearchVector('full_name', weight='A', config='english')
+            + SearchVector('specialization', 'approach', weight='B', config='english')
+            + SearchVector('languages', weight='C', config='english')
+            + SearchVector('bio', weight='D', config='english')
+        )
+    else:
+        document = Lower(Concat(
+            'full_name', Value(' '), 'specialization', Value(' '), 'approach', Value(' '),
+            'languages', Value(' '), 'bio', output_field=TextField(),
+        ))
+    Psychartist.objects.using(schema_editor.connection.alias).update(search_document=document)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('psychartist', '0002_auto_20251224_2052'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='psychartist',
+            name='search_document',
+            field=api.search.SearchDocumentField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='psychartist',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_verified', True)), fields=['specialization'], name='psych_dir_specialization_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='psychartist',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_verified', True)), fields=['-average_rating'], name='psych_dir_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='psychartist',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_verified', True)), fields=['session_rate'], name='psych_dir_rate_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='psychartist',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_verified', True)), fields=['years_of_experience'], name='psych_dir_experience_idx'),
+        ),
+        api.operations.RunPostgresSQL(
+            'CREATE INDEX psych_search_document_gin ON psychartist_psychartist USING gin (search_document)',
+            'DROP INDEX IF EXISTS psych_search_document_gin',
+        ),
+        migrations.RunPython(populate_search_document, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('psychartist', '0003_psychartist_directory_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='psychartist',
+            name='profile_picture_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='psychartistapplication',
+            name='profile_picture_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
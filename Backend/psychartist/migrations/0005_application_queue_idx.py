@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('psychartist', '0004_profile_picture_variants'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='psychartistapplication',
+            index=models.Index(fields=['status', 'applied_at', 'id'], name='application_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:03
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('psychartist', '0005_application_queue_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='psychartist',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='Review',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(5)])),
+                ('comment', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('psychartist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='psychartist.psychartist')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='psychartist_reviews', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['psychartist', '-created_at', '-id'], name='review_psych_created_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.UniqueConstraint(fields=('user', 'psychartist'), name='review_one_per_user'),
+        ),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.CheckConstraint(check=models.Q(('rating__gte', 1), ('rating__lte', 5)), name='review_rating_range'),
+        ),
+    ]
@@ -1,7 +1,75 @@
-from django.db import models
+from decimal import Decimal
+from functools import partial
+
+from django.db import connections, models, transaction
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db.models import Case, F, FloatField, Q, TextField, Value, When
+from django.db.models.functions import Cast, Concat, Lower, Round
+from django.db.models.lookups import GreaterThan
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
 from django.conf import settings
 
-class PsychartistApplication(models.Model):
+from api.search import SEARCH_CONFIG, SearchDocumentField, is_postgres, search_terms
+from . import images
+from .cache import invalidate_directory
+
+
+class ProfilePictureModel(models.Model):
+    """
+    Builds the profile picture variants after a new picture is uploaded.
+
+    Saving a new upload clears profile_picture_variants and, once the
+    transaction commits, queues build_profile_picture_variants() on the
+    image worker pool. Until it finishes, clients fall back to the
+    original picture.
+    """
+    # {variant: {format: storage name}} written by build_profile_picture_variants()
+    profile_picture_variants = models.JSONField(default=dict, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        uploaded = bool(self.profile_picture) and not self.profile_picture._committed
+        if uploaded or not self.profile_picture:
+            self.profile_picture_variants = {}
+        super().save(*args, **kwargs)
+        if uploaded:
+            transaction.on_commit(partial(images.submit, build_profile_picture_variants, self.profile_picture.name))
+
+
+def build_profile_picture_variants(name):
+    """
+    Sanitize the stored picture `name`, render its variants and record them
+    on every application and profile using that file.
+
+    The new files are written under new names and the rows switched to
+    them in one transaction; the files they replace are deleted once it
+    has committed.
+    """
+    from authentication.cache import invalidate_profile
+
+    new_name, variants = images.render_variants(name)
+    replaced = {name} - {new_name}
+    with transaction.atomic():
+        applications = PsychartistApplication.objects.filter(profile_picture=name)
+        profiles = Psychartist.objects.filter(profile_picture=name)
+        for queryset in (applications, profiles):
+            for old_variants in queryset.values_list('profile_picture_variants', flat=True):
+                replaced |= images.variant_names(old_variants)
+        user_ids = list(profiles.values_list('user_id', flat=True))
+        applications.update(profile_picture=new_name, profile_picture_variants=variants)
+        # update() skips save(), so the caches that embed the picture are dropped here
+        profiles.update(profile_picture=new_name, profile_picture_variants=variants)
+        transaction.on_commit(partial(images.delete_files, replaced - images.variant_names(variants)))
+    if user_ids:
+        invalidate_directory()
+        for user_id in user_ids:
+            invalidate_profile(user_id)
+    return variants
+
+
+class PsychartistApplication(ProfilePictureModel):
     STATUS_CHOICES = [
         ('pending', 'Pending Review'),
         ('approved', 'Approved'),
@@ -43,9 +111,97 @@ class PsychartistApplication(models.Model):
     
     class Meta:
         ordering = ['-applied_at']
+        indexes = [
+            # Serves the review queue (?status=, oldest first) and the per-status counts
+            models.Index(fields=['status', 'applied_at', 'id'], name='application_queue_idx'),
+        ]
+
+
+DIRECTORY_FILTER = Q(is_active=True, is_verified=True)
+
+
+def rating_average(rating_sum, total_reviews):
+    """
+    SQL for `rating_sum / total_reviews` as written to average_rating:
+    a decimal rounded to the field's places, 0 without reviews.
+    """
+    field = Psychartist._meta.get_field('average_rating')
+    decimal = models.DecimalField(max_digits=field.max_digits, decimal_places=field.decimal_places)
+    average = Cast(Cast(rating_sum, FloatField()) / total_reviews, decimal)
+    return Case(
+        When(GreaterThan(total_reviews, 0), then=Round(average, field.decimal_places)),
+        default=Value(Decimal(0)),
+        output_field=decimal,
+    )
+
+
+class PsychartistQuerySet(models.QuerySet):
+    def directory(self):
+        """Profiles listed in the public directory."""
+        return self.filter(DIRECTORY_FILTER)
+
+    def update_search_document(self):
+        """Rebuild search_document for every row in the queryset with one UPDATE."""
+        if is_postgres(connections[self.db]):
+            document = (
+                SearchVector('full_name', weight='A', config=SEARCH_CONFIG)
+                + SearchVector('specialization', 'approach', weight='B', config=SEARCH_CONFIG)
+                + SearchVector('languages', weight='C', config=SEARCH_CONFIG)
+                + SearchVector('bio', weight='D', config=SEARCH_CONFIG)
+            )
+        else:
+            document = Lower(Concat(
+                'full_name', Value(' '), 'specialization', Value(' '), 'approach', Value(' '),
+                'languages', Value(' '), 'bio', output_field=TextField(),
+            ))
+        return self.update(search_document=document)
+
+    def search(self, query):
+        """Rows matching every word of `query`, annotated with a relevance `rank`."""
+        terms = search_terms(query)
+        if not terms:
+            return self.none()
+
+        if is_postgres(connections[self.db]):
+            search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+            return self.filter(search_document=search_query).annotate(
+                rank=SearchRank(F('search_document'), search_query)
+            )
+
+        # Without tsvector support, weight each term by the field it matched in
+        # roughly the way the PostgreSQL document weights A-D do.
+        queryset = self
+        rank = Value(0.0)
+        for term in terms:
+            queryset = queryset.filter(search_document__contains=term)
+            rank = rank + Case(
+                When(full_name__icontains=term, then=Value(1.0)),
+                When(Q(specialization__icontains=term) | Q(approach__icontains=term), then=Value(0.4)),
+                When(languages__icontains=term, then=Value(0.2)),
+                default=Value(0.1),
+                output_field=FloatField(),
+            )
+        return queryset.annotate(rank=rank)
+
+    def add_ratings(self, rating_delta, count_delta):
+        """
+        Add `rating_delta` to the running rating sum and `count_delta` to
+        total_reviews, and rewrite average_rating from the two, in one UPDATE.
+
+        The new values are computed by the database from the row as it is
+        when the UPDATE runs, so concurrent reviews never overwrite each
+        other's changes. update() skips save(), so callers drop the caches.
+        """
+        rating_sum = F('rating_sum') + rating_delta
+        total_reviews = F('total_reviews') + count_delta
+        return self.update(
+            rating_sum=rating_sum,
+            total_reviews=total_reviews,
+            average_rating=rating_average(rating_sum, total_reviews),
+        )
 
 
-class Psychartist(models.Model):
+class Psychartist(ProfilePictureModel):
     # Link to user account
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='psychartist_profile')
     application = models.OneToOneField(PsychartistApplication, on_delete=models.CASCADE, related_name='psychartist_profile')
@@ -72,12 +228,123 @@ class Psychartist(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
-    # Rating and Reviews (for future use)
+    # Rating and Reviews, kept in step with Review by add_ratings(); average_rating
+    # is stored so the directory can sort on its index
     average_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.00)
     total_reviews = models.IntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+
+    # Weighted name/specialization/approach/languages/bio document for directory search
+    search_document = SearchDocumentField(null=True, editable=False)
+
+    objects = PsychartistQuerySet.as_manager()
     
     def __str__(self):
         return f"Dr. {self.full_name}"
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            Psychartist.objects.filter(pk=self.pk).update_search_document()
+            transaction.on_commit(invalidate_directory)
     
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            # Partial indexes over the public directory for its filters and sort keys
+            models.Index(fields=['specialization'], condition=DIRECTORY_FILTER, name='psych_dir_specialization_idx'),
+            models.Index(fields=['-average_rating'], condition=DIRECTORY_FILTER, name='psych_dir_rating_idx'),
+            models.Index(fields=['session_rate'], condition=DIRECTORY_FILTER, name='psych_dir_rate_idx'),
+            models.Index(fields=['years_of_experience'], condition=DIRECTORY_FILTER, name='psych_dir_experience_idx'),
+        ]
+
+
+RATING_MIN = 1
+RATING_MAX = 5
+
+
+def ratings_changed(psychartist_id, rating_delta, count_delta):
+    """
+    Apply a change in `psychartist_id`'s reviews to its rating aggregates
+    and drop the caches that show them once the transaction commits.
+    """
+    from authentication.cache import invalidate_profile
+
+    profiles = Psychartist.objects.filter(pk=psychartist_id)
+    if not profiles.add_ratings(rating_delta, count_delta):
+        return
+    # The directory cards and the owner's auth profile both embed the rating
+    transaction.on_commit(invalidate_directory)
+    user_id = profiles.values_list('user_id', flat=True).first()
+    if user_id is not None:
+        transaction.on_commit(partial(invalidate_profile, user_id))
+
+
+def psychartist_deleted(sender, instance, **kwargs):
+    """post_delete receiver, so queryset, admin and cascaded deletes drop the directory too."""
+    transaction.on_commit(invalidate_directory)
+
+
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    """post_save receiver for the user model; directory entries show the psychartist's username."""
+    if update_fields is not None and 'username' not in update_fields:
+        # Sign-ins save last_login alone
+        return
+    if Psychartist.objects.filter(user_id=instance.pk).exists():
+        transaction.on_commit(invalidate_directory)
+
+
+def review_deleted(sender, instance, origin=None, **kwargs):
+    origin_model = origin.model if isinstance(origin, models.QuerySet) else type(origin)
+    if origin_model is Psychartist:
+        # Cascaded from deleting the psychartist; its aggregates go with it
+        return
+    ratings_changed(instance.psychartist_id, -instance.rating, -1)
+
+
+class Review(models.Model):
+    """
+    A user's rating of a psychartist, at most one per pair.
+
+    Saving adds the change to the psychartist's running rating sum and
+    count; deletes, including those cascaded from a user or queryset, take
+    it away through review_deleted() on post_delete. bulk_create() and
+    update() skip both, so `manage.py reconcile_ratings` repairs the
+    aggregates after them.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='psychartist_reviews')
+    psychartist = models.ForeignKey(Psychartist, on_delete=models.CASCADE, related_name='reviews')
+    rating = models.PositiveSmallIntegerField(
+        validators=[MinValueValidator(RATING_MIN), MaxValueValidator(RATING_MAX)]
+    )
+    comment = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'psychartist'], name='review_one_per_user'),
+            models.CheckConstraint(
+                check=Q(rating__gte=RATING_MIN, rating__lte=RATING_MAX), name='review_rating_range'
+            ),
+        ]
+        indexes = [
+            # Serves a psychartist's reviews, newest first, and the per-profile sums
+            models.Index(fields=['psychartist', '-created_at', '-id'], name='review_psych_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.psychartist} ({self.rating})"
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            previous = None
+            if self.pk is not None:
+                # Locked so two edits of one review can't both apply their delta against the same old rating
+                previous = Review.objects.select_for_update().filter(pk=self.pk).values_list('rating', flat=True).first()
+            super().save(*args, **kwargs)
+            if previous is None:
+                ratings_changed(self.psychartist_id, self.rating, 1)
+            elif previous != self.rating:
+                ratings_changed(self.psychartist_id, self.rating - previous, 0)
@@ -0,0 +1,81 @@
+from functools import partial
+
+from django.db import transaction
+from django.utils import timezone
+
+from authentication.cache import invalidate_profile
+from .cache import invalidate_directory
+from .models import Psychartist, PsychartistApplication
+
+APPROVED = 'approved'
+REJECTED = 'rejected'
+DECISIONS = (APPROVED, REJECTED)
+
+# Copied from the application onto the psychartist profile on approval
+PROFILE_FIELDS = (
+    'full_name', 'license_number', 'contact_email', 'phone_number',
+    'profile_picture', 'profile_picture_variants', 'specialization',
+    'years_of_experience', 'education', 'certifications', 'approach',
+    'languages', 'available_hours', 'session_rate', 'bio',
+)
+
+
+def review_applications(application_ids, decision, reviewer, notes='', from_statuses=('pending',)):
+    """
+    Approve or reject applications in one transaction and return the ids
+    of those actually reviewed.
+
+    The applications are locked with SELECT ... FOR UPDATE and only those
+    still in `from_statuses` move to `decision`, so two reviewers acting at
+    once never both process the same application; the second finds it
+    already reviewed and skips it. Approving upserts every profile with one
+    INSERT ... ON CONFLICT (user) DO UPDATE; rejecting deactivates any
+    existing profile. The query count does not depend on how many
+    applications are reviewed.
+
+    Rows are written with update() and bulk_create(), which skip save() and
+    its signals, so the search documents and the directory and profile
+    caches are refreshed here.
+    """
+    if decision not in DECISIONS:
+        raise ValueError(f'Unknown decision {decision!r}')
+
+    with transaction.atomic():
+        applications = list(
+            PsychartistApplication.objects.select_for_update()
+            .filter(id__in=application_ids, status__in=from_statuses)
+            .order_by('id')
+        )
+        if not applications:
+            return []
+        reviewed_ids = [application.id for application in applications]
+        user_ids = [application.user_id for application in applications]
+
+        PsychartistApplication.objects.filter(id__in=reviewed_ids).update(
+            status=decision, reviewed_at=timezone.now(), reviewed_by=reviewer, review_notes=notes
+        )
+        profiles = Psychartist.objects.filter(user_id__in=user_ids)
+        if decision == APPROVED:
+            Psychartist.objects.bulk_create(
+                [
+                    Psychartist(
+                        user_id=application.user_id,
+                        application=application,
+                        is_active=True,
+                        is_verified=True,
+                        **{field: getattr(application, field) for field in PROFILE_FIELDS},
+                    )
+                    for application in applications
+                ],
+                update_conflicts=True,
+                unique_fields=['user'],
+                update_fields=['application', 'is_active', 'is_verified', 'updated_at', *PROFILE_FIELDS],
+            )
+            profiles.update_search_document()
+        else:
+            profiles.update(is_active=False, is_verified=False, updated_at=timezone.now())
+
+        transaction.on_commit(invalidate_directory)
+        for user_id in user_ids:
+            transaction.on_commit(partial(invalidate_profile, user_id))
+    return reviewed_ids
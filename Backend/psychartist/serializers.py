@@ -1,17 +1,52 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
 from rest_framework import serializers
-from .models import PsychartistApplication, Psychartist
+from .images import InvalidImage, check_upload
+from .models import PsychartistApplication, Psychartist, Review
+from .review import DECISIONS
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """
+    URLs of the generated profile picture variants, as
+    {"thumbnail": {"webp": url, "jpeg": url}, "card": {...}};
+    null until they have been built.
+    """
+
+    def to_representation(self, variants):
+        if not variants:
+            return None
+        request = self.context.get('request')
+        urls = {}
+        for variant, names in variants.items():
+            urls[variant] = {}
+            for image_format, name in names.items():
+                url = default_storage.url(name)
+                urls[variant][image_format] = request.build_absolute_uri(url) if request else url
+        return urls
+
 
 class PsychartistApplicationSerializer(serializers.ModelSerializer):
+    profile_picture_variants = ImageVariantsField()
+
     class Meta:
         model = PsychartistApplication
         fields = [
             'id', 'full_name', 'license_number', 'contact_email', 'phone_number',
-            'profile_picture', 'specialization', 'years_of_experience', 'education', 
+            'profile_picture', 'profile_picture_variants', 'specialization', 'years_of_experience', 'education', 
             'certifications', 'approach', 'languages', 'available_hours', 'session_rate', 
             'bio', 'status', 'applied_at', 'reviewed_at', 'review_notes'
         ]
         read_only_fields = ['id', 'status', 'applied_at', 'reviewed_at', 'review_notes']
     
+    def validate_profile_picture(self, value):
+        if value is not None:
+            try:
+                check_upload(value)
+            except InvalidImage as exc:
+                raise serializers.ValidationError(str(exc))
+        return value
+
     def create(self, validated_data):
         # Set the user from the request context
         validated_data['user'] = self.context['request'].user
@@ -20,26 +55,37 @@ class PsychartistApplicationSerializer(serializers.ModelSerializer):
 class PsychartistApplicationAdminSerializer(serializers.ModelSerializer):
     user_email = serializers.EmailField(source='user.email', read_only=True)
     user_username = serializers.CharField(source='user.username', read_only=True)
+    profile_picture_variants = ImageVariantsField()
     
     class Meta:
         model = PsychartistApplication
         fields = [
             'id', 'user_email', 'user_username', 'full_name', 'license_number', 
-            'contact_email', 'phone_number', 'profile_picture', 'specialization', 
+            'contact_email', 'phone_number', 'profile_picture', 'profile_picture_variants', 'specialization', 
             'years_of_experience', 'education', 'certifications', 'approach', 'languages', 
             'available_hours', 'session_rate', 'bio', 'status', 'applied_at', 
             'reviewed_at', 'review_notes'
         ]
         read_only_fields = ['id', 'user_email', 'user_username', 'applied_at']
 
+class ApplicationReviewSerializer(serializers.Serializer):
+    application_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.APPLICATION_REVIEW_MAX_ITEMS,
+    )
+    decision = serializers.ChoiceField(choices=DECISIONS)
+    review_notes = serializers.CharField(required=False, allow_blank=True, default='')
+
 class PsychartistSerializer(serializers.ModelSerializer):
     user_username = serializers.CharField(source='user.username', read_only=True)
+    profile_picture_variants = ImageVariantsField()
     
     class Meta:
         model = Psychartist
         fields = [
             'id', 'user_username', 'full_name', 'license_number', 'contact_email',
-            'phone_number', 'profile_picture', 'specialization', 'years_of_experience', 
+            'phone_number', 'profile_picture', 'profile_picture_variants', 'specialization', 'years_of_experience', 
             'education', 'certifications', 'approach', 'languages', 'available_hours',
             'session_rate', 'bio', 'is_active', 'is_verified', 'average_rating',
             'total_reviews', 'created_at', 'updated_at'
@@ -47,4 +93,27 @@ class PsychartistSerializer(serializers.ModelSerializer):
         read_only_fields = [
             'id', 'user_username', 'is_verified', 'average_rating', 'total_reviews',
             'created_at', 'updated_at'
-        ]
\ No newline at end of file
+        ]
+
+class PsychartistCardSerializer(serializers.ModelSerializer):
+    """Directory card: leaves out the long text fields served by the detail view."""
+    bio_excerpt = serializers.CharField(read_only=True)
+    profile_picture_variants = ImageVariantsField()
+
+    class Meta:
+        model = Psychartist
+        fields = [
+            'id', 'full_name', 'profile_picture', 'profile_picture_variants', 'specialization', 'years_of_experience',
+            'approach', 'languages', 'session_rate', 'average_rating', 'total_reviews',
+            'bio_excerpt'
+        ]
+        read_only_fields = fields
+
+
+class ReviewSerializer(serializers.ModelSerializer):
+    user_username = serializers.CharField(source='user.username', read_only=True)
+
+    class Meta:
+        model = Review
+        fields = ['id', 'user_username', 'rating', 'comment', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'user_username', 'created_at', 'updated_at']
@@ -1,3 +1,425 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import QueryDict
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from . import images
+from .cache import directory_cache, invalidate_directory, variant_key
+from .models import Psychartist, PsychartistApplication, Review, build_profile_picture_variants
+
+User = get_user_model()
+
+LOCAL_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'psychartist-tests'},
+    'auth': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'psychartist-tests-auth'},
+}
+
+
+def create_psychartist(username, **fields):
+    user = User.objects.create_user(username=username, email=f'{username}@example.com')
+    profile = {
+        'full_name': f'{username.title()} Example', 'license_number': 'LIC-1', 'contact_email': user.email,
+        'phone_number': '555-0100', 'specialization': 'Anxiety', 'years_of_experience': 5,
+        'education': 'PhD', 'approach': 'CBT', 'bio': 'Helps with anxiety.', **fields,
+    }
+    application = PsychartistApplication.objects.create(user=user, status='approved', **profile)
+    return Psychartist.objects.create(user=user, application=application, **profile)
+
+
+class PsychartistListFilterTests(TestCase):
+    url = '/api/psychartist/'
+
+    def test_rejects_values_that_are_not_numbers(self):
+        for param, value in [
+            ('min_rate', 'NaN'), ('max_rate', 'Infinity'), ('min_rate', 'sNaN'), ('max_rate', '-inf'),
+            ('min_rate', 'ten'), ('min_experience', '2.5'),
+        ]:
+            with self.subTest(param=param, value=value):
+                response = self.client.get(self.url, {param: value})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {param: 'Must be a number.'})
+
+    def test_accepts_numbers(self):
+        response = self.client.get(self.url, {'min_rate': '10.50', 'max_rate': '1e3', 'min_experience': '2'})
+        self.assertEqual(response.status_code, 200)
+
+
+# Caching needs a shared cache; treat the local one as shared
+@override_settings(CACHES=LOCAL_CACHES)
+@mock.patch('psychartist.cache.is_shared_cache', return_value=True)
+class PsychartistDirectoryCacheTests(TestCase):
+    def setUp(self):
+        directory_cache().clear()
+        self.psychartist = create_psychartist('ada', specialization='Grief')
+
+    def listed_ids(self, **params):
+        return [row['id'] for row in self.client.get('/api/psychartist/', params).json()]
+
+    def cached(self, name, query=''):
+        return directory_cache().get(variant_key(name, QueryDict(query)))
+
+    def test_queryset_delete_drops_cached_directory(self, _):
+        self.assertEqual(self.listed_ids(), [self.psychartist.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            Psychartist.objects.filter(pk=self.psychartist.pk).delete()
+        self.assertEqual(self.listed_ids(), [])
+        self.assertEqual(self.client.get(f'/api/psychartist/{self.psychartist.pk}/').status_code, 404)
+
+    def test_user_delete_drops_cached_directory(self, _):
+        self.assertEqual(self.listed_ids(), [self.psychartist.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.psychartist.user_id).delete()
+        self.assertEqual(self.listed_ids(), [])
+
+    def test_username_change_drops_cached_detail(self, _):
+        url = f'/api/psychartist/{self.psychartist.pk}/'
+        self.assertEqual(self.client.get(url).json()['user_username'], 'ada')
+        user = self.psychartist.user
+        user.username = 'ada-l'
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.assertEqual(self.client.get(url).json()['user_username'], 'ada-l')
+
+    def test_sign_in_keeps_cached_directory(self, _):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.psychartist.user.save(update_fields=['last_login'])
+        self.assertNotIn(invalidate_directory, callbacks)
+
+    def test_caches_only_bounded_variants(self, _):
+        self.listed_ids()
+        self.listed_ids(specialization='Grief', ordering='-rating')
+        self.listed_ids(specialization='No such thing')
+        self.listed_ids(q='grief')
+        self.listed_ids(min_rate='10')
+        self.assertIsNotNone(self.cached('list'))
+        self.assertIsNotNone(self.cached('list', 'specialization=Grief&ordering=-rating'))
+        self.assertIsNone(self.cached('list', 'specialization=No+such+thing'))
+        self.assertIsNone(self.cached('list', 'q=grief'))
+        self.assertIsNone(self.cached('list', 'min_rate=10'))
+
+    def test_serves_stale_entry_while_another_request_rebuilds(self, _):
+        self.assertEqual(self.listed_ids(), [self.psychartist.pk])
+        other = create_psychartist('grace')
+        invalidate_directory()
+        lock_key = f"{variant_key('list', QueryDict())}:lock"
+        directory_cache().add(lock_key, 1)
+        self.assertEqual(self.listed_ids(), [self.psychartist.pk])
+        directory_cache().delete(lock_key)
+        self.assertEqual(self.listed_ids(), [other.pk, self.psychartist.pk])
+
+    def test_not_cached_without_shared_cache(self, is_shared_cache):
+        is_shared_cache.return_value = False
+        self.listed_ids()
+        self.assertIsNone(self.cached('list'))
+
+
+class ApplicationQueuePaginationTests(TestCase):
+    """The review queue pages on (applied_at, id), oldest first."""
+    url = '/api/psychartist/admin/applications/'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser(username='queue-admin', email='queue-admin@example.com'))
+        start = timezone.now() - timedelta(days=1)
+        self.applications = []
+        for i in range(5):
+            application = create_psychartist(f'applicant{i}').application
+            # Two applications share each timestamp; applied_at is auto_now_add
+            PsychartistApplication.objects.filter(pk=application.pk).update(applied_at=start + timedelta(hours=i // 2))
+            self.applications.append(application.pk)
+
+    def test_pages_oldest_first(self):
+        response = self.client.get(self.url, {'limit': 2})
+        seen = [row['id'] for row in response.json()['results']]
+        while response.json()['next_cursor']:
+            response = self.client.get(self.url, {'limit': 2, 'cursor': response.json()['next_cursor']})
+            seen += [row['id'] for row in response.json()['results']]
+        self.assertEqual(seen, self.applications)
+
+    def test_always_paginated(self):
+        body = self.client.get(self.url).json()
+        self.assertEqual([row['id'] for row in body['results']], self.applications)
+        self.assertIsNone(body['next_cursor'])
+
+
+def image_bytes(image_format='PNG', size=(40, 30), **options):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, format=image_format, **options)
+    return buffer.getvalue()
+
+
+def animated_gif():
+    buffer = io.BytesIO()
+    first, second = Image.new('RGB', (20, 20), 'red'), Image.new('RGB', (20, 20), 'blue')
+    first.save(buffer, format='GIF', save_all=True, append_images=[second])
+    return buffer.getvalue()
+
+
+class CheckUploadTests(TestCase):
+    def check(self, content, name='picture.png'):
+        images.check_upload(SimpleUploadedFile(name, content))
+
+    def assertRejected(self, content, message):
+        with self.assertRaisesMessage(images.InvalidImage, message):
+            self.check(content)
+
+    def test_accepts_allowed_formats(self):
+        for image_format in ('JPEG', 'PNG', 'WEBP', 'GIF'):
+            with self.subTest(image_format=image_format):
+                self.check(image_bytes(image_format))
+
+    def test_rejects_other_files(self):
+        self.assertRejected(b'not an image', 'Upload a valid')
+        self.assertRejected(image_bytes('BMP'), 'Upload a valid')
+
+    def test_rejects_animated_gifs(self):
+        self.assertRejected(animated_gif(), 'Animated images are not supported.')
+
+    def test_rejects_large_files_and_dimensions(self):
+        with override_settings(PROFILE_PICTURE_MAX_BYTES=100):
+            self.assertRejected(image_bytes(size=(400, 400)), 'smaller than')
+        with mock.patch.object(images, 'MAX_PIXELS', 1000):
+            self.assertRejected(image_bytes(), 'Image dimensions are too large.')
+
+    def test_upload_is_rewound(self):
+        upload = SimpleUploadedFile('picture.png', image_bytes())
+        images.check_upload(upload)
+        self.assertEqual(upload.tell(), 0)
+
+
+class ProfilePictureVariantTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root, CACHES=LOCAL_CACHES)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.psychartist = create_psychartist('painter')
+
+    def store(self, content, name='psychartist_profiles/painter.jpg'):
+        name = default_storage.save(name, ContentFile(content))
+        PsychartistApplication.objects.filter(pk=self.psychartist.application_id).update(profile_picture=name)
+        Psychartist.objects.filter(pk=self.psychartist.pk).update(profile_picture=name)
+        return name
+
+    def build(self, name):
+        with self.captureOnCommitCallbacks(execute=True):
+            return build_profile_picture_variants(name)
+
+    def test_upload_queues_variants(self):
+        application = self.psychartist.application
+        application.profile_picture_variants = {'card': {'webp': 'old.webp'}}
+        application.profile_picture = SimpleUploadedFile('new.png', image_bytes())
+        with mock.patch.object(images, 'submit') as submit, self.captureOnCommitCallbacks(execute=True):
+            application.save()
+        self.assertEqual(application.profile_picture_variants, {})
+        submit.assert_called_once_with(build_profile_picture_variants, application.profile_picture.name)
+
+    def test_original_is_sanitized_and_variants_sized(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90 degrees to display
+        exif[0x010F] = 'Camera maker'
+        name = self.store(image_bytes('JPEG', size=(2000, 1000), exif=exif.tobytes()))
+        variants = self.build(name)
+
+        self.psychartist.refresh_from_db()
+        new_name = self.psychartist.profile_picture.name
+        self.assertNotEqual(new_name, name)
+        with default_storage.open(new_name) as stored, Image.open(stored) as original:
+            self.assertEqual(original.size, (800, 1600))
+            self.assertEqual(len(original.getexif()), 0)
+        self.assertEqual(self.psychartist.profile_picture_variants, variants)
+        self.assertEqual(PsychartistApplication.objects.get().profile_picture_variants, variants)
+        for variant, size in images.VARIANT_SIZES.items():
+            for image_format, variant_name in variants[variant].items():
+                with default_storage.open(variant_name) as stored, Image.open(stored) as rendered:
+                    self.assertEqual(rendered.size, (size, size))
+                    self.assertEqual(rendered.format, images.VARIANT_FORMATS[image_format][0])
+
+    def test_replaced_files_are_deleted_after_commit(self):
+        name = self.store(image_bytes())
+        first = self.build(name)
+        self.assertFalse(default_storage.exists(name))
+
+        self.psychartist.refresh_from_db()
+        current = self.psychartist.profile_picture.name
+        with self.captureOnCommitCallbacks() as callbacks:
+            second = build_profile_picture_variants(current)
+        # Until the rows point at the new files, the old ones stay readable
+        for old_name in images.variant_names(first) | {current}:
+            self.assertTrue(default_storage.exists(old_name))
+        for callback in callbacks:
+            callback()
+
+        new_names = images.variant_names(second)
+        self.assertFalse(new_names & images.variant_names(first))
+        for old_name in images.variant_names(first) | {current}:
+            self.assertFalse(default_storage.exists(old_name))
+        for new_name in new_names:
+            self.assertTrue(default_storage.exists(new_name))
+
+    def test_animated_pictures_are_left_alone(self):
+        name = self.store(animated_gif(), 'psychartist_profiles/painter.gif')
+        with self.assertRaises(images.InvalidImage):
+            self.build(name)
+        self.psychartist.refresh_from_db()
+        self.assertEqual(self.psychartist.profile_picture.name, name)
+        with default_storage.open(name) as stored, Image.open(stored) as image:
+            self.assertTrue(image.is_animated)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class RatingAggregateTests(TestCase):
+    def setUp(self):
+        self.psychartist = create_psychartist('rated')
+        self.reviewers = [
+            User.objects.create_user(username=f'reviewer-{i}', email=f'reviewer-{i}@example.com') for i in range(3)
+        ]
+
+    def review(self, reviewer, rating):
+        return Review.objects.create(user=self.reviewers[reviewer], psychartist=self.psychartist, rating=rating)
+
+    def aggregates(self):
+        return Psychartist.objects.values_list('rating_sum', 'total_reviews', 'average_rating').get(pk=self.psychartist.pk)
+
+    def test_saves_and_deletes_keep_aggregates(self):
+        first = self.review(0, 4)
+        self.review(1, 5)
+        second = self.review(2, 1)
+        self.assertEqual(self.aggregates(), (10, 3, Decimal('3.33')))
+        # Stored rounded, so filters and the directory ordering see the same value
+        self.assertTrue(Psychartist.objects.filter(average_rating=Decimal('3.33')).exists())
+        second.rating = 2
+        second.save()
+        self.assertEqual(self.aggregates(), (11, 3, Decimal('3.67')))
+        first.delete()
+        self.assertEqual(self.aggregates(), (7, 2, Decimal('3.50')))
+        Review.objects.all().delete()
+        self.assertEqual(self.aggregates(), (0, 0, Decimal('0.00')))
+
+    def test_reviewer_deletion_removes_their_rating(self):
+        self.review(0, 4)
+        self.review(1, 1)
+        self.reviewers[1].delete()
+        self.assertEqual(self.aggregates(), (4, 1, Decimal('4.00')))
+
+    def test_cascade_from_psychartist_skips_rating_updates(self):
+        for reviewer in range(3):
+            self.review(reviewer, 5)
+        with CaptureQueriesContext(connection) as queries:
+            self.psychartist.delete()
+        table = Psychartist._meta.db_table
+        updates = [query['sql'] for query in queries if query['sql'].startswith(f'UPDATE "{table}"')]
+        self.assertEqual(updates, [])
+        self.assertFalse(Review.objects.exists())
+
+    def test_edit_applies_delta_against_stored_rating(self):
+        review = self.review(0, 1)
+        stale = Review.objects.get(pk=review.pk)
+        review.rating = 5
+        review.save()
+        # A copy loaded before the first edit still moves the sum by the stored rating
+        stale.rating = 3
+        stale.save()
+        self.assertEqual(self.aggregates(), (3, 1, Decimal('3.00')))
+
+
+class ReconcileRatingsTests(TestCase):
+    def setUp(self):
+        self.psychartists = [create_psychartist(f'reconcile-{i}') for i in range(3)]
+        reviewer = User.objects.create_user(username='reconciler', email='reconciler@example.com')
+        for psychartist, rating in zip(self.psychartists, (5, 4, 2)):
+            Review.objects.create(user=reviewer, psychartist=psychartist, rating=rating)
+        # update() skips the running aggregates, as bulk edits and raw SQL would
+        Psychartist.objects.filter(pk__in=[p.pk for p in self.psychartists[:2]]).update(
+            rating_sum=0, total_reviews=7, average_rating=Decimal('1.00')
+        )
+
+    def reconcile(self, *args):
+        out = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('reconcile_ratings', *args, stdout=out)
+        return out.getvalue()
+
+    def aggregates(self):
+        return list(Psychartist.objects.order_by('id').values_list('rating_sum', 'total_reviews', 'average_rating'))
+
+    def test_repairs_drifted_profiles(self):
+        output = self.reconcile('--chunk-size', '2')
+        self.assertIn('Done: 2 of 3 profiles repaired', output)
+        self.assertEqual(self.aggregates(), [
+            (5, 1, Decimal('5.00')), (4, 1, Decimal('4.00')), (2, 1, Decimal('2.00')),
+        ])
+        self.assertIn('Done: 0 of 3 profiles repaired', self.reconcile())
+
+    def test_dry_run_changes_nothing(self):
+        before = self.aggregates()
+        self.assertIn('Done: 2 of 3 profiles found', self.reconcile('--dry-run'))
+        self.assertEqual(self.aggregates(), before)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+@override_settings(CACHES=LOCAL_CACHES)
+class ConcurrentReviewEditTests(TransactionTestCase):
+    """Two edits of one review in flight at once both land on the stored rating."""
+
+    def test_second_edit_waits_for_the_first(self):
+        psychartist = create_psychartist('concurrent')
+        reviewer = User.objects.create_user(username='concurrent-reviewer', email='concurrent-reviewer@example.com')
+        review = Review.objects.create(user=reviewer, psychartist=psychartist, rating=1)
+        first_saved, release_first, second_started = threading.Event(), threading.Event(), threading.Event()
+        errors = []
+
+        def edit(rating, before_save=None, after_save=None):
+            try:
+                stale = Review.objects.get(pk=review.pk)
+                stale.rating = rating
+                with transaction.atomic():
+                    if before_save:
+                        before_save()
+                    stale.save()
+                    if after_save:
+                        after_save()
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        def hold():
+            first_saved.set()
+            release_first.wait(5)
+
+        first = threading.Thread(target=edit, args=(5,), kwargs={'after_save': hold})
+        first.start()
+        first_saved.wait(5)
+        second = threading.Thread(target=edit, args=(3,), kwargs={'before_save': second_started.set})
+        second.start()
+        second_started.wait(5)
+        # The second save blocks on the row lock until the first commits
+        second.join(0.5)
+        self.assertTrue(second.is_alive())
+        release_first.set()
+        first.join(5)
+        second.join(5)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            Psychartist.objects.values_list('rating_sum', 'total_reviews', 'average_rating').get(pk=psychartist.pk),
+            (3, 1, Decimal('3.00')),
+        )
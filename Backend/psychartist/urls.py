@@ -8,10 +8,14 @@ urlpatterns = [
     
     # Admin endpoints
     path('admin/applications/', views.PsychartistApplicationListView.as_view(), name='admin-applications'),
+    path('admin/applications/counts/', views.PsychartistApplicationCountsView.as_view(), name='application-counts'),
+    path('admin/applications/review/', views.PsychartistApplicationReviewView.as_view(), name='review-applications'),
     path('admin/applications/<int:application_id>/approve/', views.approve_psychartist_application, name='approve-application'),
     path('admin/applications/<int:application_id>/reject/', views.reject_psychartist_application, name='reject-application'),
     
     # Public endpoints
     path('', views.PsychartistListView.as_view(), name='psychartist-list'),
     path('<int:pk>/', views.PsychartistDetailView.as_view(), name='psychartist-detail'),
+    path('<int:pk>/reviews/', views.PsychartistReviewListView.as_view(), name='psychartist-reviews'),
+    path('<int:pk>/reviews/mine/', views.PsychartistOwnReviewView.as_view(), name='psychartist-own-review'),
 ]
\ No newline at end of file
@@ -1,12 +1,27 @@
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
-from django.utils import timezone
-from .models import PsychartistApplication, Psychartist
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from decimal import Decimal, InvalidOperation
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+from django.db.models.functions import Substr
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from api.conditional import conditional_response, make_etag
+from api.pagination import KeysetPagination
+from .cache import caching_enabled, get_or_build, variant_key
+from .models import PsychartistApplication, Psychartist, Review
+from .review import APPROVED, REJECTED, review_applications
 from .serializers import (
+    ApplicationReviewSerializer,
     PsychartistApplicationSerializer, 
     PsychartistApplicationAdminSerializer,
-    PsychartistSerializer
+    PsychartistSerializer,
+    PsychartistCardSerializer,
+    ReviewSerializer
 )
 
 class PsychartistApplicationCreateView(generics.CreateAPIView):
@@ -49,67 +64,78 @@ class PsychartistApplicationStatusView(generics.RetrieveAPIView):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        serializer = self.get_serializer(application)
-        return Response(serializer.data)
+        # Applicants cannot edit an application; only a review changes it
+        modified = application.reviewed_at or application.applied_at
+        etag = make_etag(application._meta.label, application.pk, application.status, modified.isoformat())
+        return conditional_response(
+            request, etag, modified, lambda: Response(self.get_serializer(application).data)
+        )
 
 # Admin Views (for superuser only)
+class ApplicationQueuePagination(KeysetPagination):
+    """Oldest application first, always paginated; the queue can be any length."""
+    ordering = ('applied_at', 'id')
+
+    def is_requested(self, request):
+        return True
+
+
+def status_filter(request):
+    value = request.query_params.get('status')
+    if value and value not in dict(PsychartistApplication.STATUS_CHOICES):
+        raise ValidationError({'status': f"Choose from {', '.join(dict(PsychartistApplication.STATUS_CHOICES))}."})
+    return value
+
+
 class PsychartistApplicationListView(generics.ListAPIView):
-    queryset = PsychartistApplication.objects.all()
+    """
+    The review queue, optionally narrowed with ?status=. Pages are read
+    from the (status, applied_at, id) index; see ApplicationQueuePagination.
+    """
+    queryset = PsychartistApplication.objects.select_related('user')
     serializer_class = PsychartistApplicationAdminSerializer
     permission_classes = [permissions.IsAdminUser]
+    pagination_class = ApplicationQueuePagination
     
     def get_queryset(self):
         queryset = super().get_queryset()
-        status_filter = self.request.query_params.get('status', None)
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
+        wanted = status_filter(self.request)
+        if wanted:
+            queryset = queryset.filter(status=wanted)
         return queryset
 
-@api_view(['POST'])
-@permission_classes([permissions.IsAdminUser])
-def approve_psychartist_application(request, application_id):
-    try:
-        application = PsychartistApplication.objects.get(id=application_id)
-    except PsychartistApplication.DoesNotExist:
+class PsychartistApplicationCountsView(generics.GenericAPIView):
+    """Applications per status, counted from the status index without loading any."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        counts = dict.fromkeys(dict(PsychartistApplication.STATUS_CHOICES), 0)
+        counts.update(
+            PsychartistApplication.objects.order_by().values_list('status').annotate(total=Count('id'))
+        )
+        return Response(counts)
+
+def review_one(request, application_id, decision):
+    """Review one application through the review service; returns an error Response if it can't be."""
+    if not PsychartistApplication.objects.filter(id=application_id).exists():
         return Response(
             {'error': 'Application not found.'},
             status=status.HTTP_404_NOT_FOUND
         )
-    
-    if application.status != 'pending':
+    if not review_applications([application_id], decision, request.user, request.data.get('review_notes', '')):
         return Response(
             {'error': 'Application has already been reviewed.'},
             status=status.HTTP_400_BAD_REQUEST
         )
-    
-    # Update application status
-    application.status = 'approved'
-    application.reviewed_at = timezone.now()
-    application.reviewed_by = request.user
-    application.review_notes = request.data.get('review_notes', '')
-    application.save()
-    
-    # Create Psychartist profile
-    psychartist = Psychartist.objects.create(
-        user=application.user,
-        application=application,
-        full_name=application.full_name,
-        license_number=application.license_number,
-        contact_email=application.contact_email,
-        phone_number=application.phone_number,
-        profile_picture=application.profile_picture,
-        specialization=application.specialization,
-        years_of_experience=application.years_of_experience,
-        education=application.education,
-        certifications=application.certifications,
-        approach=application.approach,
-        languages=application.languages,
-        available_hours=application.available_hours,
-        session_rate=application.session_rate,
-        bio=application.bio,
-        is_verified=True
-    )
-    
+    return None
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAdminUser])
+def approve_psychartist_application(request, application_id):
+    error = review_one(request, application_id, APPROVED)
+    if error is not None:
+        return error
+    psychartist = Psychartist.objects.only('id').get(application_id=application_id)
     return Response({
         'message': 'Application approved successfully!',
         'psychartist_id': psychartist.id
@@ -118,39 +144,218 @@ def approve_psychartist_application(request, application_id):
 @api_view(['POST'])
 @permission_classes([permissions.IsAdminUser])
 def reject_psychartist_application(request, application_id):
-    try:
-        application = PsychartistApplication.objects.get(id=application_id)
-    except PsychartistApplication.DoesNotExist:
-        return Response(
-            {'error': 'Application not found.'},
-            status=status.HTTP_404_NOT_FOUND
-        )
-    
-    if application.status != 'pending':
-        return Response(
-            {'error': 'Application has already been reviewed.'},
-            status=status.HTTP_400_BAD_REQUEST
-        )
-    
-    # Update application status
-    application.status = 'rejected'
-    application.reviewed_at = timezone.now()
-    application.reviewed_by = request.user
-    application.review_notes = request.data.get('review_notes', '')
-    application.save()
-    
+    error = review_one(request, application_id, REJECTED)
+    if error is not None:
+        return error
     return Response({
         'message': 'Application rejected.',
-        'review_notes': application.review_notes
+        'review_notes': request.data.get('review_notes', '')
     }, status=status.HTTP_200_OK)
 
-# Public Views
-class PsychartistListView(generics.ListAPIView):
-    queryset = Psychartist.objects.filter(is_active=True, is_verified=True)
-    serializer_class = PsychartistSerializer
+class PsychartistApplicationReviewView(generics.GenericAPIView):
+    """
+    Approve or reject many pending applications at once:
+
+        {"application_ids": [1, 2, 3], "decision": "approved", "review_notes": "..."}
+
+    Answers with the ids that were reviewed and those skipped because they
+    don't exist or were already reviewed.
+    """
+    serializer_class = ApplicationReviewSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        requested = list(dict.fromkeys(serializer.validated_data['application_ids']))
+        reviewed = review_applications(
+            requested,
+            serializer.validated_data['decision'],
+            request.user,
+            serializer.validated_data['review_notes'],
+        )
+        done = set(reviewed)
+        return Response({
+            'reviewed': reviewed,
+            'skipped': [application_id for application_id in requested if application_id not in done],
+        }, status=status.HTTP_200_OK)
+
+class CachedDirectoryMixin:
+    """
+    Serve GETs from the shared directory cache as pre-rendered JSON bytes.
+
+    Entries are keyed per view, URL kwargs and query string, and are all
+    dropped together whenever a directory profile changes (see cache.py).
+    Only requests limited to `cached_params` are cached, and a filtered list
+    that matches nothing is not stored, so arbitrary query strings cannot
+    fill the cache and evict the pages everyone reads. The ETag is a hash of
+    the bytes, so a repeat visit gets a 304.
+    """
+    cache_name = None
+    cached_params = ()
+
+    def is_cacheable(self, request):
+        params = request.query_params
+        return caching_enabled() and all(
+            key in self.cached_params and len(params.getlist(key)) == 1 for key in params
+        )
+
+    def get(self, request, *args, **kwargs):
+        def build():
+            return JSONRenderer().render(super(CachedDirectoryMixin, self).get(request, *args, **kwargs).data)
+
+        if self.is_cacheable(request):
+            name = ':'.join([self.cache_name, *(f'{k}={v}' for k, v in sorted(kwargs.items()))])
+            body = get_or_build(
+                variant_key(name, request.query_params), build,
+                keep=lambda body: body != b'[]' or not request.query_params,
+            )
+        else:
+            body = build()
+        etag = make_etag(body)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        return response
+
+class PsychartistListView(CachedDirectoryMixin, generics.ListAPIView):
+    """
+    Public directory of approved psychartists, as lightweight cards.
+
+    Query params:
+        q                   free-text search over name, specialization, approach and bio
+        specialization      exact specialization
+        language            language the psychartist offers (repeatable)
+        min_experience, max_experience   years of experience range
+        min_rate, max_rate  session rate range
+        ordering            rating, rate or experience, prefixed with '-' for descending
+    """
+    serializer_class = PsychartistCardSerializer
     permission_classes = [permissions.AllowAny]
+    cache_name = 'list'
+    # Free-text search and the range filters are built on every request
+    cached_params = ('specialization', 'ordering')
+    ordering_fields = {
+        'rating': 'average_rating',
+        'rate': 'session_rate',
+        'experience': 'years_of_experience',
+    }
+    card_fields = [
+        'id', 'full_name', 'profile_picture', 'profile_picture_variants', 'specialization',
+        'years_of_experience', 'approach', 'languages', 'session_rate', 'average_rating',
+        'total_reviews', 'created_at'
+    ]
+    bio_excerpt_length = 160
+
+    def get_queryset(self):
+        params = self.request.query_params
+        queryset = Psychartist.objects.directory()
+
+        query = params.get('q', '').strip()
+        if query:
+            queryset = queryset.search(query)
+
+        specialization = params.get('specialization')
+        if specialization:
+            queryset = queryset.filter(specialization=specialization)
+        for language in params.getlist('language'):
+            queryset = queryset.filter(languages__icontains=language.strip())
 
-class PsychartistDetailView(generics.RetrieveAPIView):
-    queryset = Psychartist.objects.filter(is_active=True, is_verified=True)
+        ranges = (
+            ('years_of_experience', 'min_experience', 'max_experience', int),
+            ('session_rate', 'min_rate', 'max_rate', Decimal),
+        )
+        for field, min_param, max_param, cast in ranges:
+            minimum = self.get_number(min_param, cast)
+            maximum = self.get_number(max_param, cast)
+            if minimum is not None:
+                queryset = queryset.filter(**{f'{field}__gte': minimum})
+            if maximum is not None:
+                queryset = queryset.filter(**{f'{field}__lte': maximum})
+
+        queryset = queryset.only(*self.card_fields).annotate(
+            bio_excerpt=Substr('bio', 1, self.bio_excerpt_length)
+        )
+        return queryset.order_by(*self.get_ordering(bool(query)))
+
+    def get_number(self, param, cast):
+        value = self.request.query_params.get(param)
+        if value in (None, ''):
+            return None
+        try:
+            number = cast(value)
+        except (ValueError, InvalidOperation):
+            raise ValidationError({param: 'Must be a number.'})
+        # Decimal also parses NaN, sNaN and Infinity, which cannot be compared with a rate
+        if isinstance(number, Decimal) and not number.is_finite():
+            raise ValidationError({param: 'Must be a number.'})
+        return number
+
+    def get_ordering(self, searching):
+        ordering = self.request.query_params.get('ordering')
+        if not ordering:
+            return ['-rank', 'id'] if searching else ['-created_at', 'id']
+        name = ordering.lstrip('-')
+        if name not in self.ordering_fields:
+            raise ValidationError({'ordering': f'Must be one of: {", ".join(self.ordering_fields)}.'})
+        prefix = '-' if ordering.startswith('-') else ''
+        return [f'{prefix}{self.ordering_fields[name]}', 'id']
+
+class PsychartistDetailView(CachedDirectoryMixin, generics.RetrieveAPIView):
+    queryset = Psychartist.objects.directory().select_related('user').defer('search_document')
     serializer_class = PsychartistSerializer
-    permission_classes = [permissions.AllowAny]
\ No newline at end of file
+    permission_classes = [permissions.AllowAny]
+    cache_name = 'detail'
+
+class ReviewPagination(KeysetPagination):
+    """Newest review first, always paginated; popular profiles collect many."""
+
+    def is_requested(self, request):
+        return True
+
+class PsychartistReviewListView(generics.ListCreateAPIView):
+    """
+    A directory psychartist's reviews, newest first. POST adds the signed-in
+    user's review; each user reviews a psychartist at most once and edits
+    it through PsychartistOwnReviewView afterwards.
+    """
+    serializer_class = ReviewSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = ReviewPagination
+
+    def get_psychartist(self):
+        return get_object_or_404(Psychartist.objects.directory().only('id', 'user_id'), pk=self.kwargs['pk'])
+
+    def get_queryset(self):
+        return Review.objects.filter(psychartist=self.get_psychartist()).select_related('user')
+
+    def create(self, request, *args, **kwargs):
+        psychartist = self.get_psychartist()
+        if psychartist.user_id == request.user.id:
+            return Response(
+                {'error': 'You cannot review your own profile.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            # Its own savepoint, so losing a race on the unique pair leaves the request's transaction usable
+            with transaction.atomic():
+                serializer.save(user=request.user, psychartist=psychartist)
+        except IntegrityError:
+            return Response(
+                {'error': 'You have already reviewed this psychartist.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+class PsychartistOwnReviewView(generics.RetrieveUpdateDestroyAPIView):
+    """The signed-in user's review of a psychartist."""
+    serializer_class = ReviewSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_object(self):
+        return get_object_or_404(
+            Review.objects.select_related('user'), psychartist_id=self.kwargs['pk'], user=self.request.user
+        )
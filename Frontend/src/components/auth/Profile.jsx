@@ -28,12 +28,12 @@ function Profile() {
         setLoadingData(true);
         
         // Fetch regular check-ins
-        const checkInResponse = await axios.get(`${API_URL}/checkin/`);
-        setRecentCheckIns(checkInResponse.data.slice(0, 2));
+        const checkInResponse = await axios.get(`${API_URL}/checkin/`, { params: { limit: 2 } });
+        setRecentCheckIns(checkInResponse.data.results);
         
         // Fetch quick check-ins
-        const quickCheckInResponse = await axios.get(`${API_URL}/checkin/quick/`);
-        setRecentQuickCheckIns(quickCheckInResponse.data.slice(0, 2));
+        const quickCheckInResponse = await axios.get(`${API_URL}/checkin/quick/`, { params: { limit: 2 } });
+        setRecentQuickCheckIns(quickCheckInResponse.data.results);
         
       } catch (error) {
         console.error('Error fetching recent check-ins:', error);
@@ -23,12 +23,16 @@ function PsychartistList() {
   useEffect(() => {
     if (!isAuthenticated) return;
     fetchPsychartists();
-  }, [isAuthenticated]);
+  }, [isAuthenticated, selectedSpecialization]);
 
   const fetchPsychartists = async () => {
     try {
       setLoading(true);
-      const response = await axios.get(`${API_URL}/psychartist/`);
+      // Filtering happens on the server; the list only carries card fields
+      const params = selectedSpecialization && selectedSpecialization !== 'All Specializations'
+        ? { specialization: selectedSpecialization }
+        : {};
+      const response = await axios.get(`${API_URL}/psychartist/`, { params });
       setPsychartists(response.data);
     } catch (error) {
       console.error('Error fetching psychartists:', error);
@@ -54,9 +58,7 @@ function PsychartistList() {
     'PTSD Treatment'
   ];
 
-  const filteredPsychartists = selectedSpecialization && selectedSpecialization !== 'All Specializations'
-    ? psychartists.filter(p => p.specialization === selectedSpecialization)
-    : psychartists;
+  const filteredPsychartists = psychartists;
 
   const renderStars = (rating) => {
     const stars = [];
@@ -153,7 +155,7 @@ function PsychartistList() {
         {/* Results Count */}
         <div className="mb-6 text-center">
           <p className="text-gray-600">
-            Showing {filteredPsychartists.length} of {psychartists.length} psychartists
+            Showing {filteredPsychartists.length} psychartists
           </p>
         </div>
 
@@ -192,7 +194,17 @@ function PsychartistList() {
                 {/* Profile Picture */}
                 <div className="flex items-center mb-4">
                   <div className="w-16 h-16 bg-darkGreen text-white rounded-full flex items-center justify-center text-xl font-bold mr-4">
-                    {psychartist.profile_picture ? (
+                    {psychartist.profile_picture_variants ? (
+                      <picture>
+                        <source srcSet={psychartist.profile_picture_variants.thumbnail.webp} type="image/webp" />
+                        <img 
+                          src={psychartist.profile_picture_variants.thumbnail.jpeg} 
+                          alt={psychartist.full_name}
+                          loading="lazy"
+                          className="w-16 h-16 rounded-full object-cover"
+                        />
+                      </picture>
+                    ) : psychartist.profile_picture ? (
                       <img 
                         src={psychartist.profile_picture} 
                         alt={psychartist.full_name}
@@ -254,9 +266,9 @@ function PsychartistList() {
                 {/* Bio Preview */}
                 <div className="mb-4">
                   <p className="text-sm text-gray-600 line-clamp-3">
-                    {psychartist.bio.length > 120 
-                      ? `${psychartist.bio.substring(0, 120)}...`
-                      : psychartist.bio
+                    {psychartist.bio_excerpt.length > 120 
+                      ? `${psychartist.bio_excerpt.substring(0, 120)}...`
+                      : psychartist.bio_excerpt
                     }
                   </p>
                 </div>
@@ -117,7 +117,16 @@ function PsychartistProfile() {
             {/* Profile Picture */}
             <div className="shrink-0">
               <div className="w-32 h-32 bg-darkGreen text-white rounded-full flex items-center justify-center text-4xl font-bold">
-                {psychartist.profile_picture ? (
+                {psychartist.profile_picture_variants ? (
+                  <picture>
+                    <source srcSet={psychartist.profile_picture_variants.card.webp} type="image/webp" />
+                    <img 
+                      src={psychartist.profile_picture_variants.card.jpeg} 
+                      alt={psychartist.full_name}
+                      className="w-32 h-32 rounded-full object-cover"
+                    />
+                  </picture>
+                ) : psychartist.profile_picture ? (
                   <img 
                     src={psychartist.profile_picture} 
                     alt={psychartist.full_name}